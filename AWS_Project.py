@@ -1,11 +1,17 @@
 import streamlit as st
+import atexit
 import os
 import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import time
 import random
-from posture_detection import PostureDetector
-from wellness_tracker import WellnessTracker
+import uuid
+import metrics
+from alert_bus import AlertBus
+from storage import create_storage
+from tracker_registry import TrackerRegistry
 
 # Set page configuration
 st.set_page_config(
@@ -34,11 +40,105 @@ if 'stats' not in st.session_state:
         "last_break_time": None,
     }
 
-if 'wellness_tracker' not in st.session_state:
-    st.session_state.wellness_tracker = WellnessTracker()
+# With WELLNESS_EVENT_LOG set, one tracker is rebuilt from the log and
+# shared by every session of this process; otherwise trackers live in a
+# per-user registry shared by all sessions (see session_tracker())
+EVENT_LOG_PATH = os.environ.get("WELLNESS_EVENT_LOG")
 
-if 'posture_detector' not in st.session_state:
-    st.session_state.posture_detector = None
+# Users pick their ID with ?user=...; anonymous sessions get their own
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex
+
+PAGE_RENDER = metrics.histogram(
+    "wellness_page_render_seconds", "Streamlit page render time", ("page",))
+
+@st.cache_resource
+def get_tracker_registry():
+    budget = int(os.environ.get("WELLNESS_TRACKER_BUDGET_MB", "64")) * 1024 * 1024
+    return TrackerRegistry(create_storage(), max_bytes=budget)
+
+@st.cache_resource
+def get_logged_tracker(path):
+    # A single EventLog per file: separate instances would each snapshot
+    # their own tracker against records other sessions appended
+    from event_log import load_tracker
+    tracker = load_tracker(path)
+    atexit.register(tracker.event_log.close)
+    return tracker, threading.Lock()
+
+@contextmanager
+def session_tracker():
+    """This session's tracker, held exclusively for one script run"""
+    if EVENT_LOG_PATH:
+        tracker, lock = get_logged_tracker(EVENT_LOG_PATH)
+        with lock:
+            yield tracker
+    else:
+        with get_tracker_registry().use(st.session_state.user_id) as tracker:
+            yield tracker
+
+# ID of this session's stream in the shared detector pool while detection runs
+if 'posture_stream' not in st.session_state:
+    st.session_state.posture_stream = None
+
+if 'last_render_ms' not in st.session_state:
+    st.session_state.last_render_ms = None
+
+@st.cache_resource
+def get_detector_pool():
+    # One worker pool shared by every browser session of this server process.
+    # Imported here so pages that never start detection don't pay for it.
+    from posture_detection import PostureDetectorPool
+    pool = PostureDetectorPool(max_workers=2)
+    pool.start()
+    return pool
+
+# Detector threads publish here; the page drains it on each rerun, so
+# session state is only ever touched from the Streamlit script thread
+if 'alert_bus' not in st.session_state:
+    st.session_state.alert_bus = AlertBus()
+
+def session_alive():
+    # A callable telling whether this browser session is still connected,
+    # or None when not running under the Streamlit server
+    from streamlit import runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if not runtime.exists() or ctx is None:
+        return None
+    server, session_id = runtime.get_instance(), ctx.session_id
+    return lambda: server.is_active_session(session_id)
+
+def start_posture_stream():
+    # In a real implementation, this would use the webcam
+    # For this demo, we'll just simulate it
+    from frame_pipeline import SyntheticFrameSource
+    stream_id = uuid.uuid4().hex
+    # The pool drops the stream once the session is gone, even without Stop
+    get_detector_pool().add_stream(stream_id, SyntheticFrameSource(),
+                                   callback=st.session_state.alert_bus.publish, keep_alive=session_alive())
+    st.session_state.posture_stream = stream_id
+
+# A session that was disconnected long enough to lose its stream resumes detection
+if st.session_state.posture_stream is not None and not get_detector_pool().has_stream(st.session_state.posture_stream):
+    start_posture_stream()
+
+def count_alerts(alert_type, count):
+    if alert_type == "posture":
+        st.session_state.stats["posture_corrections"] += count
+    for _ in range(count):
+        st.session_state.wellness_tracker.record_alert(alert_type)
+
+def process_alerts():
+    # Every occurrence is counted, including repeats the bus coalesced,
+    # rate-limited or dropped; only the returned alerts are displayed
+    bus = st.session_state.alert_bus
+    alerts = bus.drain()
+    for alert in alerts:
+        count_alerts(alert["type"], alert["count"])
+    for alert_type, count in bus.drain_undelivered().items():
+        count_alerts(alert_type, count)
+    return alerts
 
 # Navigation
 def navigation():
@@ -109,6 +209,10 @@ def home_page():
 def dashboard_page():
     st.title("Wellness Dashboard")
     
+    # Apply alerts raised by the detector since the last rerun
+    for alert in process_alerts():
+        st.warning(f"{alert['data']['message']} (x{alert['count']})")
+    
     # Get stats
     stats = st.session_state.wellness_tracker.get_stats()
     
@@ -137,28 +241,41 @@ def dashboard_page():
         last_break = "Never" if not st.session_state.stats["last_break_time"] else datetime.fromisoformat(st.session_state.stats["last_break_time"]).strftime("%H:%M:%S")
         st.markdown(f"**Last Break:** {last_break}")
     
+    # Trends read precomputed rollups, so their cost does not grow with history
+    st.subheader("Trends")
+    col1, col2 = st.columns(2)
+    now = datetime.now()
+    
+    with col1:
+        breaks = st.session_state.wellness_tracker.get_trend("breaks", "hour", now - timedelta(hours=23))
+        st.markdown("**Breaks per hour (last 24 hours)**")
+        st.bar_chart({
+            "hour": [bucket.strftime("%H:00") for bucket, _ in breaks],
+            "breaks": [value for _, value in breaks]
+        }, x="hour", y="breaks")
+    
+    with col2:
+        focus = st.session_state.wellness_tracker.get_trend("focus_seconds", "day", now - timedelta(days=29))
+        st.markdown("**Focus time per day (last 30 days)**")
+        st.bar_chart({
+            "day": [bucket.strftime("%m-%d") for bucket, _ in focus],
+            "minutes": [value / 60 for _, value in focus]
+        }, x="day", y="minutes")
+    
     # Posture detection section
     st.subheader("Posture Detection")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.session_state.posture_detector is None or not st.session_state.posture_detector.is_running:
+        if st.session_state.posture_stream is None:
             if st.button("Start Posture Detection"):
-                # In a real implementation, this would use the webcam
-                # For this demo, we'll just simulate it
-                st.session_state.posture_detector = PostureDetector()
-                
-                def alert_callback(alert_type, data):
-                    if alert_type == "posture" and data.get('alert'):
-                        st.session_state.stats["posture_corrections"] += 1
-                
-                st.session_state.posture_detector.start(callback=alert_callback)
+                start_posture_stream()
                 st.success("Posture detection started!")
         else:
             if st.button("Stop Posture Detection"):
-                st.session_state.posture_detector.stop()
-                st.session_state.posture_detector = None
+                get_detector_pool().remove_stream(st.session_state.posture_stream)
+                st.session_state.posture_stream = None
                 st.success("Posture detection stopped!")
     
     with col2:
@@ -166,6 +283,38 @@ def dashboard_page():
         if st.button("Simulate Bad Posture"):
             st.session_state.stats["posture_corrections"] += 1
             st.warning("Bad posture detected! Please sit up straight.")
+    
+    with st.expander("Alert delivery metrics"):
+        st.json(st.session_state.alert_bus.get_metrics())
+    
+    with st.expander("Performance"):
+        if st.session_state.last_render_ms is not None:
+            st.markdown(f"**Previous render:** {st.session_state.last_render_ms:.1f} ms")
+        st.json(st.session_state.wellness_tracker.cache_info())
+
+    with st.expander("Metrics"):
+        # Counters and latency histograms recorded in this process
+        snapshot = metrics.REGISTRY.snapshot()
+        if not snapshot["enabled"]:
+            st.info("Metrics are disabled (WELLNESS_METRICS=0).")
+        latency_rows = [
+            dict(series["labels"], metric=name, count=series["count"],
+                 mean_ms=series["mean"] * 1000, p50_ms=series["p50"] * 1000, p99_ms=series["p99"] * 1000)
+            for name, all_series in snapshot["histograms"].items()
+            for series in all_series
+        ]
+        counter_rows = [
+            dict(series["labels"], metric=name, value=series["value"])
+            for name, all_series in snapshot["counters"].items()
+            for series in all_series
+        ]
+        if latency_rows:
+            st.dataframe(latency_rows)
+        if counter_rows:
+            st.dataframe(counter_rows)
+        if snapshot["recent_spans"]:
+            st.caption("Most recent spans")
+            st.dataframe(snapshot["recent_spans"][-20:])
 
 # Settings page
 def settings_page():
@@ -217,9 +366,7 @@ def settings_page():
             st.success("Settings saved successfully!")
 
 # Main app
-def main():
-    page = navigation()
-    
+def render_page(page):
     if page == "Home":
         home_page()
     elif page == "Dashboard":
@@ -227,5 +374,21 @@ def main():
     elif page == "Settings":
         settings_page()
 
+def main():
+    started = time.perf_counter()
+    page = navigation()
+    
+    # Hold the tracker for the run, then drop it from session state so
+    # the registry (or the shared log) alone decides how long it lives
+    with session_tracker() as tracker:
+        st.session_state.wellness_tracker = tracker
+        try:
+            render_page(page)
+        finally:
+            del st.session_state.wellness_tracker
+    elapsed = time.perf_counter() - started
+    PAGE_RENDER.observe(elapsed, page)
+    st.session_state.last_render_ms = elapsed * 1000
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
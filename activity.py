@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+
+from burnout_scoring import calculate_burnout_risk
+
+# Numeric IDE activity fields; missing values default to 0
+NUMERIC_FIELDS = ("hours_active", "typing_intensity")
+
+
+def validate_activity(sample, default_user, received_at=None):
+    """
+    Validate one IDE activity sample and return it normalised as a dict
+    with user_id, recorded_at, hours_active, typing_intensity and
+    late_night_coding. Raises ValueError describing the first problem found.
+    """
+    if not isinstance(sample, dict):
+        raise ValueError("sample must be a JSON object")
+
+    normalised = {}
+    for field in NUMERIC_FIELDS:
+        value = sample.get(field, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+        if value < 0:
+            raise ValueError(f"{field} must not be negative")
+        normalised[field] = value
+
+    late_night = sample.get("late_night_coding", False)
+    if not isinstance(late_night, bool):
+        raise ValueError("late_night_coding must be a boolean")
+    normalised["late_night_coding"] = late_night
+
+    user_id = sample.get("user_id", default_user)
+    if not isinstance(user_id, str) or not user_id:
+        raise ValueError("user_id must be a non-empty string")
+    normalised["user_id"] = user_id
+
+    recorded_at = sample.get("timestamp")
+    if recorded_at is None:
+        recorded_at = received_at or datetime.now().isoformat()
+    elif not isinstance(recorded_at, str):
+        raise ValueError("timestamp must be an ISO 8601 string")
+    normalised["recorded_at"] = recorded_at
+    return normalised
+
+
+def parse_batch(body, content_type):
+    """
+    Decode a batch request body into a list of raw samples.
+    Accepts a JSON array, or NDJSON (one object per line) when the content
+    type is application/x-ndjson. Raises ValueError on malformed input.
+    """
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    if "ndjson" in (content_type or ""):
+        samples = []
+        for line_number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                samples.append(json.loads(line))
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"line {line_number}: {exc.msg}") from None
+        return samples
+
+    try:
+        samples = json.loads(body)
+    except json.JSONDecodeError as exc:
+        raise ValueError(exc.msg) from None
+    if not isinstance(samples, list):
+        raise ValueError("expected a JSON array of activity samples")
+    return samples
+
+
+def score_batch(samples, default_user, received_at=None):
+    """
+    Validate and score raw samples in one pass.
+    Returns (accepted samples with burnout_risk set, rejected
+    [{"index", "message"}], {user_id: [risk, ...]}).
+    """
+    received_at = received_at or datetime.now().isoformat()
+    accepted = []
+    rejected = []
+    risks = {}
+    for index, raw in enumerate(samples):
+        try:
+            sample = validate_activity(raw, default_user, received_at)
+        except ValueError as exc:
+            rejected.append({"index": index, "message": str(exc)})
+            continue
+        sample["burnout_risk"] = calculate_burnout_risk(sample)
+        risks.setdefault(sample["user_id"], []).append(sample["burnout_risk"])
+        accepted.append(sample)
+    return accepted, rejected, risks
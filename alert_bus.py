@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import metrics
+
+ALERTS = metrics.counter(
+    "wellness_alerts_total", "Alerts published to alert buses, by what happened to them", ("type", "outcome"))
+
+
+class AlertBus:
+    """
+    Thread-safe hand-off of detector alerts to a UI or API.
+    publish() never blocks beyond a short lock and can be passed directly as
+    a PostureDetector callback. Repeats of an alert that is still waiting to
+    be drained are coalesced into it, and repeats arriving within
+    min_interval seconds of the last delivered one are suppressed. Consumers
+    pull alerts in batches with drain(); rate limiting only affects what is
+    shown, so occurrences that were suppressed or dropped are still handed
+    over, per type, by drain_undelivered().
+    """
+
+    def __init__(self, maxlen=256, min_interval=30.0):
+        self.maxlen = maxlen
+        self.min_interval = min_interval
+        self._queue = deque()
+        self._pending = {}
+        self._last_delivered = {}
+        # alert type -> occurrences suppressed or dropped since the last drain_undelivered()
+        self._undelivered = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.coalesced = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.drained = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def publish(self, alert_type, data, source=None):
+        """Queue an alert; returns False if it was coalesced, suppressed or dropped"""
+        now = time.monotonic()
+        key = (source, alert_type)
+        with self._lock:
+            self.published += 1
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry["count"] += 1
+                entry["data"] = data
+                entry["last_seen"] = time.time()
+                self.coalesced += 1
+                ALERTS.inc(alert_type, "coalesced")
+                return False
+            last = self._last_delivered.get(key)
+            if last is not None and now - last < self.min_interval:
+                self.suppressed += 1
+                self._undelivered[alert_type] = self._undelivered.get(alert_type, 0) + 1
+                ALERTS.inc(alert_type, "suppressed")
+                return False
+            if len(self._queue) >= self.maxlen:
+                oldest = self._queue.popleft()
+                del self._pending[(oldest["source"], oldest["type"])]
+                self.dropped += 1
+                self._undelivered[oldest["type"]] = self._undelivered.get(oldest["type"], 0) + oldest["count"]
+                ALERTS.inc(oldest["type"], "dropped")
+            wall = time.time()
+            entry = {
+                "type": alert_type,
+                "data": data,
+                "source": source,
+                "count": 1,
+                "first_seen": wall,
+                "last_seen": wall,
+                "_queued_at": now
+            }
+            self._queue.append(entry)
+            self._pending[key] = entry
+            ALERTS.inc(alert_type, "queued")
+            return True
+
+    def drain(self, max_items=None):
+        """Remove and return up to max_items queued alerts, oldest first"""
+        now = time.monotonic()
+        batch = []
+        with self._lock:
+            while self._queue and (max_items is None or len(batch) < max_items):
+                entry = self._queue.popleft()
+                key = (entry["source"], entry["type"])
+                del self._pending[key]
+                self._last_delivered[key] = now
+                latency = now - entry.pop("_queued_at")
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                batch.append(entry)
+            self.drained += len(batch)
+        return batch
+
+    def drain_undelivered(self):
+        """Return and reset the per-type counts of suppressed or dropped occurrences"""
+        with self._lock:
+            counts, self._undelivered = self._undelivered, {}
+        return counts
+
+    def __len__(self):
+        with self._lock:
+            return len(self._queue)
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                "queue_depth": len(self._queue),
+                "published": self.published,
+                "coalesced": self.coalesced,
+                "suppressed": self.suppressed,
+                "dropped": self.dropped,
+                "drained": self.drained,
+                "avg_dispatch_latency_ms": self._latency_total / self.drained * 1000 if self.drained else 0.0,
+                "max_dispatch_latency_ms": self._latency_max * 1000
+            }
+
+
+class AlertBuses:
+    """
+    One AlertBus per user, for servers that key them by a client-supplied
+    id. At most max_buses are kept, in least recently used order; beyond
+    that the least recently used bus is dropped, with any alerts its client
+    never collected.
+    """
+
+    def __init__(self, max_buses=10_000, **bus_options):
+        self.max_buses = max_buses
+        self.bus_options = bus_options
+        self._buses = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, user_id):
+        with self._lock:
+            bus = self._buses.get(user_id)
+            if bus is None:
+                bus = self._buses[user_id] = AlertBus(**self.bus_options)
+                if len(self._buses) > self.max_buses:
+                    self._buses.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._buses.move_to_end(user_id)
+            return bus
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buses)
@@ -0,0 +1,685 @@
+"""
+Offline focus, break-compliance and burnout reports from exported events.
+
+    python analytics_cli.py EXPORT [EXPORT ...] [--jobs 4] [--since 2024-05-01 --until 2024-06-01]
+        [--settings users.csv] [--output report.json] [--no-users]
+
+Each EXPORT is a .csv, .ndjson/.jsonl or .parquet file (CSV and NDJSON may
+be gzip-compressed), or a directory searched recursively for them. Every row
+is one event with user_id, timestamp and kind, plus an optional team:
+
+    focus, break, interruption, posture_alert, eye_strain_alert, session_start
+        WellnessTracker events
+    setting
+        a tracker setting change, with key and value columns
+    ide_activity
+        an IDE activity sample with hours_active, typing_intensity and
+        late_night_coding, scored with the burnout_scoring rules
+
+Timestamps are ISO 8601 or epoch seconds, milliseconds or microseconds. A
+user's events must be in time order within a file; files are merged in path
+order, so date-partitioned exports need no sorting. The --settings CSV
+(user_id, team, microbreak_interval, daily_work_limit; all but user_id
+optional) supplies per-user settings and teams; setting events override
+them from the point they occur.
+
+Files are read in chunks by a pool of worker processes. State is kept per
+user and per day, never per event, so memory stays flat however large the
+input is. Parquet input needs pyarrow.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+from activity import validate_activity
+from burnout_scoring import calculate_burnout_risk_batch, session_burnout_risk
+from event_log import KINDS
+from event_store import RunningStats, from_us, to_us
+
+EXTENSIONS = (".csv", ".ndjson", ".jsonl", ".parquet")
+TRACKER_KINDS = frozenset(KINDS)
+DAY_US = 86400 * 1_000_000
+# Upper edges (minutes) of the focus-gap histogram bins; the last bin is open
+FOCUS_GAP_BINS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240)
+ERROR_SAMPLES = 5
+
+DEFAULTS = {
+    "microbreak_interval": 30,  # minutes
+    "daily_work_limit": 8,  # hours
+    "session_gap_hours": 4,
+    "chunk_rows": 50_000
+}
+
+
+# Reading
+
+def find_exports(paths):
+    """Export files under paths, in sorted path order"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                found.extend(os.path.join(directory, name) for name in names
+                             if _format_name(name).endswith(EXTENSIONS))
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def _format_name(path):
+    return path[:-3] if path.endswith(".gz") else path
+
+
+def _ndjson_rows(handle):
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield {"_error": f"line {line_number}: {exc.msg}"}
+
+
+def read_chunks(path, chunk_rows):
+    """Yield the rows of an export file as lists of at most chunk_rows dicts"""
+    name = _format_name(path)
+    if name.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("reading Parquet needs the pyarrow package") from None
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pylist()
+        return
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        rows = csv.DictReader(handle) if name.endswith(".csv") else _ndjson_rows(handle)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def parse_timestamp(value):
+    """Microseconds since the naive epoch from ISO 8601 text, a datetime or an epoch number"""
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _epoch_us(value)
+    elif isinstance(value, str) and value:
+        try:
+            return _epoch_us(float(value))
+        except ValueError:
+            moment = datetime.fromisoformat(value)
+    else:
+        raise ValueError("timestamp is missing")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return to_us(moment)
+
+
+def _epoch_us(number):
+    magnitude = abs(number)
+    if magnitude >= 1e14:
+        return int(number)
+    if magnitude >= 1e11:
+        return int(number * 1000)
+    return int(number * 1_000_000)
+
+
+def _number(value, field):
+    if isinstance(value, str):
+        try:
+            return float(value) if value.strip() else 0
+        except ValueError:
+            raise ValueError(f"{field} must be a number") from None
+    return 0 if value is None else value
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+# Per-user aggregation
+
+class UserState:
+    """
+    Everything reported for one user, updated event by event.
+    Break compliance is judged per work segment: the time from the start of
+    a session (or the last break) to the next break must not exceed the
+    microbreak interval, and a session that ends more than one interval
+    after its last break counts as a missed break. The first segment of a
+    file and the open segment at its end are held back, so that segments
+    spanning two files can be joined when the files are merged.
+    A setting event in an earlier file applies to the later ones, so the
+    segments a file closes before its own first interval setting are only
+    kept as durations, and scored once the interval in effect at its start
+    is known: when it is merged after the earlier files, or on finish().
+    """
+
+    __slots__ = ("team", "interval", "initial_interval", "work_limit", "settings_changed", "first_us",
+                 "last_us", "clock_us", "lead", "deferred", "first_focus_us", "last_focus_us", "focus_gaps",
+                 "focus_bins", "segments", "compliant", "overdue_minutes", "days", "counts", "out_of_order")
+
+    def __init__(self, team=None, interval=DEFAULTS["microbreak_interval"],
+                 work_limit=DEFAULTS["daily_work_limit"]):
+        self.team = team
+        self.interval = interval
+        self.initial_interval = interval
+        self.work_limit = work_limit
+        # Settings changed by this state's own setting events
+        self.settings_changed = set()
+        self.first_us = None
+        self.last_us = None
+        # Start of the open work segment, and the held-back first one as
+        # (end, by_break, interval), its interval None while deferred
+        self.clock_us = None
+        self.lead = None
+        # Minutes of segments awaiting the inherited interval, negative for
+        # those that ended without a break; None once resolved
+        self.deferred = array("d")
+        self.first_focus_us = None
+        self.last_focus_us = None
+        self.focus_gaps = RunningStats()  # minutes
+        self.focus_bins = [0] * (len(FOCUS_GAP_BINS) + 1)
+        self.segments = 0
+        self.compliant = 0
+        self.overdue_minutes = 0.0
+        # day number -> [first tracker event us, last tracker event us, risk count, risk sum, risk max]
+        self.days = {}
+        self.counts = {}
+        self.out_of_order = 0
+
+    def _day(self, timestamp_us):
+        day = self.days.get(timestamp_us // DAY_US)
+        if day is None:
+            day = self.days[timestamp_us // DAY_US] = [None, None, 0, 0.0, 0.0]
+        return day
+
+    def _add_focus_gap(self, minutes):
+        self.focus_gaps.add(minutes)
+        index = 0
+        for edge in FOCUS_GAP_BINS:
+            if minutes <= edge:
+                break
+            index += 1
+        self.focus_bins[index] += 1
+
+    def _current_interval(self):
+        # None until the interval inherited from earlier files is known
+        if self.deferred is not None and "microbreak_interval" not in self.settings_changed:
+            return None
+        return self.interval
+
+    def _score(self, start_us, end_us, by_break, interval=None):
+        minutes = (end_us - start_us) / 60_000_000
+        if interval is None:
+            interval = self._current_interval()
+        if interval is None:
+            if by_break or minutes > 0:
+                self.deferred.append(minutes if by_break else -minutes)
+            return
+        self._score_minutes(minutes, by_break, interval)
+
+    def _score_minutes(self, minutes, by_break, interval):
+        if by_break:
+            self.segments += 1
+            if minutes <= interval:
+                self.compliant += 1
+            else:
+                self.overdue_minutes += minutes - interval
+        elif minutes > interval:
+            # The session ended without the break that was due
+            self.segments += 1
+            self.overdue_minutes += minutes - interval
+
+    def _close_segment(self, end_us, by_break, interval=None):
+        if self.lead is None:
+            self.lead = (end_us, by_break, self._current_interval() if interval is None else interval)
+        else:
+            self._score(self.clock_us, end_us, by_break, interval)
+
+    def resolve(self, interval):
+        """Score the deferred segments with the microbreak interval in effect when this state began"""
+        deferred, self.deferred = self.deferred, None
+        if deferred is None:
+            return
+        if self.lead is not None and self.lead[2] is None:
+            self.lead = self.lead[:2] + (interval,)
+        for minutes in deferred:
+            self._score_minutes(abs(minutes), minutes >= 0, interval)
+
+    def observe(self, kind, timestamp_us, session_gap_us, key=None, value=None):
+        """Apply one tracker event; events older than the last one are counted and dropped"""
+        if self.last_us is not None and timestamp_us < self.last_us:
+            self.out_of_order += 1
+            return
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        day = self._day(timestamp_us)
+        if day[0] is None:
+            day[0] = timestamp_us
+        day[1] = timestamp_us
+
+        if self.first_us is None:
+            self.first_us = self.clock_us = timestamp_us
+        elif timestamp_us - self.last_us > session_gap_us:
+            self._close_segment(self.last_us, by_break=False)
+            self.clock_us = timestamp_us
+        self.last_us = timestamp_us
+
+        if kind == "focus":
+            if self.first_focus_us is None:
+                self.first_focus_us = timestamp_us
+            elif timestamp_us - self.last_focus_us <= session_gap_us:
+                self._add_focus_gap((timestamp_us - self.last_focus_us) / 60_000_000)
+            self.last_focus_us = timestamp_us
+        elif kind == "break":
+            self._close_segment(timestamp_us, by_break=True)
+            self.clock_us = timestamp_us
+        elif kind == "setting":
+            if key == "microbreak_interval":
+                self.interval = float(value)
+                self.settings_changed.add(key)
+            elif key == "daily_work_limit":
+                self.work_limit = float(value)
+                self.settings_changed.add(key)
+
+    def observe_risk(self, timestamp_us, risk):
+        day = self._day(timestamp_us)
+        day[2] += 1
+        day[3] += risk
+        day[4] = max(day[4], risk)
+        self.counts["ide_activity"] = self.counts.get("ide_activity", 0) + 1
+
+    def merge(self, later, session_gap_us):
+        """Fold in the state of the same user from the next file"""
+        self.resolve(self.initial_interval)
+        # The later file starts under the settings this state ends with
+        interval = self.interval
+        later.resolve(interval)
+        self.team = later.team or self.team
+        if "microbreak_interval" in later.settings_changed:
+            self.interval = later.interval
+        if "daily_work_limit" in later.settings_changed:
+            self.work_limit = later.work_limit
+        self.settings_changed |= later.settings_changed
+        for kind, count in later.counts.items():
+            self.counts[kind] = self.counts.get(kind, 0) + count
+        for number, (first, last, count, total, peak) in later.days.items():
+            day = self.days.get(number)
+            if day is None:
+                self.days[number] = [first, last, count, total, peak]
+                continue
+            if first is not None:
+                day[0] = first if day[0] is None else min(day[0], first)
+                day[1] = last if day[1] is None else max(day[1], last)
+            day[2] += count
+            day[3] += total
+            day[4] = max(day[4], peak)
+        self.focus_gaps.merge(later.focus_gaps)
+        self.focus_bins = [a + b for a, b in zip(self.focus_bins, later.focus_bins)]
+        self.segments += later.segments
+        self.compliant += later.compliant
+        self.overdue_minutes += later.overdue_minutes
+        self.out_of_order += later.out_of_order
+
+        if later.first_focus_us is not None:
+            if self.last_focus_us is not None and 0 <= later.first_focus_us - self.last_focus_us <= session_gap_us:
+                self._add_focus_gap((later.first_focus_us - self.last_focus_us) / 60_000_000)
+            if self.first_focus_us is None:
+                self.first_focus_us = later.first_focus_us
+            self.last_focus_us = later.last_focus_us
+
+        if later.first_us is None:
+            return
+        if self.first_us is None:
+            for name in ("first_us", "last_us", "clock_us", "lead"):
+                setattr(self, name, getattr(later, name))
+            return
+        if later.first_us < self.last_us:
+            self.out_of_order += 1
+        if 0 <= later.first_us - self.last_us <= session_gap_us:
+            # The same session continues: join our open segment to theirs
+            if later.lead is not None:
+                self._close_segment(*later.lead)
+                self.clock_us = later.clock_us
+        else:
+            self._close_segment(self.last_us, False, interval)
+            if later.lead is not None:
+                self._score(later.first_us, *later.lead)
+            self.clock_us = later.clock_us
+        self.last_us = later.last_us
+
+    def finish(self):
+        """Score the held-back segments once no later file can extend them"""
+        self.resolve(self.initial_interval)
+        if self.first_us is None:
+            return
+        if self.lead is None:
+            self._score(self.first_us, self.last_us, by_break=False)
+        else:
+            self._score(self.first_us, *self.lead)
+            self._score(self.clock_us, self.last_us, by_break=False)
+        self.first_us = None
+
+
+# Worker processes
+
+_config = None
+
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+
+def _new_user(user_id, team):
+    setting = _config["users"].get(user_id, {})
+    return UserState(
+        team=setting.get("team") or team,
+        interval=setting.get("microbreak_interval") or _config["microbreak_interval"],
+        work_limit=setting.get("daily_work_limit") or _config["daily_work_limit"]
+    )
+
+
+def process_file(path):
+    """Aggregate one export file into per-user states"""
+    import numpy as np
+    config = _config
+    session_gap_us = int(config["session_gap_hours"] * 3600 * 1_000_000)
+    since_us, until_us = config["since_us"], config["until_us"]
+    users = {}
+    stats = {"path": path, "rows": 0, "rejected": 0, "errors": []}
+
+    def reject(message, row_number):
+        stats["rejected"] += 1
+        if len(stats["errors"]) < ERROR_SAMPLES:
+            stats["errors"].append(f"row {row_number}: {message}")
+
+    try:
+        for chunk in read_chunks(path, config["chunk_rows"]):
+            activity = []
+            for row in chunk:
+                stats["rows"] += 1
+                try:
+                    if "_error" in row:
+                        raise ValueError(row["_error"])
+                    user_id = row.get("user_id")
+                    if not user_id:
+                        raise ValueError("user_id is missing")
+                    kind = row.get("kind") or ("ide_activity" if "hours_active" in row else None)
+                    timestamp_us = parse_timestamp(row.get("timestamp") or row.get("recorded_at"))
+                    if timestamp_us < since_us or timestamp_us >= until_us:
+                        continue
+                    state = users.get(user_id)
+                    if state is None:
+                        state = users[user_id] = _new_user(user_id, row.get("team"))
+                    if kind == "ide_activity":
+                        sample = validate_activity({
+                            "user_id": user_id,
+                            "hours_active": _number(row.get("hours_active"), "hours_active"),
+                            "typing_intensity": _number(row.get("typing_intensity"), "typing_intensity"),
+                            "late_night_coding": _flag(row.get("late_night_coding"))
+                        }, user_id)
+                        activity.append((state, timestamp_us, sample))
+                    elif kind in TRACKER_KINDS:
+                        state.observe(kind, timestamp_us, session_gap_us, row.get("key"), row.get("value"))
+                    else:
+                        raise ValueError(f"unknown kind {kind!r}")
+                except (ValueError, TypeError) as exc:
+                    reject(str(exc), stats["rows"])
+
+            if activity:
+                # Score the chunk's IDE samples in one vectorised call
+                risks = calculate_burnout_risk_batch(
+                    np.fromiter((sample["hours_active"] for _, _, sample in activity), float, len(activity)),
+                    np.fromiter((sample["typing_intensity"] for _, _, sample in activity), float, len(activity)),
+                    np.fromiter((sample["late_night_coding"] for _, _, sample in activity), bool, len(activity))
+                )
+                for (state, timestamp_us, _), risk in zip(activity, risks.tolist()):
+                    state.observe_risk(timestamp_us, risk)
+    except (OSError, ValueError) as exc:
+        stats["failed"] = str(exc)
+    return stats, users
+
+
+# Reports
+
+def _percentile(bins, fraction):
+    total = sum(bins)
+    if not total:
+        return None
+    cumulative = 0
+    for edge, count in zip(FOCUS_GAP_BINS + (None,), bins):
+        cumulative += count
+        if cumulative >= fraction * total:
+            return edge
+    return None
+
+
+def _focus_report(stats, bins):
+    labels = [f"<={edge}m" for edge in FOCUS_GAP_BINS] + [f">{FOCUS_GAP_BINS[-1]}m"]
+    return {
+        "gap_minutes": stats.summary(),
+        "histogram": dict(zip(labels, bins)),
+        "p50_minutes_at_most": _percentile(bins, 0.5),
+        "p90_minutes_at_most": _percentile(bins, 0.9)
+    }
+
+
+def _compliance_report(segments, compliant, overdue_minutes):
+    return {
+        "segments": segments,
+        "compliant": compliant,
+        "compliance_rate": compliant / segments if segments else None,
+        "overdue_minutes": overdue_minutes
+    }
+
+
+def _slope_per_week(points):
+    """Least-squares slope of (day number, value) points, scaled to a week"""
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread * 7
+
+
+def _trajectory(state):
+    days = []
+    for number in sorted(state.days):
+        first, last, count, total, peak = state.days[number]
+        hours = (last - first) / 3_600_000_000 if first is not None else None
+        days.append({
+            "date": from_us(number * DAY_US).date().isoformat(),
+            "activity_samples": count,
+            "activity_risk_mean": total / count if count else None,
+            "activity_risk_max": peak if count else None,
+            "hours_tracked": hours,
+            "session_risk": session_burnout_risk(hours, state.work_limit) if hours is not None else None
+        })
+    return days
+
+
+def _risk_points(number, day):
+    # Activity risk when IDE samples exist for the day, else the session rule
+    if day["activity_risk_mean"] is not None:
+        return number, day["activity_risk_mean"]
+    if day["session_risk"] is not None:
+        return number, day["session_risk"]
+    return None
+
+
+def user_report(state):
+    trajectory = _trajectory(state)
+    points = [point for point in (_risk_points(number, day) for number, day in zip(sorted(state.days), trajectory))
+              if point is not None]
+    return {
+        "team": state.team,
+        "events": state.counts,
+        "out_of_order": state.out_of_order,
+        "microbreak_interval": state.interval,
+        "focus": _focus_report(state.focus_gaps, state.focus_bins),
+        "break_compliance": _compliance_report(state.segments, state.compliant, state.overdue_minutes),
+        "burnout": {
+            "trajectory": trajectory,
+            "trend_per_week": _slope_per_week(points),
+            "latest": points[-1][1] if points else None
+        }
+    }
+
+
+def team_reports(states, reports):
+    teams = {}
+    for user_id, state in states.items():
+        team = teams.get(state.team)
+        if team is None:
+            team = teams[state.team] = {
+                "users": 0, "focus_gaps": RunningStats(), "focus_bins": [0] * len(state.focus_bins),
+                "segments": 0, "compliant": 0, "overdue_minutes": 0.0, "days": {}
+            }
+        team["users"] += 1
+        team["focus_gaps"].merge(state.focus_gaps)
+        team["focus_bins"] = [a + b for a, b in zip(team["focus_bins"], state.focus_bins)]
+        team["segments"] += state.segments
+        team["compliant"] += state.compliant
+        team["overdue_minutes"] += state.overdue_minutes
+        for number, day in zip(sorted(state.days), reports[user_id]["burnout"]["trajectory"]):
+            point = _risk_points(number, day)
+            if point is not None:
+                team["days"].setdefault(number, RunningStats()).add(point[1])
+
+    result = {}
+    for name, team in teams.items():
+        trajectory = [
+            {"date": from_us(number * DAY_US).date().isoformat(), "users": stats.count,
+             "risk_mean": stats.mean, "risk_max": stats.maximum}
+            for number, stats in sorted(team["days"].items())
+        ]
+        result[name or "unassigned"] = {
+            "users": team["users"],
+            "focus": _focus_report(team["focus_gaps"], team["focus_bins"]),
+            "break_compliance": _compliance_report(team["segments"], team["compliant"], team["overdue_minutes"]),
+            "burnout": {
+                "trajectory": trajectory,
+                "trend_per_week": _slope_per_week([(number, stats.mean) for number, stats in sorted(team["days"].items())])
+            }
+        }
+    return result
+
+
+def load_settings(path):
+    if not path:
+        return {}
+    users = {}
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            users[row["user_id"]] = {
+                "team": row.get("team") or None,
+                "microbreak_interval": float(row["microbreak_interval"]) if row.get("microbreak_interval") else None,
+                "daily_work_limit": float(row["daily_work_limit"]) if row.get("daily_work_limit") else None
+            }
+    return users
+
+
+def run(paths, jobs=None, since=None, until=None, settings=None, include_users=True, **options):
+    """Build the report for the export files or directories in paths"""
+    config = dict(DEFAULTS, **options)
+    config["users"] = load_settings(settings)
+    config["since_us"] = to_us(datetime.fromisoformat(since)) if since else -2 ** 63
+    config["until_us"] = to_us(datetime.fromisoformat(until)) if until else 2 ** 63 - 1
+    session_gap_us = int(config["session_gap_hours"] * 3600 * 1_000_000)
+    files = find_exports(paths)
+    started = time.perf_counter()
+
+    states = {}
+    file_stats = []
+
+    def fold(result):
+        stats, users = result
+        file_stats.append(stats)
+        for user_id, state in users.items():
+            if user_id in states:
+                states[user_id].merge(state, session_gap_us)
+            else:
+                states[user_id] = state
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(files) <= 1:
+        _init_worker(config)
+        for path in files:
+            fold(process_file(path))
+    else:
+        with Pool(min(jobs, len(files)), initializer=_init_worker, initargs=(config,)) as pool:
+            # Ordered results so each user's files are merged in path order
+            for result in pool.imap(process_file, files):
+                fold(result)
+
+    for state in states.values():
+        state.finish()
+    reports = {user_id: user_report(state) for user_id, state in states.items()}
+    elapsed = time.perf_counter() - started
+    rows = sum(stats["rows"] for stats in file_stats)
+    return {
+        "meta": {
+            "files": len(files),
+            "rows": rows,
+            "rejected": sum(stats["rejected"] for stats in file_stats),
+            "users": len(states),
+            "seconds": elapsed,
+            "rows_per_sec": rows / elapsed if elapsed else None,
+            "problems": [stats for stats in file_stats if stats["errors"] or "failed" in stats]
+        },
+        "teams": team_reports(states, reports),
+        "users": reports if include_users else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("exports", nargs="+", help="export files or directories")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--since", help="first day or moment to include (ISO 8601)")
+    parser.add_argument("--until", help="end of the period, exclusive (ISO 8601)")
+    parser.add_argument("--settings", help="CSV of user_id, team, microbreak_interval, daily_work_limit")
+    parser.add_argument("--microbreak-interval", type=float, default=DEFAULTS["microbreak_interval"])
+    parser.add_argument("--daily-work-limit", type=float, default=DEFAULTS["daily_work_limit"])
+    parser.add_argument("--session-gap-hours", type=float, default=DEFAULTS["session_gap_hours"],
+                        help="inactivity that ends a work session")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULTS["chunk_rows"])
+    parser.add_argument("--no-users", action="store_true", help="only report teams")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.exports, jobs=args.jobs, since=args.since, until=args.until,
+                 settings=args.settings, include_users=not args.no_users,
+                 microbreak_interval=args.microbreak_interval, daily_work_limit=args.daily_work_limit,
+                 session_gap_hours=args.session_gap_hours, chunk_rows=args.chunk_rows)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output)
+    else:
+        print(output)
+    return 1 if report["meta"]["rejected"] or report["meta"]["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
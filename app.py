@@ -1,27 +1,63 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, g, render_template, request, jsonify, session
 import os
 import json
 from datetime import datetime, timedelta
 import time
+import atexit
+import metrics
+from activity import parse_batch, score_batch, validate_activity
+from alert_bus import AlertBuses
+from burnout_scoring import calculate_burnout_risk
+from storage import DEFAULT_USER, DEFAULT_USER_DATA, create_storage
+from tracker_registry import TrackerRegistry
+from wellness_tracker import tracker_settings
+from write_behind import wrap_storage
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # For session management
 
-# In-memory storage for user data (in a real app, use a database)
-user_data = {
-    "settings": {
-        "posture_alerts": True,
-        "eye_strain_alerts": True,
-        "microbreak_interval": 30,  # minutes
-        "focus_session_length": 50,  # minutes
-    },
-    "stats": {
-        "posture_corrections": 0,
-        "breaks_taken": 0,
-        "focus_sessions": 0,
-        "last_break_time": None,
-    }
-}
+# State lives in the storage backend selected by WELLNESS_STORAGE ("memory"
+# or "sqlite:///path.db"), so it survives restarts and is shared across
+# worker processes. New users are seeded with DEFAULT_USER_DATA. Stats and
+# settings writes are buffered and flushed in batches (see write_behind).
+storage = wrap_storage(create_storage())
+atexit.register(storage.close)
+
+# Per-user WellnessTrackers; cold ones are spilled to storage once the
+# resident set exceeds WELLNESS_TRACKER_BUDGET_MB
+trackers = TrackerRegistry(storage, max_bytes=int(os.environ.get("WELLNESS_TRACKER_BUDGET_MB", "64")) * 1024 * 1024)
+atexit.register(trackers.flush)
+
+REQUEST_LATENCY = metrics.histogram(
+    "wellness_http_request_seconds", "HTTP request latency by route", ("method", "route", "status"))
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route, str(response.status_code))
+    return response
+
+# Alerts waiting to be collected by each user's client via /api/alerts;
+# bounded, since any client can make up a user id
+alert_buses = AlertBuses()
+
+def get_alert_bus(user_id):
+    return alert_buses.get(user_id)
+
+def current_user():
+    # Clients identify themselves with the X-User-Id header
+    user_id = request.headers.get('X-User-Id', DEFAULT_USER)
+    storage.ensure_user(user_id, DEFAULT_USER_DATA)
+    return user_id
+
+def load_user_data(user_id):
+    return {section: storage.get_section(user_id, section) for section in DEFAULT_USER_DATA}
 
 @app.route('/')
 def index():
@@ -29,64 +65,115 @@ def index():
 
 @app.route('/dashboard')
 def dashboard():
-    return render_template('dashboard.html', user_data=user_data)
+    return render_template('dashboard.html', user_data=load_user_data(current_user()))
 
 @app.route('/settings')
 def settings():
-    return render_template('settings.html', settings=user_data["settings"])
+    return render_template('settings.html', settings=storage.get_section(current_user(), "settings"))
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 def api_settings():
+    user_id = current_user()
     if request.method == 'POST':
         data = request.json
-        user_data["settings"].update(data)
+        if not isinstance(data, dict):
+            return jsonify({"status": "error", "message": "settings must be a JSON object"}), 400
+        try:
+            new_settings = tracker_settings(data)
+        except ValueError as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 400
+        storage.update_section(user_id, "settings", data)
+        if new_settings:
+            trackers.call(user_id, "update_settings", new_settings)
         return jsonify({"status": "success"})
-    return jsonify(user_data["settings"])
+    return jsonify(storage.get_section(user_id, "settings"))
 
 @app.route('/api/stats', methods=['GET', 'POST'])
 def api_stats():
+    user_id = current_user()
     if request.method == 'POST':
         data = request.json
-        user_data["stats"].update(data)
+        storage.update_section(user_id, "stats", data)
         return jsonify({"status": "success"})
-    return jsonify(user_data["stats"])
+    return jsonify(storage.get_section(user_id, "stats"))
 
 @app.route('/api/posture-alert', methods=['POST'])
 def posture_alert():
     # In a real app, this would process webcam data or receive processed results
+    user_id = current_user()
     data = request.json
     if data.get('bad_posture', False):
-        user_data["stats"]["posture_corrections"] += 1
+        storage.increment(user_id, "stats", "posture_corrections")
+        get_alert_bus(user_id).publish("posture", data, source=user_id)
+        trackers.call(user_id, "record_alert", "posture")
     return jsonify({"status": "success"})
 
+@app.route('/api/alerts', methods=['GET'])
+def api_alerts():
+    bus = get_alert_bus(current_user())
+    limit = request.args.get('limit', type=int)
+    return jsonify({"alerts": bus.drain(limit), "metrics": bus.get_metrics()})
+
 @app.route('/api/break-taken', methods=['POST'])
 def break_taken():
-    user_data["stats"]["breaks_taken"] += 1
-    user_data["stats"]["last_break_time"] = datetime.now().isoformat()
+    user_id = current_user()
+    storage.apply(user_id, "stats",
+                  increments={"breaks_taken": 1},
+                  updates={"last_break_time": datetime.now().isoformat()})
+    trackers.call(user_id, "take_break")
     return jsonify({"status": "success"})
 
 @app.route('/api/focus-session', methods=['POST'])
 def focus_session():
-    user_data["stats"]["focus_sessions"] += 1
+    user_id = current_user()
+    storage.increment(user_id, "stats", "focus_sessions")
+    trackers.call(user_id, "start_focus_session")
     return jsonify({"status": "success"})
 
+@app.route('/api/wellness', methods=['GET'])
+def api_wellness():
+    with trackers.use(current_user()) as tracker:
+        return jsonify({
+            "stats": tracker.get_stats(),
+            "break_recommendation": tracker.get_break_recommendation(),
+            "burnout": tracker.calculate_burnout_risk()
+        })
+
 @app.route('/api/ide-activity', methods=['POST'])
 def ide_activity():
     # Process IDE activity data for burnout detection
     # This would integrate with IDE extensions in a real app
     data = request.json
-    # Process and store activity data
-    return jsonify({"status": "success", "burnout_risk": calculate_burnout_risk(data)})
-
-def calculate_burnout_risk(activity_data):
-    # Simple algorithm to calculate burnout risk
-    # In a real app, this would be more sophisticated
-    hours = activity_data.get('hours_active', 0)
-    intensity = activity_data.get('typing_intensity', 0)
-    late_night = activity_data.get('late_night_coding', False)
-    
-    risk = min(100, hours * 5 + intensity * 3 + (30 if late_night else 0))
-    return risk
+    try:
+        sample = validate_activity(data, current_user())
+    except ValueError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    sample["burnout_risk"] = calculate_burnout_risk(sample)
+    storage.append_activity([sample])
+    return jsonify({"status": "success", "burnout_risk": sample["burnout_risk"]})
+
+@app.route('/api/ide-activity/batch', methods=['POST'])
+def ide_activity_batch():
+    # Accepts a JSON array or NDJSON body of activity samples. Invalid samples
+    # are reported by index and skipped; the rest are stored in one write.
+    try:
+        samples = parse_batch(request.get_data(), request.content_type)
+    except ValueError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+
+    accepted, rejected, risks = score_batch(samples, current_user())
+    if accepted:
+        storage.append_activity(accepted)
+    return jsonify({
+        "status": "success",
+        "accepted": len(accepted),
+        "rejected": rejected,
+        "burnout_risk": risks
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""
+Asyncio (ASGI) version of the JSON API in app.py.
+
+Run with any ASGI server, e.g.:
+
+    uvicorn asgi_app:app --port 8001
+
+GET /api/events is a Server-Sent Events stream of break reminders and
+burnout-risk changes for the X-User-Id user, pushed when they happen (see
+push.PushHub), so clients need not poll /api/stats or /api/wellness.
+
+Storage and tracker calls are blocking, so they run in worker threads via
+asyncio.to_thread and never stall the event loop. Mutations for one user are
+serialised by a per-user asyncio.Lock, which keeps read-modify-write
+sequences (counter increments, tracker updates) correct when many requests
+for the same user are in flight at once.
+"""
+import asyncio
+import json
+import os
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import metrics
+from activity import parse_batch, score_batch, validate_activity
+from alert_bus import AlertBuses
+from burnout_scoring import calculate_burnout_risk
+from push import PushHub
+from storage import DEFAULT_USER, DEFAULT_USER_DATA, create_storage
+from tracker_registry import TrackerRegistry
+from wellness_tracker import tracker_settings
+from write_behind import wrap_storage
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Users whose storage rows are known to exist; older ones are checked again
+MAX_SEEN_USERS = 10_000
+
+REQUEST_LATENCY = metrics.histogram(
+    "wellness_http_request_seconds", "HTTP request latency by route", ("method", "route", "status"))
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    __slots__ = ("method", "path", "headers", "query", "body")
+
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1")
+                        for name, value in scope["headers"]}
+        self.query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.body = body
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type")
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "request body is not valid JSON")
+
+
+class WellnessASGIApp:
+    """
+    Minimal ASGI application serving the same JSON routes as the Flask app,
+    backed by the same storage and tracker registry.
+    """
+
+    def __init__(self, storage=None, trackers=None):
+        self.storage = storage or wrap_storage(create_storage())
+        self.trackers = trackers or TrackerRegistry(
+            self.storage,
+            max_bytes=int(os.environ.get("WELLNESS_TRACKER_BUDGET_MB", "64")) * 1024 * 1024
+        )
+        self.push = PushHub(self.trackers)
+        # Per-user state is keyed by a client-supplied id, so none of it
+        # may grow without bound: locks live only while a request holds or
+        # awaits them, buses and seen users are capped in LRU order
+        self.alert_buses = AlertBuses()
+        self._user_locks = weakref.WeakValueDictionary()
+        self._seen_users = OrderedDict()
+        self.routes = {
+            ("GET", "/api/settings"): self.get_settings,
+            ("POST", "/api/settings"): self.post_settings,
+            ("GET", "/api/stats"): self.get_stats,
+            ("POST", "/api/stats"): self.post_stats,
+            ("POST", "/api/posture-alert"): self.posture_alert,
+            ("GET", "/api/alerts"): self.alerts,
+            ("POST", "/api/break-taken"): self.break_taken,
+            ("POST", "/api/focus-session"): self.focus_session,
+            ("GET", "/api/wellness"): self.wellness,
+            ("POST", "/api/ide-activity"): self.ide_activity,
+            ("POST", "/api/ide-activity/batch"): self.ide_activity_batch,
+            ("GET", "/metrics"): self.prometheus_metrics
+        }
+        # Routes that stream their own response
+        self.streams = {
+            ("GET", "/api/events"): self.events
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.push.stop()
+                await asyncio.to_thread(self.trackers.flush)
+                # Flushes buffered stats and settings writes
+                await asyncio.to_thread(self.storage.close)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        stream = self.streams.get((scope["method"], scope["path"]))
+        if stream is not None:
+            await stream(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            handler = self.routes.get((scope["method"], scope["path"]))
+            if handler is None:
+                known = any(path == scope["path"] for _, path in list(self.routes) + list(self.streams))
+                raise HTTPError(405 if known else 404, "method not allowed" if known else "not found")
+            request = Request(scope, await self._read_body(receive))
+            status, payload = await handler(request)
+        except HTTPError as exc:
+            status, payload = exc.status, {"status": "error", "message": exc.message}
+        if isinstance(payload, str):
+            # Plain-text responses (the metrics exposition)
+            body, content_type = payload.encode("utf-8"), metrics.CONTENT_TYPE.encode("ascii")
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), b"application/json"
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type),
+                        (b"content-length", str(len(body)).encode("ascii"))]
+        })
+        await send({"type": "http.response.body", "body": body})
+        route = scope["path"] if handler is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, scope["method"], route, str(status))
+
+    async def _read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    def user_lock(self, user_id):
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = self._user_locks[user_id] = asyncio.Lock()
+        return lock
+
+    def get_alert_bus(self, user_id):
+        return self.alert_buses.get(user_id)
+
+    async def current_user(self, request):
+        # Clients identify themselves with the X-User-Id header
+        user_id = request.headers.get("x-user-id", DEFAULT_USER)
+        if user_id in self._seen_users:
+            self._seen_users.move_to_end(user_id)
+        else:
+            await asyncio.to_thread(self.storage.ensure_user, user_id, DEFAULT_USER_DATA)
+            self._seen_users[user_id] = None
+            if len(self._seen_users) > MAX_SEEN_USERS:
+                self._seen_users.popitem(last=False)
+        return user_id
+
+    async def get_settings(self, request):
+        user_id = await self.current_user(request)
+        return 200, await asyncio.to_thread(self.storage.get_section, user_id, "settings")
+
+    async def post_settings(self, request):
+        user_id = await self.current_user(request)
+        data = request.json()
+        if not isinstance(data, dict):
+            raise HTTPError(400, "settings must be a JSON object")
+        try:
+            new_settings = tracker_settings(data)
+        except ValueError as exc:
+            raise HTTPError(400, str(exc))
+        async with self.user_lock(user_id):
+            await asyncio.to_thread(self.storage.update_section, user_id, "settings", data)
+            if new_settings:
+                await asyncio.to_thread(self.trackers.call, user_id, "update_settings", new_settings)
+        if new_settings:
+            await self.push.refresh(user_id)
+        return 200, {"status": "success"}
+
+    async def get_stats(self, request):
+        user_id = await self.current_user(request)
+        return 200, await asyncio.to_thread(self.storage.get_section, user_id, "stats")
+
+    async def post_stats(self, request):
+        user_id = await self.current_user(request)
+        data = request.json()
+        if not isinstance(data, dict):
+            raise HTTPError(400, "stats must be a JSON object")
+        async with self.user_lock(user_id):
+            await asyncio.to_thread(self.storage.update_section, user_id, "stats", data)
+        return 200, {"status": "success"}
+
+    async def posture_alert(self, request):
+        user_id = await self.current_user(request)
+        data = request.json()
+        if isinstance(data, dict) and data.get("bad_posture", False):
+            async with self.user_lock(user_id):
+                await asyncio.to_thread(self.storage.increment, user_id, "stats", "posture_corrections")
+                self.get_alert_bus(user_id).publish("posture", data, source=user_id)
+                await asyncio.to_thread(self.trackers.call, user_id, "record_alert", "posture")
+        return 200, {"status": "success"}
+
+    async def alerts(self, request):
+        bus = self.get_alert_bus(await self.current_user(request))
+        try:
+            limit = int(request.query["limit"][0]) if "limit" in request.query else None
+        except ValueError:
+            limit = None
+        return 200, {"alerts": bus.drain(limit), "metrics": bus.get_metrics()}
+
+    async def break_taken(self, request):
+        user_id = await self.current_user(request)
+        async with self.user_lock(user_id):
+            await asyncio.to_thread(self.storage.apply, user_id, "stats",
+                                    {"breaks_taken": 1},
+                                    {"last_break_time": datetime.now().isoformat()})
+            await asyncio.to_thread(self.trackers.call, user_id, "take_break")
+        await self.push.refresh(user_id)
+        return 200, {"status": "success"}
+
+    async def focus_session(self, request):
+        user_id = await self.current_user(request)
+        async with self.user_lock(user_id):
+            await asyncio.to_thread(self.storage.increment, user_id, "stats", "focus_sessions")
+            await asyncio.to_thread(self.trackers.call, user_id, "start_focus_session")
+        return 200, {"status": "success"}
+
+    async def wellness(self, request):
+        user_id = await self.current_user(request)
+
+        def collect():
+            with self.trackers.use(user_id) as tracker:
+                return {
+                    "stats": tracker.get_stats(),
+                    "break_recommendation": tracker.get_break_recommendation(),
+                    "burnout": tracker.calculate_burnout_risk()
+                }
+        return 200, await asyncio.to_thread(collect)
+
+    async def events(self, scope, receive, send):
+        user_id = await self.current_user(Request(scope, b""))
+        queue = await self.push.subscribe(user_id)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"),
+                        (b"cache-control", b"no-cache")]
+        })
+        await send({"type": "http.response.body", "body": b"retry: 5000\n\n", "more_body": True})
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            self.push.close(queue)
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            while (message := await queue.get()) is not None:
+                await send({"type": "http.response.body", "body": message, "more_body": True})
+        finally:
+            watcher.cancel()
+            self.push.unsubscribe(user_id, queue)
+
+    async def prometheus_metrics(self, request):
+        return 200, metrics.REGISTRY.render()
+
+    async def ide_activity(self, request):
+        data = request.json()
+        try:
+            sample = validate_activity(data, await self.current_user(request))
+        except ValueError as exc:
+            raise HTTPError(400, str(exc))
+        sample["burnout_risk"] = calculate_burnout_risk(sample)
+        await asyncio.to_thread(self.storage.append_activity, [sample])
+        return 200, {"status": "success", "burnout_risk": sample["burnout_risk"]}
+
+    async def ide_activity_batch(self, request):
+        try:
+            samples = parse_batch(request.body, request.content_type)
+        except ValueError as exc:
+            raise HTTPError(400, str(exc))
+        accepted, rejected, risks = score_batch(samples, await self.current_user(request))
+        if accepted:
+            await asyncio.to_thread(self.storage.append_activity, accepted)
+        return 200, {
+            "status": "success",
+            "accepted": len(accepted),
+            "rejected": rejected,
+            "burnout_risk": risks
+        }
+
+
+app = WellnessASGIApp()
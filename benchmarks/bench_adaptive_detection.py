@@ -0,0 +1,128 @@
+"""
+CPU per monitored user and detection latency of fixed versus adaptive
+(motion-gated, alert-driven) posture checking.
+
+    python benchmarks/bench_adaptive_detection.py [--hours 4] [--change-every 10] [--noise 2.0]
+        [--max-interval-factor 2.0] [--max-skips 10]
+
+Each run replays the same simulated desk session in virtual time: a scene
+that changes on average every --change-every minutes, with sensor noise on
+every frame. Only the CPU time spent inside the detector's checks is
+counted. Detection latency is the time from a scene change to the first
+check that analyses the changed scene.
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import SyntheticFrameSource
+from posture_detection import PostureDetector
+
+
+def make_scenes(hours, change_every, seed):
+    """Times (seconds) of scene changes over the session, starting with one at 0"""
+    rng = random.Random(seed)
+    changes = [0.0]
+    while True:
+        next_change = changes[-1] + rng.expovariate(1 / (change_every * 60))
+        if next_change >= hours * 3600:
+            return changes
+        changes.append(next_change)
+
+
+class SceneRenderer:
+    """Frame for any simulated time: the current scene plus sensor noise"""
+
+    def __init__(self, changes, noise, seed):
+        source = SyntheticFrameSource(fps=None, patterns=16)
+        source.open()
+        self.patterns = [np.empty(source.shape, dtype=np.uint8) for _ in range(16)]
+        for pattern in self.patterns:
+            source.read_into(pattern)
+        rng = np.random.default_rng(seed)
+        self.noise = [rng.normal(0, noise, source.shape).astype(np.int16) for _ in range(8)]
+        self.changes = changes
+        self.frame = np.empty(source.shape, dtype=np.uint8)
+        self.calls = 0
+
+    def scene_at(self, t):
+        return int(np.searchsorted(self.changes, t, side="right")) - 1
+
+    def render(self, t):
+        base = self.patterns[(self.scene_at(t) * 7) % len(self.patterns)].astype(np.int16)
+        self.calls += 1
+        np.clip(base + self.noise[self.calls % len(self.noise)], 0, 255, out=base)
+        self.frame[...] = base
+        return self.frame
+
+
+def simulate(detector, renderer, hours):
+    checks = {'posture': detector._check_posture, 'eye_strain': detector._check_eye_strain}
+    due = [(detector.posture_check_interval, 'posture'), (detector.eye_strain_check_interval, 'eye_strain')]
+    heapq.heapify(due)
+    cpu = 0.0
+    analysed_at = []
+    counts = {"checks": 0, "alerts": 0}
+    while due[0][0] < hours * 3600:
+        t, check_type = heapq.heappop(due)
+        frame = renderer.render(t)
+        started = time.process_time()
+        result = detector._run_check(check_type, checks[check_type], frame)
+        cpu += time.process_time() - started
+        counts["checks"] += 1
+        counts["alerts"] += bool(result.get('alert'))
+        if check_type == 'posture' and not result.get('skipped'):
+            analysed_at.append(t)
+        heapq.heappush(due, (t + detector._get_checks().record(check_type, result), check_type))
+
+    # Time from each scene change to the first posture analysis that saw it
+    latencies = []
+    for change in renderer.changes[1:]:
+        index = np.searchsorted(analysed_at, change)
+        if index < len(analysed_at):
+            latencies.append(analysed_at[index] - change)
+    latencies.sort()
+    return {
+        "cpu_ms_per_user_hour": cpu * 1000 / hours,
+        "checks": counts["checks"],
+        "alerts": counts["alerts"],
+        "adaptive": detector.get_adaptive_stats(),
+        "detection_latency_p50_s": latencies[len(latencies) // 2] if latencies else None,
+        "detection_latency_max_s": latencies[-1] if latencies else None
+    }
+
+
+def run(hours, change_every, noise, max_interval_factor, max_skips, seed=11):
+    changes = make_scenes(hours, change_every, seed)
+    report = {"hours": hours, "scene_changes": len(changes) - 1}
+    for name, adaptive in (("fixed", False), ("adaptive", True)):
+        detector = PostureDetector(adaptive=adaptive, max_skips=max_skips,
+                                   max_interval_factor=max_interval_factor)
+        report[name] = simulate(detector, SceneRenderer(changes, noise, seed), hours)
+    report["cpu_reduction"] = report["fixed"]["cpu_ms_per_user_hour"] / report["adaptive"]["cpu_ms_per_user_hour"]
+    report["latency_bound_s"] = PostureDetector().posture_check_interval * max_interval_factor
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--change-every", type=float, default=10.0, help="mean minutes between scene changes")
+    parser.add_argument("--noise", type=float, default=2.0, help="sensor noise standard deviation")
+    parser.add_argument("--max-interval-factor", type=float, default=2.0)
+    parser.add_argument("--max-skips", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.hours, args.change_every, args.noise,
+                         args.max_interval_factor, args.max_skips), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Throughput and peak memory of the offline analytics CLI as the input grows.
+
+    python benchmarks/bench_analytics.py [--users 200] [--days 5] [--files 8] [--jobs 4]
+        [--scales 1,4] [--format csv|ndjson|csv.gz]
+
+Writes --files synthetic exports of tracker events and IDE activity samples
+per scale (each scale multiplies the number of days) into a temporary
+directory, then runs analytics_cli in a fresh process and reports rows/s
+and the peak RSS of the parent and the largest worker. Memory should stay
+flat across scales while the rows grow.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIELDS = ("user_id", "team", "timestamp", "kind", "key", "value",
+          "hours_active", "typing_intensity", "late_night_coding")
+START = datetime(2024, 5, 1)
+
+
+def day_rows(rng, user_id, team, day):
+    """One simulated working day of a user, in time order"""
+    at = START + timedelta(days=day, hours=8 + rng.random() * 2)
+    end = at + timedelta(hours=6 + rng.random() * 4)
+    rows = [{"kind": "session_start", "timestamp": at}]
+    last_break = at
+    while at < end:
+        at += timedelta(minutes=rng.expovariate(1 / 6))
+        if (at - last_break).total_seconds() > rng.uniform(20, 45) * 60:
+            rows.append({"kind": "break", "timestamp": at})
+            last_break = at
+        elif rng.random() < 0.15:
+            rows.append({"kind": "interruption", "timestamp": at})
+        elif rng.random() < 0.3:
+            rows.append({"kind": "ide_activity", "timestamp": at,
+                         "hours_active": round((at - START - timedelta(days=day, hours=8)).total_seconds() / 3600, 2),
+                         "typing_intensity": rng.randint(20, 300),
+                         "late_night_coding": at.hour >= 22})
+        else:
+            rows.append({"kind": "focus", "timestamp": at})
+    for row in rows:
+        row["user_id"] = user_id
+        row["team"] = team
+        row["timestamp"] = row["timestamp"].isoformat()
+    return rows
+
+
+def write_exports(directory, users, days, files, fmt, seed=5):
+    """Split the days over files so that each file holds a date range"""
+    rng = random.Random(seed)
+    per_file = max(1, days // files)
+    rows = 0
+    for index, first_day in enumerate(range(0, days, per_file)):
+        path = os.path.join(directory, f"export-{index:04d}.{fmt}")
+        opener = gzip.open if fmt.endswith(".gz") else open
+        with opener(path, "wt", newline="") as handle:
+            writer = csv.DictWriter(handle, FIELDS) if fmt.startswith("csv") else None
+            if writer:
+                writer.writeheader()
+            for user in range(users):
+                for day in range(first_day, min(days, first_day + per_file)):
+                    for row in day_rows(rng, f"user{user}", f"team{user % 5}", day):
+                        rows += 1
+                        if writer:
+                            writer.writerow(row)
+                        else:
+                            handle.write(json.dumps(row) + "\n")
+    return rows
+
+
+def run_cli(directory, jobs):
+    script = (
+        "import json, resource, sys\n"
+        "import analytics_cli\n"
+        f"report = analytics_cli.run([{directory!r}], jobs={jobs}, include_users=False)\n"
+        "print(json.dumps({'meta': report['meta'],"
+        " 'parent_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+    )
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    elapsed = time.perf_counter() - started
+    result = json.loads(output)
+    return {
+        "rows": result["meta"]["rows"],
+        "rejected": result["meta"]["rejected"],
+        "users": result["meta"]["users"],
+        "seconds": elapsed,
+        "rows_per_sec": result["meta"]["rows"] / elapsed,
+        "parent_peak_rss_mb": result["parent_rss_kb"] / 1024,
+        # Largest finished child of this process: the CLI or one of its workers
+        "largest_process_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--scales", default="1,4")
+    parser.add_argument("--format", default="csv", choices=("csv", "ndjson", "csv.gz"))
+    args = parser.parse_args()
+
+    report = {"users": args.users, "jobs": args.jobs, "format": args.format, "runs": []}
+    for scale in (int(value) for value in args.scales.split(",")):
+        with tempfile.TemporaryDirectory() as directory:
+            started = time.perf_counter()
+            rows = write_exports(directory, args.users, args.days * scale, args.files * scale, args.format)
+            generated = time.perf_counter() - started
+            size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            run = run_cli(directory, args.jobs)
+            run.update(scale=scale, generated_rows=rows, input_mb=size / 2 ** 20, generate_seconds=generated)
+            report["runs"].append(run)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
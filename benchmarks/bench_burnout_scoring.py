@@ -0,0 +1,65 @@
+"""
+Scalar versus vectorised burnout scoring over many user/hour windows.
+Verifies that both forms agree exactly before reporting timings.
+
+    python benchmarks/bench_burnout_scoring.py [--rows 1000000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from burnout_scoring import (calculate_burnout_risk, calculate_burnout_risk_batch,
+                             session_burnout_risk, session_burnout_risk_batch)
+
+
+def run(rows, daily_work_limit=8):
+    rng = np.random.default_rng(42)
+    hours = rng.uniform(0, 14, rows)
+    intensity = rng.uniform(0, 10, rows)
+    late_night = rng.random(rows) < 0.2
+    session_hours = rng.uniform(0, 12, rows)
+
+    start = time.perf_counter()
+    activity_batch = calculate_burnout_risk_batch(hours, intensity, late_night)
+    session_batch = session_burnout_risk_batch(session_hours, daily_work_limit)
+    batch_elapsed = time.perf_counter() - start
+
+    hours_list = hours.tolist()
+    intensity_list = intensity.tolist()
+    late_list = late_night.tolist()
+    session_list = session_hours.tolist()
+    start = time.perf_counter()
+    activity_scalar = [
+        calculate_burnout_risk({"hours_active": h, "typing_intensity": i, "late_night_coding": l})
+        for h, i, l in zip(hours_list, intensity_list, late_list)
+    ]
+    session_scalar = [session_burnout_risk(h, daily_work_limit) for h in session_list]
+    scalar_elapsed = time.perf_counter() - start
+
+    if activity_batch.tolist() != activity_scalar or session_batch.tolist() != session_scalar:
+        raise SystemExit("batch scorer disagrees with the scalar rules")
+
+    return {
+        "rows": rows,
+        "scalar_seconds": scalar_elapsed,
+        "batch_seconds": batch_elapsed,
+        "batch_rows_per_sec": rows / batch_elapsed,
+        "speedup": scalar_elapsed / batch_elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start rebuild time of a WellnessTracker from a large event log, with
+and without a snapshot of the aggregates.
+
+    python benchmarks/bench_event_log.py [--events 10000000] [--tail 10000] [--dir /tmp]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import HEADER, KINDS, MAGIC, VERSION, EventLog, load_tracker, record_dtype
+from event_store import to_us
+from datetime import datetime
+
+
+def write_log(path, events):
+    """Write a synthetic log directly with NumPy: mostly focus/break events ~30 s apart"""
+    rng = np.random.default_rng(42)
+    records = np.zeros(events, dtype=record_dtype())
+    start = to_us(datetime(2025, 1, 1))
+    records["ts"] = start + np.cumsum(rng.integers(1, 60_000_000, events))
+    records["kind"] = rng.choice(
+        [KINDS["focus"], KINDS["break"], KINDS["interruption"], KINDS["posture_alert"]],
+        size=events, p=[0.5, 0.4, 0.05, 0.05])
+    records["kind"][0] = KINDS["session_start"]
+    with open(path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION))
+        records.tofile(handle)
+
+
+def timed_load(path):
+    start = time.perf_counter()
+    tracker = load_tracker(path)
+    elapsed = time.perf_counter() - start
+    tracker.event_log.close()
+    return elapsed, tracker
+
+
+def run(events, tail, directory):
+    path = os.path.join(directory, "bench_events.log")
+    for leftover in (path, path + ".snapshot"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    write_log(path, events - tail)
+
+    full_seconds, tracker = timed_load(path)
+
+    # Snapshot the aggregates, then append a tail the next start must replay
+    log = EventLog(path)
+    log.save_snapshot(tracker)
+    for i in range(tail):
+        log.append("focus" if i % 2 else "break", tracker.focus_sessions.last_us() + (i + 1) * 1_000_000)
+    log.close()
+    snapshot_seconds, restored = timed_load(path)
+
+    os.remove(path)
+    os.remove(path + ".snapshot")
+    return {
+        "events": events,
+        "tail_events": tail,
+        "rebuild_without_snapshot_seconds": full_seconds,
+        "rebuild_with_snapshot_seconds": snapshot_seconds,
+        "focus_sessions": len(restored.focus_sessions),
+        "breaks": len(restored.breaks)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--tail", type=int, default=10_000)
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+    print(json.dumps(run(args.events, args.tail, args.dir), indent=2))
+
+
+if __name__ == "__main__":
+    main()
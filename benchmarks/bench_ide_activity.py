@@ -0,0 +1,67 @@
+"""
+Throughput of the single-event /api/ide-activity route versus the
+/api/ide-activity/batch route, measured through the Flask test client.
+
+    python benchmarks/bench_ide_activity.py [--events 5000] [--batch-size 1000] [--storage URL]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_samples(count, users=50):
+    rng = random.Random(42)
+    return [
+        {
+            "user_id": f"dev-{rng.randrange(users)}",
+            "hours_active": round(rng.uniform(0, 12), 2),
+            "typing_intensity": round(rng.uniform(0, 10), 2),
+            "late_night_coding": rng.random() < 0.2
+        }
+        for _ in range(count)
+    ]
+
+
+def run(events, batch_size, storage_url):
+    os.environ["WELLNESS_STORAGE"] = storage_url
+    import app as flask_app
+    client = flask_app.app.test_client()
+    samples = make_samples(events)
+
+    start = time.perf_counter()
+    for sample in samples:
+        client.post("/api/ide-activity", json=sample)
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for offset in range(0, events, batch_size):
+        chunk = samples[offset:offset + batch_size]
+        body = "\n".join(json.dumps(sample) for sample in chunk)
+        client.post("/api/ide-activity/batch", data=body, content_type="application/x-ndjson")
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        "events": events,
+        "batch_size": batch_size,
+        "single_events_per_sec": events / single_elapsed,
+        "batch_events_per_sec": events / batch_elapsed,
+        "speedup": single_elapsed / batch_elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--storage", default="memory")
+    args = parser.parse_args()
+    print(json.dumps(run(args.events, args.batch_size, args.storage), indent=2))
+
+
+if __name__ == "__main__":
+    main()
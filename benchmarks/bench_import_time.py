@@ -0,0 +1,79 @@
+"""
+Import-time budget check based on `python -X importtime`.
+
+    python benchmarks/bench_import_time.py [--runs 5] [--scale 1.0]
+
+Each module is imported in a fresh interpreter; the best cumulative time
+over several runs is compared with its budget, and the heavy optional
+dependencies (OpenCV, NumPy, Streamlit) must not be pulled in at all.
+Exits non-zero when a budget is exceeded. --scale multiplies every budget
+for slower machines.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import budgets in milliseconds
+BUDGETS_MS = {
+    "wellness_tracker": 50,
+    "storage": 50,
+    "posture_detection": 80,
+    "app": 400
+}
+FORBIDDEN = ("cv2", "numpy", "streamlit")
+
+
+def measure(module):
+    """Return (cumulative microseconds, heavy modules imported) for one cold import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    cumulative = None
+    heavy = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        name = parts[2].strip()
+        if name.split(".")[0] in FORBIDDEN:
+            heavy.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(parts[1])
+    return cumulative, sorted(heavy)
+
+
+def run(runs, scale):
+    report = {}
+    failed = False
+    for module, budget_ms in BUDGETS_MS.items():
+        samples = [measure(module) for _ in range(runs)]
+        best_ms = min(cumulative for cumulative, _ in samples) / 1000
+        heavy = samples[0][1]
+        within_budget = best_ms <= budget_ms * scale and not heavy
+        failed = failed or not within_budget
+        report[module] = {
+            "best_ms": best_ms,
+            "budget_ms": budget_ms * scale,
+            "heavy_imports": heavy,
+            "ok": within_budget
+        }
+    return report, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+    report, failed = run(args.runs, args.scale)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Per-frame latency and accuracy of the OpenCV posture/eye-strain analysis.
+
+    python benchmarks/bench_posture_analysis.py [--clip video.mp4 --labels labels.csv]
+        [--frames 300] [--budget-ms 10]
+
+The labels CSV has a header row "frame,bad_posture,eye_strain" with one row
+per labelled frame index and 0/1 values. Without --clip, synthetic frames
+are used and only latency is reported.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import SyntheticFrameSource, VideoFileFrameSource
+from posture_analysis import FrameAnalyzer
+
+
+def load_labels(path):
+    with open(path, newline="") as handle:
+        return {
+            int(row["frame"]): (row["bad_posture"] == "1", row["eye_strain"] == "1")
+            for row in csv.DictReader(handle)
+        }
+
+
+def score(predictions, labels):
+    true_pos = sum(1 for p, l in zip(predictions, labels) if p and l)
+    false_pos = sum(1 for p, l in zip(predictions, labels) if p and not l)
+    false_neg = sum(1 for p, l in zip(predictions, labels) if not p and l)
+    correct = sum(1 for p, l in zip(predictions, labels) if p == l)
+    return {
+        "accuracy": correct / len(labels) if labels else None,
+        "precision": true_pos / (true_pos + false_pos) if true_pos + false_pos else None,
+        "recall": true_pos / (true_pos + false_neg) if true_pos + false_neg else None
+    }
+
+
+def run(clip, labels_path, frames, budget_ms):
+    source = VideoFileFrameSource(clip) if clip else SyntheticFrameSource(fps=None)
+    source.open()
+    labels = load_labels(labels_path) if labels_path else {}
+    analyzer = FrameAnalyzer(latency_budget_ms=budget_ms)
+    buffer = np.empty(source.shape, dtype=np.uint8)
+
+    posture_latency, eye_latency = [], []
+    predicted, expected = {"posture": [], "eye_strain": []}, {"posture": [], "eye_strain": []}
+    index = 0
+    while index < frames and source.read_into(buffer):
+        posture = analyzer.analyze_posture(buffer)
+        eyes = analyzer.analyze_eye_strain(buffer)
+        posture_latency.append(posture["latency_ms"])
+        eye_latency.append(eyes["latency_ms"])
+        if index in labels:
+            bad_posture, eye_strain = labels[index]
+            predicted["posture"].append(posture["alert"])
+            expected["posture"].append(bad_posture)
+            predicted["eye_strain"].append(eyes["alert"])
+            expected["eye_strain"].append(eye_strain)
+        index += 1
+    source.close()
+
+    def latency_summary(values):
+        values = np.asarray(values)
+        return {
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "max_ms": float(values.max()),
+            "over_budget": int((values > budget_ms).sum())
+        }
+
+    report = {
+        "frames": index,
+        "frame_shape": list(source.shape),
+        "budget_ms": budget_ms,
+        "final_analysis_width": analyzer.analysis_width,
+        "posture_latency": latency_summary(posture_latency),
+        "eye_strain_latency": latency_summary(eye_latency)
+    }
+    if labels:
+        report["posture_accuracy"] = score(predicted["posture"], expected["posture"])
+        report["eye_strain_accuracy"] = score(predicted["eye_strain"], expected["eye_strain"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clip")
+    parser.add_argument("--labels")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.clip, args.labels, args.frames, args.budget_ms), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Idle cost and delivery lag of the /api/events push channel in asgi_app.py.
+
+Starts the ASGI app under uvicorn, opens --subscribers Server-Sent Events
+streams (one user each) and gives --reminding of those users a short break
+interval, so their reminder fires during the run. Reports server memory and
+CPU time while the streams sit idle, how late each reminder arrived after
+its deadline, and the requests a client polling every --poll-interval
+seconds would have made instead.
+
+    python benchmarks/bench_push.py [--subscribers 10000] [--reminding 100] [--interval 5] [--duration 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_test import Connection, percentile, spawn
+
+
+def process_stats(pid):
+    with open(f"/proc/{pid}/status") as handle:
+        rss = next(int(line.split()[1]) for line in handle if line.startswith("VmRSS"))
+    with open(f"/proc/{pid}/stat") as handle:
+        fields = handle.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return rss * 1024, cpu
+
+
+async def subscribe(host, port, user_id):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /api/events HTTP/1.1\r\nHost: {host}\r\nX-User-Id: {user_id}\r\n\r\n".encode())
+    await writer.drain()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return reader, writer
+
+
+async def read_events(reader, received):
+    """Collect (event name, arrival time) pairs from a chunked SSE stream"""
+    event = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        if line.startswith(b"event: "):
+            event = line[7:].strip().decode()
+        elif line.startswith(b"data: ") and event:
+            received.append((event, json.loads(line[6:]), time.monotonic()))
+            event = None
+
+
+async def run(url, pid, subscribers, reminding, interval, duration, poll_interval):
+    host, port = url.rsplit("/", 1)[1].split(":")
+    port = int(port)
+    run_id = f"push-{os.getpid()}"
+    rss_before, _ = process_stats(pid)
+
+    # Short break interval (in minutes) for the reminding users, armed by
+    # a break once every stream is open
+    deadlines = {}
+    for index in range(reminding):
+        connection = Connection(host, port, f"{run_id}-{index}")
+        await connection.request("POST", "/api/settings", json.dumps({"microbreak_interval": interval / 60}))
+        connection.close()
+
+    streams = []
+    received = {}
+    started = time.monotonic()
+    for offset in range(0, subscribers, 500):
+        batch = [f"{run_id}-{index}" for index in range(offset, min(subscribers, offset + 500))]
+        streams.extend(zip(batch, await asyncio.gather(*(subscribe(host, port, user) for user in batch))))
+    connect_seconds = time.monotonic() - started
+    readers = [asyncio.ensure_future(read_events(reader, received.setdefault(user, [])))
+               for user, (reader, _) in streams]
+
+    for index in range(reminding):
+        connection = Connection(host, port, f"{run_id}-{index}")
+        await connection.request("POST", "/api/break-taken", "{}")
+        connection.close()
+        deadlines[f"{run_id}-{index}"] = time.monotonic() + interval
+
+    await asyncio.sleep(2)
+    rss_connected, cpu_start = process_stats(pid)
+    await asyncio.sleep(duration)
+    rss_after, cpu_end = process_stats(pid)
+
+    lags = []
+    for user, deadline in deadlines.items():
+        # Only reminders that follow the break that armed them count
+        arrivals = [at for event, data, at in received.get(user, [])
+                    if event == "break" and data["should_break"] and at > deadline - interval]
+        if arrivals:
+            lags.append(arrivals[0] - deadline)
+    lags.sort()
+
+    for task in readers:
+        task.cancel()
+    for _, (_, writer) in streams:
+        writer.close()
+
+    return {
+        "subscribers": subscribers,
+        "connect_seconds": connect_seconds,
+        "server_rss_mb_before": rss_before / 2 ** 20,
+        "server_rss_mb_connected": rss_connected / 2 ** 20,
+        "server_bytes_per_subscriber": (rss_after - rss_before) / subscribers,
+        "idle_cpu_percent": (cpu_end - cpu_start) / duration * 100,
+        "reminders_expected": reminding,
+        "reminders_received": len(lags),
+        "reminder_lag_p50_ms": percentile(lags, 0.5) * 1000,
+        "reminder_lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+        "push_requests": subscribers,
+        "polling_requests_equivalent": int(subscribers * (duration + 2) / poll_interval)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--reminding", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=5.0, help="break interval in seconds")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.subscribers * 2 + 256)), hard))
+
+    process, url = spawn("asgi", "memory")
+    try:
+        report = asyncio.run(run(url, process.pid, args.subscribers, args.reminding,
+                                 args.interval, args.duration, args.poll_interval))
+    finally:
+        process.terminate()
+        process.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
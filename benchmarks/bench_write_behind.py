@@ -0,0 +1,161 @@
+"""
+Storage commits and click latency with and without write-behind buffering.
+
+    python benchmarks/bench_write_behind.py [--users 50] [--threads 8] [--bursts 20] [--burst-size 25]
+        [--flush-interval 1.0] [--max-pending 256] [--synchronous NORMAL,FULL]
+
+Threads replay bursts of button presses (focus sessions, breaks, posture
+corrections and settings changes) against a fresh SQLite database, once
+writing through and once through WriteBehindStorage. Afterwards the
+database is reopened and every counter is checked against the number of
+acknowledged presses. A last run drives app.py through Flask's test
+client in a child process that exits normally, to check that its atexit
+flush persists everything.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import percentile
+from storage import DEFAULT_USER_DATA, SQLiteStorage
+from write_behind import WriteBehindStorage
+
+# (section, increments, updates) picked at random for each press
+PRESSES = [
+    ("stats", {"focus_sessions": 1}, None),
+    ("stats", {"breaks_taken": 1}, {"last_break_time": "2024-05-01T10:00:00"}),
+    ("stats", {"posture_corrections": 1}, None),
+    ("settings", None, {"microbreak_interval": 25})
+]
+
+APP_SCRIPT = """
+import json, sys
+import app
+client = app.app.test_client()
+for index in range({presses}):
+    headers = {{"X-User-Id": f"user{{index % 10}}"}}
+    client.post("/api/focus-session", headers=headers)
+    client.post("/api/break-taken", headers=headers)
+print(json.dumps(app.storage.get_stats()))
+"""
+
+
+class CountingSQLiteStorage(SQLiteStorage):
+    """SQLiteStorage that counts the write transactions it commits"""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.commits = 0
+
+    def apply(self, *args, **kwargs):
+        self.commits += 1
+        return super().apply(*args, **kwargs)
+
+    def apply_many(self, changes, journal=()):
+        self.commits += 1
+        super().apply_many(changes, journal)
+
+
+def run(path, write_behind, users, threads, bursts, burst_size, flush_interval, max_pending, synchronous):
+    backend = CountingSQLiteStorage(path, synchronous=synchronous)
+    storage = WriteBehindStorage(backend, flush_interval, max_pending) if write_behind else backend
+    for user in range(users):
+        storage.ensure_user(f"user{user}", DEFAULT_USER_DATA)
+    backend.commits = 0
+    expected = {}
+    latencies = []
+    lock = threading.Lock()
+
+    def clicker(seed):
+        rng = random.Random(seed)
+        counts, timings = {}, []
+        for _ in range(bursts):
+            user_id = f"user{rng.randrange(users)}"
+            for _ in range(burst_size):
+                section, increments, updates = rng.choice(PRESSES)
+                started = time.perf_counter()
+                storage.apply(user_id, section, increments=increments, updates=updates)
+                timings.append(time.perf_counter() - started)
+                for key in increments or ():
+                    counts[(user_id, key)] = counts.get((user_id, key), 0) + 1
+            # Think time between bursts
+            time.sleep(rng.uniform(0, 0.02))
+        with lock:
+            latencies.extend(timings)
+            for key, count in counts.items():
+                expected[key] = expected.get(key, 0) + count
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=clicker, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    storage.close()
+
+    reopened = SQLiteStorage(path)
+    lost = sum(count - reopened.get_section(user_id, "stats")[key] for (user_id, key), count in expected.items())
+    reopened.close()
+    latencies.sort()
+    return {
+        "presses": len(latencies),
+        "presses_per_sec": len(latencies) / elapsed,
+        "commits": backend.commits,
+        "commits_per_sec": backend.commits / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "lost_updates": lost
+    }
+
+
+def run_app(directory, presses):
+    path = os.path.join(directory, "app.db")
+    env = dict(os.environ, WELLNESS_STORAGE=f"sqlite:///{path}", WELLNESS_FLUSH_INTERVAL="60")
+    output = subprocess.run([sys.executable, "-c", APP_SCRIPT.format(presses=presses)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    stats = json.loads(output.strip().splitlines()[-1])
+    storage = SQLiteStorage(path)
+    stored = sum(storage.get_section(f"user{user}", "stats")["breaks_taken"] for user in range(10))
+    storage.close()
+    return {"presses": presses, "pending_at_exit": stats["pending_mutations"], "lost_updates": presses - stored}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=25)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--synchronous", default="NORMAL,FULL")
+    args = parser.parse_args()
+
+    report = {"users": args.users, "threads": args.threads, "results": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for synchronous in args.synchronous.split(","):
+            for write_behind in (False, True):
+                name = f"{'write_behind' if write_behind else 'direct'}[{synchronous}]"
+                path = os.path.join(directory, f"{name}.db")
+                report["results"][name] = run(path, write_behind, args.users, args.threads, args.bursts,
+                                              args.burst_size, args.flush_interval, args.max_pending,
+                                              synchronous)
+            direct = report["results"][f"direct[{synchronous}]"]["commits"]
+            buffered = report["results"][f"write_behind[{synchronous}]"]["commits"]
+            report["results"][f"commit_reduction[{synchronous}]"] = direct / max(buffered, 1)
+        report["app_clean_exit"] = run_app(directory, 200)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
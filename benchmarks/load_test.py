@@ -0,0 +1,218 @@
+"""
+Load test comparing the Flask API (app.py) with its ASGI version
+(asgi_app.py) at many concurrent keep-alive connections.
+
+Each connection plays one user and cycles through focus-session,
+posture-alert, stats and ide-activity requests. Afterwards the stored
+focus_sessions counter of every user is checked against the number of
+focus-session requests that succeeded, so lost increments show up.
+
+    python benchmarks/load_test.py [--connections 1000] [--duration 10] [--users 100] [--storage URL]
+    python benchmarks/load_test.py --target asgi=http://127.0.0.1:8001 --target flask=http://127.0.0.1:5000
+
+Without --target, both servers are started on free local ports (Flask with
+its threaded server, the ASGI app under uvicorn) and stopped afterwards.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ACTIVITY = json.dumps({"hours_active": 6.5, "typing_intensity": 7, "late_night_coding": False})
+# (method, path, body) cycled by every connection
+SCRIPT = [
+    ("POST", "/api/focus-session", "{}"),
+    ("POST", "/api/posture-alert", json.dumps({"bad_posture": False})),
+    ("GET", "/api/stats", None),
+    ("POST", "/api/ide-activity", ACTIVITY)
+]
+
+SERVERS = {
+    "flask": "import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)",
+    "asgi": "import uvicorn; uvicorn.run('asgi_app:app', host='127.0.0.1', port={port}, "
+            "log_level='warning', backlog=4096)"
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn(name, storage_url):
+    port = free_port()
+    env = dict(os.environ, WELLNESS_STORAGE=storage_url)
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVERS[name].format(port=port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+
+class Connection:
+    """One HTTP/1.1 client connection, reopened if the server closes it"""
+
+    def __init__(self, host, port, user_id):
+        self.host = host
+        self.port = port
+        self.user_id = user_id
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = body.encode("utf-8") if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"X-User-Id: {self.user_id}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        version, status = status_line.split(b" ", 2)[:2]
+        length = 0
+        keep_alive = version == b"HTTP/1.1"
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"connection":
+                keep_alive = value.strip().lower() != b"close"
+        data = await self.reader.readexactly(length)
+        if not keep_alive:
+            self.close()
+        return int(status), data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def run_target(url, connections, duration, users):
+    parts = urlsplit(url)
+    run_id = f"load-{os.getpid()}-{time.monotonic_ns()}"
+    latencies = []
+    errors = 0
+    focus_ok = {}
+    stop_at = time.monotonic() + duration
+
+    async def worker(index):
+        nonlocal errors
+        user_id = f"{run_id}-{index % users}"
+        connection = Connection(parts.hostname, parts.port, user_id)
+        step = index
+        while time.monotonic() < stop_at:
+            method, path, body = SCRIPT[step % len(SCRIPT)]
+            step += 1
+            start = time.perf_counter()
+            try:
+                status, _ = await connection.request(method, path, body)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                connection.close()
+                await asyncio.sleep(0.05)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+            elif path == "/api/focus-session":
+                focus_ok[user_id] = focus_ok.get(user_id, 0) + 1
+        connection.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(index) for index in range(connections)))
+    elapsed = time.monotonic() - started
+
+    # Every successful focus-session request must be reflected in storage
+    lost = 0
+    for user_id, expected in focus_ok.items():
+        connection = Connection(parts.hostname, parts.port, user_id)
+        _, data = await connection.request("GET", "/api/stats")
+        connection.close()
+        lost += expected - json.loads(data)["focus_sessions"]
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "lost_increments": lost
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--storage", default="memory",
+                        help="WELLNESS_STORAGE for servers started by this script")
+    parser.add_argument("--target", action="append", default=[], metavar="NAME=URL",
+                        help="benchmark an already running server instead of spawning both")
+    args = parser.parse_args()
+
+    # Each connection needs a file descriptor on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.connections * 2 + 256))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    processes = []
+    targets = dict(target.split("=", 1) for target in args.target)
+    try:
+        if not targets:
+            for name in SERVERS:
+                process, url = spawn(name, args.storage)
+                processes.append(process)
+                targets[name] = url
+        report = {
+            "connections": args.connections,
+            "duration": args.duration,
+            "users": args.users,
+            "results": {}
+        }
+        for name, url in targets.items():
+            report["results"][name] = asyncio.run(
+                run_target(url, args.connections, args.duration, args.users))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
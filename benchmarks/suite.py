@@ -0,0 +1,473 @@
+"""
+Benchmark suite for the tracker, detector and Flask API hot paths.
+
+    python benchmarks/suite.py [--filter tracker] [--quick] [--output results.json]
+        [--baseline previous.json --tolerance 0.25] [--thresholds benchmarks/thresholds.json]
+        [--profile cprofile|pyinstrument --profile-dir profiles/]
+
+Every scenario is a generator that sets up its fixture, yields the callable
+to time and cleans up afterwards. The runner warms the callable up, times
+individual calls (from several threads at once for concurrent scenarios)
+and reports min/median/mean/p99 in milliseconds plus calls per second.
+
+A scenario regresses when its median or p99 exceeds the limit recorded for
+it in the thresholds file, or when --baseline is given and its median is
+more than --tolerance slower than in that earlier results file. The script
+exits non-zero if anything regressed. Scenarios well under a millisecond
+have a median limit only: their p99 (near enough the slowest call with
+--quick) is set by scheduler preemption and GC pauses, not by the code.
+
+With --profile, each scenario is also run under cProfile (a .prof file per
+scenario, viewable with snakeviz or convertible to a flamegraph with
+flameprof) or pyinstrument (an HTML flame view; main thread only).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = {}
+TRACKER_SIZES = (10, 10_000, 1_000_000)
+
+
+class Scenario:
+    __slots__ = ("name", "fixture", "concurrency", "rounds")
+
+    def __init__(self, name, fixture, concurrency=1, rounds=200):
+        self.name = name
+        self.fixture = fixture
+        self.concurrency = concurrency
+        self.rounds = rounds
+
+
+def scenario(name, concurrency=1, rounds=200):
+    def register(fixture):
+        SCENARIOS[name] = Scenario(name, fixture, concurrency, rounds)
+        return fixture
+    return register
+
+
+# Tracker scenarios
+
+def build_tracker(size, seed=7):
+    """A tracker holding size focus sessions (and size // 4 breaks) over the past 30 days"""
+    import numpy as np
+    from event_store import to_us
+    from wellness_tracker import WellnessTracker, credit_focus_time
+
+    rng = np.random.default_rng(seed)
+    now_us = to_us(datetime.now())
+    span_us = 30 * 86400 * 1_000_000
+    tracker = WellnessTracker()
+    tracker.session_start = datetime.now() - timedelta(hours=3)
+    focus = np.sort(now_us - rng.integers(0, span_us, size))
+    breaks = np.sort(now_us - rng.integers(0, span_us, max(1, size // 4)))
+    tracker.focus_sessions.extend_us(focus)
+    tracker.breaks.extend_us(breaks)
+    tracker.rollups.add_many("focus_sessions", focus)
+    credit_focus_time(tracker.rollups, focus, tracker.settings["focus_session_length"])
+    tracker.rollups.add_many("breaks", breaks)
+    tracker.invalidate()
+    return tracker
+
+
+def tracker_scenario(method, fresh=False, rounds=200, sizes=TRACKER_SIZES):
+    """
+    Register method for every history size. With fresh=True the memoised
+    views are invalidated before each call, so the full computation is timed.
+    """
+    def register(call):
+        for size in sizes:
+            def fixture(size=size):
+                tracker = build_tracker(size)
+                if fresh:
+                    def target():
+                        tracker.invalidate()
+                        return call(tracker)
+                    yield target
+                else:
+                    yield lambda: call(tracker)
+            SCENARIOS[f"tracker.{method}[{size}]"] = Scenario(f"tracker.{method}[{size}]", fixture, rounds=rounds)
+        return call
+    return register
+
+
+@tracker_scenario("get_stats")
+def _get_stats(tracker):
+    return tracker.get_stats()
+
+
+@tracker_scenario("get_stats.cold", fresh=True)
+def _get_stats_cold(tracker):
+    return tracker.get_stats()
+
+
+@tracker_scenario("get_break_recommendation.cold", fresh=True)
+def _break_recommendation_cold(tracker):
+    return tracker.get_break_recommendation()
+
+
+@tracker_scenario("calculate_burnout_risk.cold", fresh=True)
+def _burnout_cold(tracker):
+    return tracker.calculate_burnout_risk()
+
+
+@tracker_scenario("start_focus_session", rounds=1000)
+def _start_focus_session(tracker):
+    return tracker.start_focus_session()
+
+
+@tracker_scenario("take_break", rounds=1000)
+def _take_break(tracker):
+    return tracker.take_break()
+
+
+@tracker_scenario("get_interval_stats")
+def _interval_stats(tracker):
+    return tracker.get_interval_stats()
+
+
+@tracker_scenario("get_trend.hour_7d", rounds=50)
+def _trend(tracker):
+    return tracker.get_trend("focus_seconds", "hour", datetime.now() - timedelta(days=7))
+
+
+@tracker_scenario("memory_usage")
+def _memory_usage(tracker):
+    return tracker.memory_usage()
+
+
+@tracker_scenario("serialize", rounds=5)
+def _serialize(tracker):
+    from tracker_registry import serialize_tracker
+    return serialize_tracker(tracker)
+
+
+# Detector scenarios
+
+class _IdleAnalyzer:
+    """Stands in for FrameAnalyzer so only the detection loop itself is timed"""
+
+    def analyze_posture(self, frame):
+        return {"alert": False}
+
+    def analyze_eye_strain(self, frame):
+        return {"alert": False}
+
+
+def _synthetic_frame():
+    import numpy as np
+    from frame_pipeline import SyntheticFrameSource
+    source = SyntheticFrameSource(fps=None)
+    source.open()
+    frame = np.empty(source.shape, dtype=np.uint8)
+    source.read_into(frame)
+    return frame
+
+
+@scenario("detector.posture_check", rounds=300)
+def _posture_check():
+    from posture_detection import PostureDetector
+    detector = PostureDetector(adaptive=False)
+    frame = _synthetic_frame()
+    yield lambda: detector._run_check("posture", detector._check_posture, frame)
+
+
+@scenario("detector.eye_strain_check", rounds=300)
+def _eye_strain_check():
+    from posture_detection import PostureDetector
+    detector = PostureDetector(adaptive=False)
+    frame = _synthetic_frame()
+    yield lambda: detector._run_check("eye_strain", detector._check_eye_strain, frame)
+
+
+@scenario("detector.motion_skipped_check", rounds=2000)
+def _motion_skipped_check():
+    """A due check on an unchanged scene, answered by the motion gate alone"""
+    from posture_detection import PostureDetector
+    detector = PostureDetector(max_skips=10 ** 9)
+    frame = _synthetic_frame()
+    detector._run_check("posture", detector._check_posture, frame)
+    yield lambda: detector._run_check("posture", detector._check_posture, frame)
+
+
+@scenario("detector.loop_overhead", rounds=2000)
+def _loop_overhead():
+    """One detection-loop iteration (schedule, wake, newest frame, dispatch) without analysis"""
+    from frame_pipeline import FramePipeline, SyntheticFrameSource
+    from posture_detection import PostureDetector
+    from scheduler import DeadlineScheduler
+
+    detector = PostureDetector(analyzer=_IdleAnalyzer(), adaptive=False)
+    pipeline = FramePipeline(SyntheticFrameSource(fps=None))
+    pipeline.start()
+    scheduler = DeadlineScheduler()
+
+    def target():
+        scheduler.schedule(0, "posture", detector._check_posture)
+        check_type, check = scheduler.next_due()
+        slot = pipeline.latest(timeout=1.0)
+        try:
+            detector._run_check(check_type, check, pipeline.frame(slot))
+        finally:
+            pipeline.release(slot)
+
+    try:
+        yield target
+    finally:
+        scheduler.stop()
+        pipeline.stop()
+
+
+# Flask scenarios
+
+ACTIVITY_SAMPLE = {"hours_active": 6.5, "typing_intensity": 7, "late_night_coding": False}
+POST_BODIES = {
+    "/api/settings": {"json": {"microbreak_interval": 30}},
+    "/api/stats": {"json": {"last_break_time": None}},
+    "/api/posture-alert": {"json": {"bad_posture": True}},
+    "/api/ide-activity": {"json": ACTIVITY_SAMPLE},
+    "/api/ide-activity/batch": {
+        "data": "\n".join(json.dumps(ACTIVITY_SAMPLE) for _ in range(100)),
+        "content_type": "application/x-ndjson"
+    }
+}
+FLASK_CONCURRENCY = 8
+
+
+def flask_routes():
+    """(method, path) for every rule of the Flask app except static files"""
+    import app as flask_app
+    routes = []
+    for rule in flask_app.app.url_map.iter_rules():
+        if rule.endpoint == "static":
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            routes.append((method, rule.rule))
+    return routes
+
+
+def flask_fixture(method, path):
+    import app as flask_app
+    local = threading.local()
+    body = POST_BODIES.get(path, {}) if method == "POST" else {}
+
+    def target():
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = flask_app.app.test_client()
+            local.headers = {"X-User-Id": f"bench-{threading.get_ident()}"}
+        response = client.open(path, method=method, headers=local.headers, **body)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}")
+
+    # Routes that cannot respond in this environment (e.g. missing
+    # templates) are reported as skipped instead of timed
+    target()
+    yield target
+
+
+def register_flask_scenarios():
+    os.environ.setdefault("WELLNESS_STORAGE", "memory")
+    for method, path in flask_routes():
+        name = f"flask.{method} {path}"
+        SCENARIOS[name] = Scenario(
+            name, lambda method=method, path=path: flask_fixture(method, path),
+            concurrency=FLASK_CONCURRENCY, rounds=100
+        )
+
+
+# Runner
+
+def summarize(samples, wall_seconds):
+    samples = sorted(samples)
+    return {
+        "rounds": len(samples),
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        "max_ms": samples[-1] * 1000,
+        "ops_per_sec": len(samples) / wall_seconds if wall_seconds else None
+    }
+
+
+def time_calls(target, rounds):
+    samples = []
+    perf_counter = time.perf_counter
+    for _ in range(rounds):
+        start = perf_counter()
+        target()
+        samples.append(perf_counter() - start)
+    return samples
+
+
+class Profiler:
+    """cProfile or pyinstrument around one scenario, written to profile_dir"""
+
+    def __init__(self, kind, profile_dir):
+        self.kind = kind
+        self.profile_dir = profile_dir
+        if kind == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                raise SystemExit("--profile pyinstrument needs the pyinstrument package")
+        os.makedirs(profile_dir, exist_ok=True)
+
+    def _path(self, name, extension):
+        safe = "".join(c if c.isalnum() or c in "._-[]" else "_" for c in name)
+        return os.path.join(self.profile_dir, f"{safe}.{extension}")
+
+    def run(self, name, target, rounds, concurrency):
+        if self.kind == "cprofile":
+            import cProfile
+            import pstats
+            profiles = []
+
+            def worker():
+                profile = cProfile.Profile()
+                profile.runcall(time_calls, target, rounds)
+                profiles.append(profile)
+
+            run_threads(worker, concurrency)
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(self._path(name, "prof"))
+            return self._path(name, "prof")
+
+        from pyinstrument import Profiler as Sampler
+        sampler = Sampler()
+        sampler.start()
+        run_threads(lambda: time_calls(target, rounds), concurrency)
+        sampler.stop()
+        with open(self._path(name, "html"), "w") as handle:
+            handle.write(sampler.output_html())
+        return self._path(name, "html")
+
+
+def run_threads(worker, concurrency):
+    if concurrency == 1:
+        worker()
+        return
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_scenario(item, rounds_scale, profiler):
+    rounds = max(1, int(item.rounds * rounds_scale))
+    fixture = item.fixture()
+    try:
+        target = next(fixture)
+    except Exception as exc:
+        return {"skipped": str(exc)}
+    try:
+        time_calls(target, max(1, rounds // 10))  # warm-up
+        results = []
+
+        def worker():
+            results.append(time_calls(target, rounds))
+
+        started = time.perf_counter()
+        run_threads(worker, item.concurrency)
+        wall = time.perf_counter() - started
+        report = summarize([sample for samples in results for sample in samples], wall)
+        report["concurrency"] = item.concurrency
+        if profiler is not None:
+            report["profile"] = profiler.run(item.name, target, rounds, item.concurrency)
+        return report
+    finally:
+        fixture.close()
+
+
+def check(name, report, thresholds, baseline, tolerance):
+    """Return the reasons report counts as a regression"""
+    problems = []
+    limits = thresholds.get(name, {})
+    for metric in ("median_ms", "p99_ms"):
+        if metric in limits and report[metric] > limits[metric]:
+            problems.append(f"{metric} {report[metric]:.3f} > threshold {limits[metric]}")
+    previous = baseline.get(name)
+    if previous and "median_ms" in previous:
+        allowed = previous["median_ms"] * (1 + tolerance)
+        if report["median_ms"] > allowed:
+            problems.append(f"median_ms {report['median_ms']:.3f} > baseline {previous['median_ms']:.3f} +{tolerance:.0%}")
+    return problems
+
+
+def load_json(path, key=None):
+    if not path:
+        return {}
+    with open(path) as handle:
+        data = json.load(handle)
+    return data.get(key, {}) if key else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filter", action="append", default=[],
+                        help="only run scenarios whose name contains this text")
+    parser.add_argument("--quick", action="store_true",
+                        help="skip the 1M-event tracker and cut rounds by 5x")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--thresholds", default=os.path.join(ROOT, "benchmarks", "thresholds.json"))
+    parser.add_argument("--baseline", help="earlier --output file to compare medians against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--profile", choices=("cprofile", "pyinstrument"))
+    parser.add_argument("--profile-dir", default="profiles")
+    args = parser.parse_args()
+
+    register_flask_scenarios()
+    selected = [
+        item for name, item in SCENARIOS.items()
+        if (not args.filter or any(text in name for text in args.filter))
+        and not (args.quick and name.endswith("[1000000]"))
+    ]
+    thresholds = load_json(args.thresholds)
+    baseline = load_json(args.baseline, "results")
+    profiler = Profiler(args.profile, args.profile_dir) if args.profile else None
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": {},
+        "regressions": {}
+    }
+    for item in selected:
+        result = run_scenario(item, 0.2 if args.quick else 1.0, profiler)
+        report["results"][item.name] = result
+        if "skipped" in result:
+            print(f"{item.name}: skipped ({result['skipped']})", file=sys.stderr)
+            continue
+        problems = check(item.name, result, thresholds, baseline, args.tolerance)
+        if problems:
+            report["regressions"][item.name] = problems
+        print(f"{item.name}: median {result['median_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms"
+              + (" REGRESSED" if problems else ""), file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output)
+    print(output)
+    sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
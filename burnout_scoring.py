@@ -0,0 +1,56 @@
+"""
+Burnout risk scoring rules shared by the Flask API, the Streamlit tracker
+and offline reports. Each rule has a scalar form and a NumPy batch form
+that produces identical results element by element.
+"""
+
+# Activity-based score weights (IDE activity samples)
+HOURS_WEIGHT = 5
+INTENSITY_WEIGHT = 3
+LATE_NIGHT_PENALTY = 30
+MAX_RISK = 100
+
+
+def calculate_burnout_risk(activity_data):
+    # Simple algorithm to calculate burnout risk
+    # In a real app, this would be more sophisticated
+    hours = activity_data.get('hours_active', 0)
+    intensity = activity_data.get('typing_intensity', 0)
+    late_night = activity_data.get('late_night_coding', False)
+
+    risk = min(MAX_RISK, hours * HOURS_WEIGHT + intensity * INTENSITY_WEIGHT + (LATE_NIGHT_PENALTY if late_night else 0))
+    return risk
+
+
+def session_burnout_risk(hours_worked, daily_work_limit):
+    """Share of the daily work limit already used, as an integer percentage capped at 100"""
+    ratio = hours_worked / daily_work_limit
+    return min(MAX_RISK, int(ratio * 100))
+
+
+def calculate_burnout_risk_batch(hours_active, typing_intensity, late_night_coding):
+    """
+    Vectorised calculate_burnout_risk over equally sized arrays.
+    Returns a float64 array of risks.
+    """
+    import numpy as np
+    hours = np.asarray(hours_active, dtype=np.float64)
+    intensity = np.asarray(typing_intensity, dtype=np.float64)
+    late_night = np.asarray(late_night_coding, dtype=bool)
+
+    # Same operation order as the scalar rule so results match bit for bit
+    risk = hours * HOURS_WEIGHT + intensity * INTENSITY_WEIGHT
+    risk += np.where(late_night, float(LATE_NIGHT_PENALTY), 0.0)
+    return np.minimum(float(MAX_RISK), risk)
+
+
+def session_burnout_risk_batch(hours_worked, daily_work_limit):
+    """
+    Vectorised session_burnout_risk. daily_work_limit may be a scalar or an
+    array broadcastable against hours_worked. Returns an int64 array.
+    """
+    import numpy as np
+    hours = np.asarray(hours_worked, dtype=np.float64)
+    ratio = hours / np.asarray(daily_work_limit, dtype=np.float64)
+    # int() truncates toward zero; cap before casting so huge ratios cannot overflow
+    return np.minimum(float(MAX_RISK), np.trunc(ratio * 100)).astype(np.int64)
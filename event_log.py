@@ -0,0 +1,224 @@
+import json
+import mmap
+import os
+import struct
+
+from event_store import from_us, to_us
+from wellness_tracker import SETTING_KEYS, WellnessTracker, credit_focus_time
+
+MAGIC = b"WTEVTLOG"
+VERSION = 1
+# Header padded to the record size so records stay 24-byte aligned
+HEADER = struct.Struct("<8sI12x")
+# timestamp_us, kind, setting key, padding, value
+RECORD = struct.Struct("<qBB6xd")
+
+KINDS = {
+    "session_start": 1,
+    "focus": 2,
+    "break": 3,
+    "interruption": 4,
+    "posture_alert": 5,
+    "eye_strain_alert": 6,
+    "setting": 7
+}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+
+def record_dtype():
+    import numpy as np
+    return np.dtype([("ts", "<i8"), ("kind", "u1"), ("key", "u1"), ("pad", "V6"), ("value", "<f8")])
+
+
+class EventLog:
+    """
+    Binary append-only log of tracker events in fixed 24-byte records.
+    Records are read back through mmap as a NumPy structured array, and a
+    JSON snapshot of the tracker aggregates is written every snapshot_every
+    records so that startup only has to replay the tail of the log.
+    """
+
+    def __init__(self, path, snapshot_every=10000, fsync=False):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        size = os.fstat(self._fd).st_size
+        header = HEADER.pack(MAGIC, VERSION)
+        if size < HEADER.size and header.startswith(os.pread(self._fd, size, 0)):
+            # Empty, or a crash while the header was being written
+            os.ftruncate(self._fd, 0)
+            os.write(self._fd, header)
+        else:
+            magic, version = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} event log")
+        self.record_count = self._file_records()
+        # Drop a record torn by a crash; with O_APPEND, every later record
+        # would otherwise be written after it, misaligned
+        end = HEADER.size + self.record_count * RECORD.size
+        if os.fstat(self._fd).st_size > end:
+            os.ftruncate(self._fd, end)
+        snapshot = self.load_snapshot()
+        self.snapshot_records = snapshot["records"] if snapshot else 0
+
+    def _file_records(self):
+        # Counted from the file, so records appended through other handles
+        # are included
+        size = os.fstat(self._fd).st_size
+        return (max(size, HEADER.size) - HEADER.size) // RECORD.size
+
+    def append(self, kind, timestamp_us, key=0, value=0.0):
+        """Append one record; kind and key may be given by name"""
+        if isinstance(kind, str):
+            kind = KINDS[kind]
+        if isinstance(key, str):
+            key = SETTING_KEYS.index(key)
+        os.write(self._fd, RECORD.pack(timestamp_us, kind, key, float(value)))
+        if self.fsync:
+            os.fsync(self._fd)
+        self.record_count += 1
+
+    def append_event(self, tracker, kind, timestamp_us, key=0, value=0.0):
+        """Append a record for tracker and snapshot it when one is due"""
+        self.append(kind, timestamp_us, key, value)
+        if self.record_count - self.snapshot_records >= self.snapshot_every:
+            self.save_snapshot(tracker)
+
+    def records(self, start=0):
+        """Records from index start onwards as a read-only structured array"""
+        import numpy as np
+        dtype = record_dtype()
+        count = self.record_count - start
+        if count <= 0:
+            return np.empty(0, dtype=dtype)
+        with open(self.path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        # The array keeps the mapping alive for as long as it is referenced
+        return np.frombuffer(mapped, dtype=dtype, count=count,
+                             offset=HEADER.size + start * RECORD.size)
+
+    def save_snapshot(self, tracker):
+        self.record_count = self._file_records()
+        state = {"records": self.record_count, "tracker": tracker.to_snapshot()}
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w") as handle:
+            json.dump(state, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.snapshot_path)
+        self.snapshot_records = self.record_count
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as handle:
+                state = json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if state["records"] > self.record_count:
+            # Snapshot is ahead of a truncated log; it cannot be trusted
+            return None
+        return state
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _setting_value(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def _apply_records(tracker, records):
+    """Replay records one at a time through the tracker's incremental paths"""
+    for timestamp_us, kind, key, _, value in records.tolist():
+        apply_record(tracker, timestamp_us, kind, key, value)
+
+
+def apply_record(tracker, timestamp_us, kind, key=0, value=0.0):
+    """Apply one record to tracker without logging it again"""
+    name = KIND_NAMES.get(kind)
+    if name == "focus":
+        tracker._record_focus_session(timestamp_us)
+    elif name == "break":
+        tracker._record_break(timestamp_us)
+    elif name == "interruption":
+        tracker._record_interruption(timestamp_us)
+    elif name in ("posture_alert", "eye_strain_alert"):
+        tracker._record_alert(name[:-len("_alert")], timestamp_us)
+    elif name == "setting":
+        tracker.settings[SETTING_KEYS[key]] = _setting_value(value)
+    elif name == "session_start":
+        tracker.session_start = from_us(timestamp_us)
+
+
+def _bulk_apply(tracker, records):
+    """Vectorised replay of a whole log into a fresh tracker"""
+    import numpy as np
+    kinds = records["kind"]
+    timestamps = records["ts"]
+
+    starts = timestamps[kinds == KINDS["session_start"]]
+    if len(starts):
+        tracker.session_start = from_us(int(starts[-1]))
+
+    focus_rows = np.flatnonzero(kinds == KINDS["focus"])
+    focus = timestamps[focus_rows]
+    tracker.focus_sessions.extend_us(focus)
+    tracker.rollups.add_many("focus_sessions", focus)
+    # Each gap is capped at the focus session length set when it closed
+    lengths = np.flatnonzero((kinds == KINDS["setting"])
+                             & (records["key"] == SETTING_KEYS.index("focus_session_length")))
+    minutes = np.append(tracker.settings["focus_session_length"], records["value"][lengths])
+    credit_focus_time(tracker.rollups, focus, minutes[np.searchsorted(lengths, focus_rows[1:])])
+
+    breaks = timestamps[kinds == KINDS["break"]]
+    tracker.breaks.extend_us(breaks)
+    tracker.rollups.add_many("breaks", breaks)
+
+    interruptions = timestamps[kinds == KINDS["interruption"]]
+    tracker.total_interruptions += len(interruptions)
+    tracker.rollups.add_many("interruptions", interruptions)
+
+    for alert_type in ("posture", "eye_strain"):
+        alerts = timestamps[kinds == KINDS[f"{alert_type}_alert"]]
+        tracker.alert_counts[alert_type] = tracker.alert_counts.get(alert_type, 0) + len(alerts)
+        tracker.rollups.add_many(f"{alert_type}_alerts", alerts)
+
+    settings = records[kinds == KINDS["setting"]]
+    for key, value in zip(settings["key"].tolist(), settings["value"].tolist()):
+        tracker.settings[SETTING_KEYS[key]] = _setting_value(value)
+
+
+def load_tracker(path, snapshot_every=10000, fsync=False):
+    """
+    Rebuild a WellnessTracker from the event log at path and attach the log
+    so new events keep being appended. When a snapshot exists, aggregates
+    come from it and only the records written after it are replayed; raw
+    focus and break timestamps are always bulk-loaded from the mapped log.
+    """
+    log = EventLog(path, snapshot_every=snapshot_every, fsync=fsync)
+    tracker = WellnessTracker()
+    records = log.records()
+    snapshot = log.load_snapshot()
+
+    if snapshot is None:
+        _bulk_apply(tracker, records)
+    else:
+        prefix = records[:snapshot["records"]]
+        kinds = prefix["kind"]
+        tracker.restore_snapshot(snapshot["tracker"])
+        tracker.focus_sessions.extend_us(prefix["ts"][kinds == KINDS["focus"]], update_gaps=False)
+        tracker.breaks.extend_us(prefix["ts"][kinds == KINDS["break"]], update_gaps=False)
+        _apply_records(tracker, records[snapshot["records"]:])
+
+    tracker.event_log = log
+    tracker.invalidate()
+    if not len(records):
+        log.append("session_start", to_us(tracker.session_start))
+    else:
+        # A log reopened on a later day starts today's session
+        tracker.roll_session()
+    return tracker
@@ -0,0 +1,318 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+import math
+
+# Timestamps are stored as int64 microseconds since a naive epoch so that the
+# naive local datetimes produced by datetime.now() round-trip exactly.
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+CHUNK_SIZE = 4096
+# A compact chunk holds uint32 offsets from its base, so its events must lie
+# within 2**32 microseconds (~71 minutes) of the first one
+COMPACT_SPAN = 1 << 32
+# Compact chunks shorter than this are widened rather than split when an
+# event does not fit
+WIDEN_BELOW = 64
+
+
+def to_us(dt):
+    """Convert a naive datetime to integer microseconds since EPOCH"""
+    return (dt - EPOCH) // ONE_MICROSECOND
+
+
+def from_us(us):
+    """Convert integer microseconds since EPOCH back to a datetime"""
+    return EPOCH + timedelta(microseconds=us)
+
+
+class Event:
+    """A single stored event; a lightweight view over one timestamp slot"""
+
+    __slots__ = ("index", "timestamp_us")
+
+    def __init__(self, index, timestamp_us):
+        self.index = index
+        self.timestamp_us = timestamp_us
+
+    @property
+    def timestamp(self):
+        return from_us(self.timestamp_us)
+
+    def __repr__(self):
+        return f"Event(index={self.index}, timestamp={self.timestamp.isoformat()})"
+
+
+class RunningStats:
+    """
+    Running count/sum/min/max and Welford variance, updated in O(1) per value
+    """
+
+    __slots__ = ("count", "total", "minimum", "maximum", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def add_many(self, values):
+        """Fold a NumPy array of values in at once (Chan et al. parallel update)"""
+        count = len(values)
+        if not count:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        batch_min = float(values.min())
+        batch_max = float(values.max())
+        total = self.count + count
+        delta = batch_mean - self.mean
+        self._m2 += batch_m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.total += float(values.sum())
+        self.minimum = batch_min if self.minimum is None else min(self.minimum, batch_min)
+        self.maximum = batch_max if self.maximum is None else max(self.maximum, batch_max)
+
+    def merge(self, other):
+        """Fold in another RunningStats, as if its values had been added here"""
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.total += other.total
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "mean": self.mean,
+            "m2": self._m2
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls()
+        stats.count = state["count"]
+        stats.total = state["total"]
+        stats.minimum = state["minimum"]
+        stats.maximum = state["maximum"]
+        stats.mean = state["mean"]
+        stats._m2 = state["m2"]
+        return stats
+
+    @property
+    def variance(self):
+        """Sample variance (0 for fewer than two values)"""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "min": self.minimum,
+            "max": self.maximum,
+            "stddev": self.stddev
+        }
+
+
+class EventStore:
+    """
+    Append-only columnar store of event timestamps.
+    Timestamps live in chunks of at most chunk_size events instead of a list
+    of datetime objects. A chunk stores uint32 microsecond offsets from its
+    own int64 base, 4 bytes per event, while its events stay within
+    COMPACT_SPAN (~71 minutes) of the base; short chunks whose events are
+    further apart are widened to plain int64 values, so sparse histories
+    never cost more than 8 bytes per event.
+    Indexing returns datetimes to stay drop-in compatible with the old lists.
+    Gaps between consecutive events (in seconds) are aggregated on append.
+    """
+
+    __slots__ = ("_chunks", "_bases", "_starts", "_length", "chunk_size", "gaps")
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        # Chunk i holds array("I") offsets from _bases[i], or array("q")
+        # values with a base of 0, and starts at event index _starts[i]
+        self._chunks = []
+        self._bases = array("q")
+        self._starts = array("q")
+        self._length = 0
+        self.gaps = RunningStats()
+
+    def append(self, dt):
+        """Append a datetime and return its microsecond timestamp"""
+        us = to_us(dt)
+        self.append_us(us)
+        return us
+
+    def append_us(self, us):
+        if self._length:
+            self.gaps.add((us - self.last_us()) / 1_000_000)
+            chunk = self._chunks[-1]
+            if len(chunk) < self.chunk_size:
+                offset = us - self._bases[-1]
+                if chunk.typecode == "q" or 0 <= offset < COMPACT_SPAN:
+                    chunk.append(offset)
+                    self._length += 1
+                    return
+                if len(chunk) < WIDEN_BELOW:
+                    self._widen()
+                    self._chunks[-1].append(us)
+                    self._length += 1
+                    return
+        self._new_chunk(us)
+        self._chunks[-1].append(0)
+        self._length += 1
+
+    def _new_chunk(self, base):
+        self._chunks.append(array("I"))
+        self._bases.append(base)
+        self._starts.append(self._length)
+
+    def _widen(self):
+        # Too sparse to pay off: hold the open chunk's values as int64
+        base = self._bases[-1]
+        self._chunks[-1] = array("q", [base + delta for delta in self._chunks[-1]])
+        self._bases[-1] = 0
+
+    def _extend(self, values):
+        """Append an int64 NumPy array of timestamps, filling and opening chunks as needed"""
+        import numpy as np
+        offset = 0
+        while offset < len(values):
+            first = int(values[offset])
+            chunk = self._chunks[-1] if self._chunks else None
+            if chunk is None or len(chunk) >= self.chunk_size:
+                self._new_chunk(first)
+                continue
+            base = self._bases[-1]
+            if chunk.typecode == "I" and not 0 <= first - base < COMPACT_SPAN:
+                if len(chunk) < WIDEN_BELOW:
+                    self._widen()
+                else:
+                    self._new_chunk(first)
+                continue
+            batch = values[offset:offset + self.chunk_size - len(chunk)]
+            if chunk.typecode == "q":
+                chunk.frombytes(batch.tobytes())
+            else:
+                # Timestamps are normally sorted, so only look at those below
+                # the end of the span; the check below keeps unsorted input safe
+                batch = batch[:np.searchsorted(batch, base + COMPACT_SPAN)]
+                offsets = batch - base
+                fits = (offsets >= 0) & (offsets < COMPACT_SPAN)
+                if not fits.all():
+                    batch = batch[:fits.argmin()]
+                    offsets = offsets[:len(batch)]
+                chunk.frombytes(offsets.astype(np.uint32).tobytes())
+            offset += len(batch)
+            self._length += len(batch)
+
+    def extend_us(self, values, update_gaps=True):
+        """
+        Bulk-append a sorted int64 NumPy array of timestamps. With
+        update_gaps=False the gap statistics are left untouched, for callers
+        restoring them from a snapshot.
+        """
+        import numpy as np
+        values = np.ascontiguousarray(values, dtype=np.int64)
+        if not len(values):
+            return
+        if update_gaps:
+            previous = self.last_us()
+            gaps = np.diff(values) if previous is None else np.diff(values, prepend=previous)
+            self.gaps.add_many(gaps / 1_000_000)
+        self._extend(values)
+
+    def to_bytes(self):
+        """All timestamps as packed native int64 values"""
+        return self.as_numpy().tobytes()
+
+    def load_bytes(self, data):
+        """Append timestamps packed by to_bytes(), leaving the gap statistics untouched"""
+        import numpy as np
+        self._extend(np.frombuffer(data, dtype=np.int64))
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def timestamp_us(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("event index out of range")
+        chunk = bisect_right(self._starts, index) - 1
+        return self._bases[chunk] + self._chunks[chunk][index - self._starts[chunk]]
+
+    def __getitem__(self, index):
+        return from_us(self.timestamp_us(index))
+
+    def __iter__(self):
+        for us in self.iter_us():
+            yield from_us(us)
+
+    def iter_us(self):
+        for chunk, base in zip(self._chunks, self._bases):
+            if chunk.typecode == "q":
+                yield from chunk
+            else:
+                for offset in chunk:
+                    yield base + offset
+
+    def iter_events(self):
+        for index, us in enumerate(self.iter_us()):
+            yield Event(index, us)
+
+    def last_us(self, default=None):
+        if not self._length:
+            return default
+        return self._bases[-1] + self._chunks[-1][-1]
+
+    def as_numpy(self):
+        """Return all timestamps as a single int64 NumPy array"""
+        import numpy as np
+        if not self._chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([
+            np.frombuffer(chunk, dtype=np.int64) if chunk.typecode == "q"
+            else np.frombuffer(chunk, dtype=np.uint32).astype(np.int64) + base
+            for chunk, base in zip(self._chunks, self._bases)
+        ])
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the timestamp buffers"""
+        return (sum(chunk.buffer_info()[1] * chunk.itemsize for chunk in self._chunks)
+                + (len(self._bases) + len(self._starts)) * 8)
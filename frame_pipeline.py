@@ -0,0 +1,320 @@
+import os
+import queue
+import threading
+import time
+
+# NumPy and OpenCV are imported inside the methods that need them, so
+# constructing sources and pipelines costs nothing until capture starts.
+DEFAULT_WIDTH = 640
+DEFAULT_HEIGHT = 480
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class FrameSource:
+    """
+    Base class for frame sources feeding a FramePipeline.
+    Subclasses fill a caller-provided buffer in place so the pipeline can
+    reuse preallocated memory. `fps` paces sources that are not real-time
+    (synthetic frames, image folders); real-time sources set it to None.
+    `real_time` marks sources whose frames belong to a moment in time
+    (cameras, video played at its native rate): reading one on demand would
+    return a stale buffered frame, so consumers keep them captured through
+    a FramePipeline and take the newest frame.
+    """
+
+    width = DEFAULT_WIDTH
+    height = DEFAULT_HEIGHT
+    fps = None
+    real_time = False
+
+    @property
+    def shape(self):
+        return (self.height, self.width, 3)
+
+    def open(self):
+        pass
+
+    def read_into(self, buffer):
+        """Fill buffer with the next frame; return False when the source is exhausted"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    Generates frames without a camera, for demos and benchmarks.
+    A small set of frames is rendered up front and copied into the buffer,
+    so producing a frame never allocates.
+    """
+
+    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, fps=10, patterns=8):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.pattern_count = patterns
+        self._patterns = None
+        self._index = 0
+
+    def open(self):
+        import numpy as np
+        # A bright square drifting across a dark background
+        self._patterns = np.zeros((self.pattern_count,) + self.shape, dtype=np.uint8)
+        size = min(self.width, self.height) // 4
+        for i in range(self.pattern_count):
+            x = (self.width - size) * i // max(1, self.pattern_count - 1)
+            y = (self.height - size) // 2
+            self._patterns[i, y:y + size, x:x + size] = 200
+        self._index = 0
+
+    def read_into(self, buffer):
+        import numpy as np
+        np.copyto(buffer, self._patterns[self._index % self.pattern_count])
+        self._index += 1
+        return True
+
+    def close(self):
+        self._patterns = None
+
+
+class VideoFileFrameSource(FrameSource):
+    """
+    Reads frames with cv2.VideoCapture from a video file (or a camera index).
+    Frames are decoded straight into the pipeline buffer when sizes match.
+    """
+
+    real_time = True
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self._capture = None
+        # Files are paced at their native frame rate; cameras pace themselves
+        self.fps = None
+
+    def open(self):
+        import cv2
+        self._capture = cv2.VideoCapture(self.path)
+        if not self._capture.isOpened():
+            raise IOError(f"Cannot open video source: {self.path}")
+        self.width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or DEFAULT_WIDTH
+        self.height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or DEFAULT_HEIGHT
+        if not isinstance(self.path, int):
+            self.fps = self._capture.get(cv2.CAP_PROP_FPS) or None
+
+    def read_into(self, buffer):
+        import cv2
+        ok, _ = self._capture.read(buffer)
+        if not ok and self.loop:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, _ = self._capture.read(buffer)
+        return ok
+
+    def close(self):
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+class ImageDirectoryFrameSource(FrameSource):
+    """
+    Plays back the images of a directory in name order.
+    Images of a different size are resized into the buffer.
+    """
+
+    def __init__(self, path, fps=10, loop=True, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.width = width
+        self.height = height
+        self._files = []
+        self._index = 0
+
+    def open(self):
+        self._files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self._files:
+            raise IOError(f"No images found in {self.path}")
+        self._index = 0
+
+    def read_into(self, buffer):
+        import cv2
+        if self._index >= len(self._files):
+            if not self.loop:
+                return False
+            self._index = 0
+        image = cv2.imread(self._files[self._index], cv2.IMREAD_COLOR)
+        self._index += 1
+        if image is None:
+            return False
+        if image.shape == buffer.shape:
+            buffer[...] = image
+        else:
+            cv2.resize(image, (self.width, self.height), dst=buffer)
+        return True
+
+
+class FramePipeline:
+    """
+    Producer/consumer frame pipeline over a preallocated ring of buffers.
+    A capture thread fills free slots and hands them to the consumer through
+    a bounded queue. When the consumer falls behind, the oldest queued frame
+    is recycled and counted as dropped, so analysis always sees fresh frames.
+    """
+
+    def __init__(self, source, queue_size=2):
+        self.source = source
+        self.queue_size = queue_size
+        self.is_running = False
+        self._ring = None
+        self._frames = []
+        self._timestamps = None
+        self._free = queue.Queue()
+        self._ready = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.started_at = None
+
+    def start(self):
+        if self.is_running:
+            return False
+        import numpy as np
+        self.source.open()
+        # One slot being filled, one held by the consumer, the rest queued
+        slots = self.queue_size + 2
+        self._ring = np.empty((slots,) + self.source.shape, dtype=np.uint8)
+        self._frames = [self._ring[i] for i in range(slots)]
+        self._timestamps = np.zeros(slots, dtype=np.float64)
+        self._free = queue.Queue()
+        self._ready = queue.Queue(maxsize=self.queue_size)
+        for slot in range(slots):
+            self._free.put(slot)
+        self.captured = self.processed = self.dropped = 0
+        self.started_at = time.time()
+        self._stop_event.clear()
+        self.is_running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.is_running = False
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.source.close()
+
+    def _acquire_slot(self):
+        while not self._stop_event.is_set():
+            try:
+                return self._free.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                slot = self._ready.get_nowait()
+            except queue.Empty:
+                # Every slot is held by the consumer; wait for one to come back
+                try:
+                    return self._free.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            with self._lock:
+                self.dropped += 1
+            return slot
+        return None
+
+    def _capture_loop(self):
+        interval = 1.0 / self.source.fps if self.source.fps else 0
+        next_due = time.monotonic()
+        while not self._stop_event.is_set():
+            slot = self._acquire_slot()
+            if slot is None:
+                break
+            if not self.source.read_into(self._frames[slot]):
+                self._free.put(slot)
+                self.is_running = False
+                self._stop_event.set()
+                break
+            self._timestamps[slot] = time.time()
+            stale = 0
+            try:
+                self._ready.put_nowait(slot)
+            except queue.Full:
+                # Only this thread enqueues, so freeing one entry makes room
+                try:
+                    self._free.put(self._ready.get_nowait())
+                    stale = 1
+                except queue.Empty:
+                    pass
+                self._ready.put_nowait(slot)
+            with self._lock:
+                self.captured += 1
+                self.dropped += stale
+            if interval:
+                next_due += interval
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    next_due = time.monotonic()
+
+    def get(self, timeout=None):
+        """Return the slot of the next queued frame, or None on timeout/stop"""
+        try:
+            slot = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            self.processed += 1
+        return slot
+
+    def latest(self, timeout=None):
+        """Return the slot of the newest frame, recycling any older queued ones"""
+        try:
+            slot = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        stale = 0
+        while True:
+            try:
+                newer = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self.release(slot)
+            stale += 1
+            slot = newer
+        with self._lock:
+            self.processed += 1
+            self.dropped += stale
+        return slot
+
+    def frame(self, slot):
+        """The preallocated buffer behind a slot; valid until release(slot)"""
+        return self._frames[slot]
+
+    def timestamp(self, slot):
+        return self._timestamps[slot]
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def get_stats(self):
+        elapsed = max(time.time() - self.started_at, 1e-9) if self.started_at else 0
+        with self._lock:
+            return {
+                "captured": self.captured,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "capture_fps": self.captured / elapsed if elapsed else 0.0,
+                "processed_fps": self.processed / elapsed if elapsed else 0.0
+            }
+
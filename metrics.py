@@ -0,0 +1,253 @@
+"""
+In-process counters, histograms and timing spans.
+
+Metrics are declared once at module level and updated from any thread:
+
+    CHECKS = metrics.histogram("wellness_check_seconds", "Check latency", ("check",))
+    with CHECKS.time("posture"):
+        ...
+
+REGISTRY.render() produces the Prometheus text exposition format for a
+/metrics endpoint, and REGISTRY.snapshot() gives the same data as plain
+dicts for in-process dashboards. Set WELLNESS_METRICS=0 (or call
+disable()) to turn every update into an early return; spans then hand out
+a shared no-op context manager, so instrumented code pays one attribute
+check per call.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from sub-millisecond checks to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, (), value
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(zip(self.labelnames, labels)), "value": value}
+                    for labels, value in self._values.items()]
+
+
+class _Span:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.started
+        self.histogram.observe(duration, *self.labels)
+        self.histogram.registry._record_span(self.histogram.name, self.labels, duration)
+        return False
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as in Prometheus"""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels):
+        """Context manager that observes the duration of its block as a span"""
+        if not self.registry.enabled:
+            return NULL_SPAN
+        return _Span(self, labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", labels, (("le", _format_value(bound)),), cumulative
+            yield self.name + "_sum", labels, (), total
+            yield self.name + "_count", labels, (), count
+
+    def _quantile(self, counts, count, fraction):
+        # Upper bound of the bucket holding the requested rank
+        rank = fraction * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            items = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        return [
+            {
+                "labels": dict(zip(self.labelnames, labels)),
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(counts, count, 0.5),
+                "p99": self._quantile(counts, count, 0.99)
+            }
+            for labels, counts, total, count in items
+        ]
+
+
+class MetricsRegistry:
+    """
+    Named metrics of one process. Declaring a metric twice returns the
+    existing one, so modules that are re-executed (e.g. Streamlit pages)
+    keep their series.
+    """
+
+    def __init__(self, enabled=True, span_history=256):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+        # Most recent spans as (wall time, name, labels, seconds), for tracing views
+        self.recent_spans = deque(maxlen=span_history)
+
+    def _declare(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already declared differently")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._declare(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._declare(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def _record_span(self, name, labels, duration):
+        self.recent_spans.append((time.time(), name, labels, duration))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample, labels, extra, value in metric._samples():
+                lines.append(f"{sample}{_format_labels(metric.labelnames, labels, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "enabled": self.enabled,
+            "counters": {m.name: m.snapshot() for m in metrics if m.kind == "counter"},
+            "histograms": {m.name: m.snapshot() for m in metrics if m.kind == "histogram"},
+            "recent_spans": [
+                {"at": at, "name": name, "labels": list(labels), "ms": duration * 1000}
+                for at, name, labels, duration in list(self.recent_spans)
+            ]
+        }
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get("WELLNESS_METRICS", "1") != "0")
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+def enable():
+    REGISTRY.enabled = True
+
+
+def disable():
+    REGISTRY.enabled = False
@@ -0,0 +1,260 @@
+import os
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+FACE_CASCADE = "haarcascade_frontalface_default.xml"
+EYE_CASCADE = "haarcascade_eye.xml"
+# The eye cascade's window is 20x20 and an eye is about a fifth of the face
+# width, so eyes are searched in a full-resolution face crop at least this wide
+EYE_SEARCH_WIDTH = 120
+
+
+class FrameAnalyzer:
+    """
+    CPU-only posture and eye-strain heuristics built on OpenCV Haar cascades.
+    Frames are converted to grayscale and downscaled into preallocated
+    buffers, and the last face position is used as the search region for the
+    next frame so the whole image is only scanned when tracking is lost.
+
+    Posture is judged against a baseline captured from the first face seen
+    (or from an explicit calibrate() call): a face that has dropped is read
+    as slouching and a face that has grown as leaning towards the screen.
+    Eyes are searched in the full-resolution face, upscaled when small. A
+    missed detection can be a blink or a cascade miss, so eyes only count as
+    strained once they have been seen for this user and then stay hidden in
+    all but squint_ratio of the last eye_window checks.
+    When analysis exceeds latency_budget_ms the working resolution is reduced.
+    """
+
+    def __init__(self, analysis_width=160, latency_budget_ms=10.0, cascade_dir=None,
+                 slouch_tolerance=0.12, lean_tolerance=0.25, too_close_ratio=0.45,
+                 eye_window=6, squint_ratio=0.2):
+        self.target_width = analysis_width
+        self.analysis_width = analysis_width
+        self.min_width = 80
+        self.latency_budget_ms = latency_budget_ms
+        self.slouch_tolerance = slouch_tolerance
+        self.lean_tolerance = lean_tolerance
+        self.too_close_ratio = too_close_ratio
+        self.squint_ratio = squint_ratio
+
+        cascade_dir = cascade_dir or cv2.data.haarcascades
+        self.face_cascade = cv2.CascadeClassifier(os.path.join(cascade_dir, FACE_CASCADE))
+        self.eye_cascade = cv2.CascadeClassifier(os.path.join(cascade_dir, EYE_CASCADE))
+        if self.face_cascade.empty() or self.eye_cascade.empty():
+            raise IOError(f"Haar cascades not found in {cascade_dir}")
+
+        self._gray = None
+        self._small = None
+        self._eyes = None
+        # Whether eyes were found, for recent checks that found a face
+        self.eye_history = deque(maxlen=eye_window)
+        self.eyes_seen = False
+        self.roi = None  # last face as (x, y, w, h) in normalised [0, 1] coordinates
+        self.baseline = None  # (centre_y, height) of the upright face, normalised
+        self.last_latency_ms = 0.0
+
+    def _prepare(self, frame):
+        """Convert to grayscale and downscale into reusable buffers"""
+        height, width = frame.shape[:2]
+        small_height = max(1, height * self.analysis_width // width)
+        if self._gray is None or self._gray.shape != (height, width):
+            self._gray = np.empty((height, width), dtype=np.uint8)
+        if self._small is None or self._small.shape != (small_height, self.analysis_width):
+            self._small = np.empty((small_height, self.analysis_width), dtype=np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.resize(self._gray, (self.analysis_width, small_height), dst=self._small,
+                   interpolation=cv2.INTER_AREA)
+        cv2.equalizeHist(self._small, dst=self._small)
+        return self._small
+
+    def _search(self, image, x0=0, y0=0):
+        min_side = max(12, image.shape[0] // 6)
+        faces = self.face_cascade.detectMultiScale(image, scaleFactor=1.15, minNeighbors=4,
+                                                   minSize=(min_side, min_side))
+        if len(faces) == 0:
+            return None
+        # The largest face is the person at the desk
+        x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
+        return (x + x0, y + y0, w, h)
+
+    def _find_face(self, small):
+        """Locate the face, searching around the previous position first"""
+        height, width = small.shape
+        face = None
+        if self.roi is not None:
+            rx, ry, rw, rh = self.roi
+            # Search a window twice the size of the last face, centred on it
+            x0 = max(0, int((rx - rw / 2) * width))
+            y0 = max(0, int((ry - rh / 2) * height))
+            x1 = min(width, int((rx + rw * 1.5) * width))
+            y1 = min(height, int((ry + rh * 1.5) * height))
+            if x1 - x0 >= 24 and y1 - y0 >= 24:
+                face = self._search(small[y0:y1, x0:x1], x0, y0)
+        if face is None:
+            face = self._search(small)
+        if face is None:
+            self.roi = None
+            return None
+        x, y, w, h = face
+        self.roi = (x / width, y / height, w / width, h / height)
+        return face
+
+    def _finish(self, started, result):
+        # Adapt the working resolution to stay inside the latency budget
+        self.last_latency_ms = (time.perf_counter() - started) * 1000
+        if self.last_latency_ms > self.latency_budget_ms and self.analysis_width > self.min_width:
+            self.analysis_width = max(self.min_width, int(self.analysis_width * 0.8))
+        elif self.last_latency_ms < self.latency_budget_ms / 2 and self.analysis_width < self.target_width:
+            self.analysis_width = min(self.target_width, int(self.analysis_width * 1.25))
+        result["latency_ms"] = self.last_latency_ms
+        return result
+
+    def _eye_region(self, face, small):
+        """The upper half of the face cut from the full-resolution frame, upscaled if small"""
+        scale = self._gray.shape[1] / small.shape[1]
+        x, y, w, h = (int(value * scale) for value in face)
+        region = self._gray[y:y + h // 2, x:x + w]
+        if region.shape[1] >= EYE_SEARCH_WIDTH or not region.size:
+            return cv2.equalizeHist(region)
+        size = (EYE_SEARCH_WIDTH, max(1, region.shape[0] * EYE_SEARCH_WIDTH // region.shape[1]))
+        if self._eyes is None or self._eyes.shape != (size[1], size[0]):
+            self._eyes = np.empty((size[1], size[0]), dtype=np.uint8)
+        cv2.resize(region, size, dst=self._eyes, interpolation=cv2.INTER_LINEAR)
+        cv2.equalizeHist(self._eyes, dst=self._eyes)
+        return self._eyes
+
+    def calibrate(self, frame):
+        """Record the current face position as the upright baseline"""
+        self.baseline = None
+        self.eye_history.clear()
+        self.eyes_seen = False
+        self.analyze_posture(frame)
+        return self.baseline is not None
+
+    def analyze_posture(self, frame):
+        started = time.perf_counter()
+        small = self._prepare(frame)
+        face = self._find_face(small)
+        if face is None:
+            return self._finish(started, {
+                'alert': False,
+                'message': 'No user detected',
+                'confidence': 0.0
+            })
+
+        height = small.shape[0]
+        _, y, _, h = face
+        centre_y = (y + h / 2) / height
+        face_height = h / height
+        if self.baseline is None:
+            self.baseline = (centre_y, face_height)
+
+        base_centre, base_height = self.baseline
+        drop = (centre_y - base_centre) - self.slouch_tolerance
+        growth = (face_height / base_height - 1) - self.lean_tolerance
+        bad_posture = drop > 0 or growth > 0
+        if drop > 0:
+            message = 'You are slouching. Sit up straight'
+        elif growth > 0:
+            message = 'You are leaning towards the screen'
+        else:
+            message = 'Posture looks good'
+        # Confidence grows with the distance from the decision boundary
+        margin = max(drop, growth) if bad_posture else -max(drop, growth)
+        return self._finish(started, {
+            'alert': bad_posture,
+            'message': message,
+            'confidence': min(0.99, 0.6 + margin * 2)
+        })
+
+    def analyze_eye_strain(self, frame):
+        started = time.perf_counter()
+        small = self._prepare(frame)
+        face = self._find_face(small)
+        if face is None:
+            return self._finish(started, {
+                'alert': False,
+                'message': 'No user detected',
+                'confidence': 0.0
+            })
+
+        face_ratio = face[2] / small.shape[1]
+        upper_face = self._eye_region(face, small)
+        min_eye = max(12, upper_face.shape[1] // 8)
+        eyes = self.eye_cascade.detectMultiScale(upper_face, scaleFactor=1.1, minNeighbors=3,
+                                                 minSize=(min_eye, min_eye))
+        self.eye_history.append(len(eyes) > 0)
+        self.eyes_seen = self.eyes_seen or len(eyes) > 0
+        visible = sum(self.eye_history) / len(self.eye_history)
+        window_full = len(self.eye_history) == self.eye_history.maxlen
+        too_close = face_ratio > self.too_close_ratio
+        squinting = self.eyes_seen and window_full and visible <= self.squint_ratio
+        if too_close:
+            message = 'You are too close to the screen'
+            confidence = min(0.99, 0.6 + (face_ratio - self.too_close_ratio) * 2)
+        elif squinting:
+            message = 'Eyes look strained. Take a break from the screen'
+            confidence = min(0.95, 0.6 + (self.squint_ratio - visible))
+        elif not self.eyes_seen:
+            # The cascade may just not find this user's eyes; no verdict
+            message = 'Eyes not visible'
+            confidence = 0.0
+        else:
+            message = 'Eye health looks good'
+            confidence = 0.7 if len(eyes) == 1 else 0.85
+        return self._finish(started, {
+            'alert': bool(too_close or squinting),
+            'message': message,
+            'confidence': confidence
+        })
+
+
+class MotionGate:
+    """
+    Cheap scene-change test run before the full analysis.
+    Frames are point-sampled down to four times `width`, then area-averaged
+    to a thumbnail of `width` pixels (so sensor noise averages out without
+    paying for an area resize of the full frame), and compared with the
+    thumbnail of the last frame that was analysed; the mean absolute
+    difference (0-255 grey levels) must exceed `threshold` for the scene to
+    count as changed. Comparing against the last analysed frame rather than
+    the previous one means slow drift still adds up to a change. After
+    max_skips unchanged frames in a row the next frame is analysed anyway.
+    """
+
+    def __init__(self, width=32, threshold=3.0, max_skips=10):
+        self.width = width
+        self.threshold = threshold
+        self.max_skips = max_skips
+        self._sampled = None
+        self._thumb = None
+        self._reference = None
+        self.skips = 0
+        self.last_difference = None
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, height * self.width // width))
+        sampled_size = (size[0] * 4, size[1] * 4)
+        if self._thumb is None or self._thumb.shape[:2] != (size[1], size[0]):
+            self._sampled = np.empty((sampled_size[1], sampled_size[0]) + frame.shape[2:], dtype=np.uint8)
+            self._thumb = np.empty((size[1], size[0]) + frame.shape[2:], dtype=np.uint8)
+        cv2.resize(frame, sampled_size, dst=self._sampled, interpolation=cv2.INTER_NEAREST)
+        cv2.resize(self._sampled, size, dst=self._thumb, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(self._thumb, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else self._thumb.copy()
+
+    def should_analyze(self, frame):
+        """True when frame needs the full analysis; it then becomes the new reference"""
+        thumb = self._thumbnail(frame)
+        if self._reference is not None and self._reference.shape == thumb.shape:
+            self.last_difference = cv2.mean(cv2.absdiff(thumb, self._reference))[0]
+            if self.last_difference <= self.threshold and self.skips < self.max_skips:
+                self.skips += 1
+                return False
+        self._reference = thumb
+        self.skips = 0
+        return True
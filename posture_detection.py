@@ -1,8 +1,84 @@
-import cv2
-import numpy as np
 import time
-from threading import Thread
-import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread, current_thread
+import metrics
+from frame_pipeline import FramePipeline, SyntheticFrameSource
+from scheduler import AdaptiveInterval, DeadlineScheduler
+
+# OpenCV and NumPy are imported on first use, when detection actually starts,
+# so importing this module stays cheap for pages that never run detection.
+
+CHECK_LATENCY = metrics.histogram(
+    "wellness_detector_check_seconds", "Posture and eye-strain check latency", ("check",))
+LOOP_LAG = metrics.histogram(
+    "wellness_detector_loop_lag_seconds", "How late due checks were picked up by the scheduler thread", ("loop",))
+DETECTOR_ALERTS = metrics.counter(
+    "wellness_detector_alerts_total", "Alerts raised by detection checks", ("type",))
+CHECK_OUTCOMES = metrics.counter(
+    "wellness_detector_checks_total", "Due checks, analysed or skipped by the motion gate", ("check", "outcome"))
+
+SKIPPED_RESULT = {'alert': False, 'skipped': True, 'message': 'No movement since the last analysis'}
+
+
+class _AdaptiveChecks:
+    """
+    Motion gates and adaptive intervals for the checks of one stream.
+    A due check first compares the frame with the one last analysed for that
+    check and skips the full analysis when the scene has not changed. The
+    interval to the next check tightens after alerts and relaxes after runs
+    of good results, between min_factor and max_factor times its base
+    interval; a skipped check repeats the last analysed outcome. With
+    adaptive=False every check is analysed at its base interval.
+    """
+
+    def __init__(self, intervals, adaptive=True, motion_threshold=3.0, max_skips=10,
+                 min_factor=0.25, max_factor=2.0):
+        self.adaptive = adaptive
+        self.motion_threshold = motion_threshold
+        self.max_skips = max_skips
+        self.intervals = {
+            check: AdaptiveInterval(base, base * min_factor, base * max_factor)
+            for check, base in intervals.items()
+        }
+        self.gates = {}
+        self.last_alert = {check: False for check in intervals}
+        self.analysed = 0
+        self.skipped = 0
+
+    def should_analyze(self, check, frame):
+        if self.adaptive:
+            gate = self.gates.get(check)
+            if gate is None:
+                from posture_analysis import MotionGate
+                gate = self.gates[check] = MotionGate(threshold=self.motion_threshold,
+                                                      max_skips=self.max_skips)
+            if not gate.should_analyze(frame):
+                self.skipped += 1
+                CHECK_OUTCOMES.inc(check, "skipped")
+                return False
+        self.analysed += 1
+        CHECK_OUTCOMES.inc(check, "analysed")
+        return True
+
+    def record(self, check, result):
+        """Return the interval until the next check; result None means no frame was checked"""
+        interval = self.intervals[check]
+        if not self.adaptive:
+            return interval.base
+        if result is None:
+            return interval.current
+        if not result.get('skipped'):
+            self.last_alert[check] = bool(result.get('alert'))
+        return interval.record(self.last_alert[check])
+
+    def get_stats(self):
+        total = self.analysed + self.skipped
+        return {
+            "analysed": self.analysed,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / total if total else 0.0,
+            "intervals": {check: interval.current for check, interval in self.intervals.items()}
+        }
 
 class PostureDetector:
     """
@@ -11,14 +87,42 @@ class PostureDetector:
     Modified to work with Streamlit.
     """
     
-    def __init__(self):
+    def __init__(self, frame_source=None, queue_size=2, analyzer=None, latency_budget_ms=10.0,
+                 adaptive=True, motion_threshold=3.0, max_skips=10, min_interval_factor=0.25,
+                 max_interval_factor=2.0):
         self.is_running = False
-        self.camera = None
+        # Any FrameSource: synthetic frames by default, or a video file,
+        # camera index or image directory for real input. Real-time sources
+        # are captured continuously through a FramePipeline of queue_size
+        # frames and each check takes the newest one; any other source is
+        # read into a reusable buffer when a check is due, so nothing runs
+        # between checks.
+        self.frame_source = frame_source
+        self.queue_size = queue_size
+        self._source = None
+        self._pipeline = None
+        self._buffer = None
+        self.frames_read = 0
+        # Haar cascades are loaded on first use
+        self.analyzer = analyzer
+        self.latency_budget_ms = latency_budget_ms
         self.last_posture_check = time.time()
         self.last_eye_strain_check = time.time()
         self.posture_check_interval = 60  # seconds
         self.eye_strain_check_interval = 300  # seconds
+        # Motion gating and alert-driven intervals; the longest a change can
+        # go unnoticed is max_interval_factor times the check interval, or
+        # max_skips checks if the change is too subtle for the motion gate
+        self.adaptive = adaptive
+        self.motion_threshold = motion_threshold
+        self.max_skips = max_skips
+        self.min_interval_factor = min_interval_factor
+        self.max_interval_factor = max_interval_factor
+        self._checks = None
         self.callback = None
+        self._scheduler = None
+        self._thread = None
+        self.started_at = None
         
     def start(self, callback=None):
         """Start the posture detection process"""
@@ -28,87 +132,169 @@ class PostureDetector:
         self.callback = callback
         self.is_running = True
         
-        # In Streamlit, we'll use a different approach for camera access
-        # For demo purposes, we'll simulate camera access
-        # self.camera = cv2.VideoCapture(0)
-        self.camera = True  # Simulate camera being active
+        # Without an explicit source we fall back to synthetic frames. The
+        # source is opened by the detection thread: a real-time one starts
+        # capturing straight away, any other on the first check
+        self._source = self.frame_source or SyntheticFrameSource()
+        self._pipeline = FramePipeline(self._source, self.queue_size) if self._source.real_time else None
+        self._buffer = None
+        self.frames_read = 0
+        
+        # The detection thread sleeps until the next check is due
+        self._checks = None
+        self._get_checks()
+        self.started_at = time.time()
+        self._scheduler = DeadlineScheduler()
+        self._scheduler.schedule(self.posture_check_interval, 'posture', self._check_posture)
+        self._scheduler.schedule(self.eye_strain_check_interval, 'eye_strain', self._check_eye_strain)
         
         # Start detection in a separate thread to not block the main application
-        Thread(target=self._detection_loop).start()
+        self._thread = Thread(target=self._detection_loop, daemon=True)
+        self._thread.start()
         return True
         
     def stop(self):
         """Stop the posture detection process"""
         self.is_running = False
-        if self.camera:
-            # In a real implementation with OpenCV:
-            # self.camera.release()
-            self.camera = None
-            
-    def _detection_loop(self):
-        """Main detection loop running in a separate thread"""
-        while self.is_running and self.camera:
-            # In Streamlit, we'll simulate frame capture
-            # ret, frame = self.camera.read()
-            frame = np.zeros((480, 640, 3), dtype=np.uint8)  # Dummy frame
+        if self._scheduler:
+            # Wakes the detection thread straight away
+            self._scheduler.stop()
+        if self._thread is not None and self._thread is not current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._pipeline is not None:
+            self._pipeline.stop()
+        elif self._buffer is not None:
+            self._source.close()
+            self._buffer = None
+        self._source = None
             
-            current_time = time.time()
-            
-            # Check posture periodically
-            if current_time - self.last_posture_check > self.posture_check_interval:
-                posture_result = self._check_posture(frame)
-                self.last_posture_check = current_time
-                if self.callback and posture_result.get('alert'):
-                    self.callback('posture', posture_result)
+    def get_pipeline_stats(self):
+        """
+        Captured, analysed and dropped frames and the achieved rates of the
+        capture pipeline, or None when the source is read on demand
+        """
+        if self._pipeline is None:
+            return None
+        return self._pipeline.get_stats()
             
-            # Check eye strain periodically
-            if current_time - self.last_eye_strain_check > self.eye_strain_check_interval:
-                eye_result = self._check_eye_strain(frame)
-                self.last_eye_strain_check = current_time
-                if self.callback and eye_result.get('alert'):
-                    self.callback('eye_strain', eye_result)
-                    
-            # Don't hog the CPU
-            time.sleep(0.1)
+    def get_loop_stats(self):
+        """
+        Wakeups of every thread the detector runs, to confirm it is idle
+        between checks. A source read on demand is read by the detection
+        thread itself; a real-time source adds one capture per frame.
+        """
+        if not self._scheduler:
+            return None
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            "wakeups": self._scheduler.wakeups,
+            "capture_wakeups": self._pipeline.captured if self._pipeline is not None else 0,
+            "frames_read": self.frames_read,
+            "wakeups_per_minute": self._scheduler.wakeups * 60 / elapsed,
+            "next_check_in": self._scheduler.time_until_next()
+        }
             
+    def get_adaptive_stats(self):
+        """Analysed and motion-skipped checks, and the current check intervals"""
+        return self._get_checks().get_stats()
+
+    def _get_checks(self):
+        if self._checks is None:
+            self._checks = _AdaptiveChecks(
+                {'posture': self.posture_check_interval, 'eye_strain': self.eye_strain_check_interval},
+                self.adaptive, self.motion_threshold, self.max_skips,
+                self.min_interval_factor, self.max_interval_factor
+            )
+        return self._checks
+
+    def _detection_loop(self):
+        """Main detection loop running in a separate thread"""
+        scheduler = self._scheduler
+        pipeline = self._pipeline
+        if pipeline is not None:
+            pipeline.start()
+        while self.is_running:
+            item = scheduler.next_due()
+            if item is None:
+                break
+            check_type, check = item
+            LOOP_LAG.observe(scheduler.last_lag, "detector")
+            if pipeline is not None:
+                slot = self._latest_slot(pipeline)
+                if slot is None:
+                    break
+                try:
+                    result = self._run_check(check_type, check, pipeline.frame(slot))
+                finally:
+                    pipeline.release(slot)
+            else:
+                frame = self._read_frame()
+                if frame is None:
+                    # The source is exhausted
+                    break
+                result = self._run_check(check_type, check, frame)
+            scheduler.schedule(self._get_checks().record(check_type, result), check_type, check)
+        self.is_running = False
+
+    def _latest_slot(self, pipeline):
+        """The newest captured frame, or None once stopped or the source is exhausted"""
+        while self.is_running:
+            slot = pipeline.latest(timeout=0.5)
+            if slot is not None:
+                return slot
+            if not pipeline.is_running:
+                return None
+        return None
+
+    def _read_frame(self):
+        """Read the next frame from an on-demand source into the reusable buffer"""
+        if self._buffer is None:
+            import numpy as np
+            self._source.open()
+            self._buffer = np.empty(self._source.shape, dtype=np.uint8)
+        if not self._source.read_into(self._buffer):
+            return None
+        self.frames_read += 1
+        return self._buffer
+
+    def _run_check(self, check_type, check, frame):
+        if not self._get_checks().should_analyze(check_type, frame):
+            return SKIPPED_RESULT
+        result = check(frame)
+        if check_type == 'posture':
+            self.last_posture_check = time.time()
+        else:
+            self.last_eye_strain_check = time.time()
+        if result.get('alert'):
+            DETECTOR_ALERTS.inc(check_type)
+            if self.callback:
+                self.callback(check_type, result)
+        return result
+
+    def _get_analyzer(self):
+        if self.analyzer is None:
+            from posture_analysis import FrameAnalyzer
+            self.analyzer = FrameAnalyzer(latency_budget_ms=self.latency_budget_ms)
+        return self.analyzer
+
     def _check_posture(self, frame):
         """
         Check if the user has poor posture
-        In a real implementation, this would use computer vision models
-        to detect head position, shoulder alignment, etc.
+        Compares the tracked face position against the upright baseline
+        to detect slouching and leaning towards the screen.
         """
-        # Placeholder for actual AI-based posture detection
-        # This would analyze the frame for posture issues
-        
-        # Simulate detection (random for demo purposes)
-        import random
-        bad_posture = random.random() < 0.3  # 30% chance of detecting bad posture
-        
-        return {
-            'alert': bad_posture,
-            'message': 'Your posture needs correction' if bad_posture else 'Posture looks good',
-            'confidence': random.uniform(0.7, 0.95)
-        }
+        with CHECK_LATENCY.time("posture"):
+            return self._get_analyzer().analyze_posture(frame)
         
     def _check_eye_strain(self, frame):
         """
         Check for signs of eye strain
-        In a real implementation, this would detect:
-        - Distance from screen
-        - Blink rate
-        - Squinting
+        Flags sitting too close to the screen (face size) and
+        squinting (eyes hidden across most recent checks).
         """
-        # Placeholder for actual AI-based eye strain detection
-        
-        # Simulate detection (random for demo purposes)
-        import random
-        eye_strain = random.random() < 0.2  # 20% chance of detecting eye strain
-        
-        return {
-            'alert': eye_strain,
-            'message': 'Take a break from the screen' if eye_strain else 'Eye health looks good',
-            'confidence': random.uniform(0.7, 0.9)
-        }
+        with CHECK_LATENCY.time("eye_strain"):
+            return self._get_analyzer().analyze_eye_strain(frame)
     
     def simulate_bad_posture(self):
         """
@@ -141,6 +327,194 @@ class PostureDetector:
         return eye_result
 
 
+class _Stream:
+    """Per-stream state owned by a PostureDetectorPool"""
+
+    def __init__(self, stream_id, frame_source, callback, posture_check_interval, eye_strain_check_interval,
+                 keep_alive=None, **adaptive_options):
+        self.stream_id = stream_id
+        self.frame_source = frame_source
+        self.callback = callback
+        self.keep_alive = keep_alive
+        self.intervals = {
+            'posture': posture_check_interval,
+            'eye_strain': eye_strain_check_interval
+        }
+        self.checks = _AdaptiveChecks(self.intervals, **adaptive_options)
+        self.analyzer = None
+        self.buffer = None
+        self.lock = Lock()
+        self.active = True
+
+
+class PostureDetectorPool:
+    """
+    Runs posture and eye-strain checks for many streams on a fixed pool of
+    worker threads. A single scheduler thread sleeps on a heap of per-stream
+    deadlines and hands due checks to the workers, which read one frame from
+    the stream's source on demand. Idle streams therefore cost no threads and
+    no wakeups between their checks. A stream registered with a keep_alive
+    callable is removed at its first due check after that returns False, so
+    streams whose owner went away without removing them do not run forever.
+    """
+
+    def __init__(self, max_workers=4, latency_budget_ms=10.0, adaptive=True, motion_threshold=3.0,
+                 max_skips=10, min_interval_factor=0.25, max_interval_factor=2.0):
+        self.max_workers = max_workers
+        self.latency_budget_ms = latency_budget_ms
+        # Applied to every stream; see _AdaptiveChecks
+        self.adaptive_options = {
+            "adaptive": adaptive,
+            "motion_threshold": motion_threshold,
+            "max_skips": max_skips,
+            "min_factor": min_interval_factor,
+            "max_factor": max_interval_factor
+        }
+        self.is_running = False
+        self._streams = {}
+        self._lock = Lock()
+        self.expired = 0
+        self._scheduler = None
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        if self.is_running:
+            return False
+        self._scheduler = DeadlineScheduler()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="posture-worker")
+        self.is_running = True
+        with self._lock:
+            for stream in self._streams.values():
+                self._schedule_stream(stream)
+        self._thread = Thread(target=self._dispatch_loop, name="posture-scheduler", daemon=True)
+        self._thread.start()
+        return True
+
+    def add_stream(self, stream_id, frame_source, callback=None,
+                   posture_check_interval=60, eye_strain_check_interval=300, keep_alive=None):
+        """Register a stream; its first checks run after one interval"""
+        stream = _Stream(stream_id, frame_source, callback, posture_check_interval, eye_strain_check_interval,
+                         keep_alive, **self.adaptive_options)
+        with self._lock:
+            if stream_id in self._streams:
+                raise ValueError(f"Stream already registered: {stream_id}")
+            self._streams[stream_id] = stream
+            if self.is_running:
+                self._schedule_stream(stream)
+        return stream_id
+
+    def remove_stream(self, stream_id):
+        with self._lock:
+            stream = self._streams.pop(stream_id, None)
+        if stream is None:
+            return False
+        stream.active = False
+        if self._scheduler is not None:
+            self._scheduler.cancel(stream_id)
+        with stream.lock:
+            if stream.buffer is not None:
+                stream.frame_source.close()
+                stream.buffer = None
+        return True
+
+    def _schedule_stream(self, stream):
+        for check, interval in stream.intervals.items():
+            self._scheduler.schedule(interval, stream.stream_id, check)
+
+    def _dispatch_loop(self):
+        while True:
+            item = self._scheduler.next_due()
+            if item is None:
+                break
+            stream_id, check = item
+            LOOP_LAG.observe(self._scheduler.last_lag, "pool")
+            with self._lock:
+                stream = self._streams.get(stream_id)
+            if stream is not None:
+                self._executor.submit(self._run_check, stream, check)
+
+    def has_stream(self, stream_id):
+        with self._lock:
+            return stream_id in self._streams
+
+    def _run_check(self, stream, check):
+        if stream.keep_alive is not None and not stream.keep_alive():
+            if self.remove_stream(stream.stream_id):
+                with self._lock:
+                    self.expired += 1
+            return
+        result = None
+        try:
+            with stream.lock:
+                if not stream.active:
+                    return
+                if stream.buffer is None:
+                    # Open the source and allocate its frame buffer on first use
+                    import numpy as np
+                    from posture_analysis import FrameAnalyzer
+                    stream.frame_source.open()
+                    stream.buffer = np.empty(stream.frame_source.shape, dtype=np.uint8)
+                    stream.analyzer = FrameAnalyzer(latency_budget_ms=self.latency_budget_ms)
+                if not stream.frame_source.read_into(stream.buffer):
+                    return
+                if not stream.checks.should_analyze(check, stream.buffer):
+                    result = SKIPPED_RESULT
+                    return
+                with CHECK_LATENCY.time(check):
+                    if check == 'posture':
+                        result = stream.analyzer.analyze_posture(stream.buffer)
+                    else:
+                        result = stream.analyzer.analyze_eye_strain(stream.buffer)
+            if result.get('alert'):
+                DETECTOR_ALERTS.inc(check)
+                if stream.callback:
+                    stream.callback(check, result)
+        finally:
+            # The next check is scheduled after this one finishes so a slow
+            # check can never pile up behind itself
+            if stream.active and self.is_running:
+                interval = stream.checks.record(check, result)
+                self._scheduler.schedule(interval, stream.stream_id, check)
+
+    def stream_count(self):
+        with self._lock:
+            return len(self._streams)
+
+    def get_stats(self):
+        with self._lock:
+            streams = list(self._streams.values())
+        analysed = sum(stream.checks.analysed for stream in streams)
+        skipped = sum(stream.checks.skipped for stream in streams)
+        return {
+            "streams": len(streams),
+            "expired_streams": self.expired,
+            "checks_analysed": analysed,
+            "checks_skipped": skipped,
+            "pending_checks": len(self._scheduler) if self._scheduler else 0,
+            "scheduler_wakeups": self._scheduler.wakeups if self._scheduler else 0
+        }
+
+    def shutdown(self, wait=True):
+        """Stop scheduling, finish in-flight checks and release every source"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._scheduler.stop()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            streams = list(self._streams.values())
+        for stream in streams:
+            with stream.lock:
+                if stream.buffer is not None:
+                    stream.frame_source.close()
+                    stream.buffer = None
+
+
 # Example usage
 if __name__ == "__main__":
     def alert_callback(alert_type, data):
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+from timer_wheel import TimerWheel
+
+HEARTBEAT_KEY = ("heartbeat",)
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+class PushHub:
+    """
+    Pushes break reminders and burnout-risk changes to Server-Sent Events
+    subscribers.
+    For every user with at least one subscriber, the hub keeps two timers in
+    a single TimerWheel: one for the moment the break recommendation turns
+    to should_break, and one for the next change of the burnout message.
+    One driver task advances the wheel for the whole process, so idle
+    subscribers cost a queue and nothing else; no per-client loop ever
+    polls the trackers. A shared heartbeat keeps proxies from closing
+    quiet connections.
+    """
+
+    def __init__(self, trackers, tick=0.25, heartbeat=15.0, queue_size=16):
+        self.trackers = trackers
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.wheel = TimerWheel(tick=tick)
+        self._subscribers = {}
+        # user_id -> {"break": should_break, "burnout": message} last pushed
+        self._last = {}
+        self._driver = None
+        self._wake = None
+        self.pushed = 0
+        self.dropped = 0
+
+    def _ensure_driver(self):
+        if self._driver is None:
+            self._wake = asyncio.Event()
+            self._driver = asyncio.ensure_future(self._drive())
+            self.wheel.schedule(self.heartbeat, HEARTBEAT_KEY, None)
+
+    async def _drive(self):
+        while True:
+            if not self.wheel:
+                self._wake.clear()
+                await self._wake.wait()
+            await asyncio.sleep(self.wheel.time_until_tick())
+            for key, _ in self.wheel.advance():
+                if key == HEARTBEAT_KEY:
+                    self._broadcast(HEARTBEAT)
+                    self.wheel.schedule(self.heartbeat, HEARTBEAT_KEY, None)
+                elif key[0] in self._subscribers:
+                    asyncio.ensure_future(self.refresh(key[0]))
+
+    async def subscribe(self, user_id):
+        """Register a subscriber and return its queue of encoded messages"""
+        self._ensure_driver()
+        queue = asyncio.Queue(self.queue_size)
+        await self.refresh(user_id, new_queue=queue)
+        self._wake.set()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+            self._last.pop(user_id, None)
+            self.wheel.cancel((user_id, "break"))
+            self.wheel.cancel((user_id, "burnout"))
+
+    def close(self, queue):
+        """Tell the consumer of queue to stop, e.g. after its client went away"""
+        self._offer(queue, None)
+
+    def _offer(self, queue, message):
+        if queue.full():
+            # A slow client loses its oldest message rather than stalling others
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(message)
+
+    def _broadcast(self, message):
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._offer(queue, message)
+
+    def _read_state(self, user_id):
+        with self.trackers.use(user_id) as tracker:
+            return {
+                "break": tracker.get_break_recommendation(),
+                "burnout": tracker.calculate_burnout_risk(),
+                "break_in": tracker.seconds_until_break(),
+                "burnout_in": tracker.seconds_until_burnout_change()
+            }
+
+    async def refresh(self, user_id, new_queue=None):
+        """
+        Re-read a user's tracker, push whatever changed since the last push
+        and re-arm the user's timers. Call after any change that can move a
+        deadline, such as a break, a focus session or new settings.
+        new_queue is registered as a subscriber and sent the full current
+        state; the others still only get changes.
+        """
+        if user_id not in self._subscribers and new_queue is None:
+            return
+        state = await asyncio.to_thread(self._read_state, user_id)
+        if new_queue is not None:
+            self._subscribers.setdefault(user_id, set()).add(new_queue)
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        current = [format_event("break", state["break"]), format_event("burnout", state["burnout"])]
+        last = self._last.setdefault(user_id, {})
+        messages = []
+        if last.get("break") != state["break"]["should_break"]:
+            last["break"] = state["break"]["should_break"]
+            messages.append(current[0])
+        if last.get("burnout") != state["burnout"]["message"]:
+            last["burnout"] = state["burnout"]["message"]
+            messages.append(current[1])
+        for queue in queues:
+            pending = current if queue is new_queue else messages
+            for message in pending:
+                self._offer(queue, message)
+            self.pushed += len(pending)
+
+        # The memoised recommendation can trail the clock by up to a second,
+        # so a deadline that has just passed is checked again on the next tick
+        if not state["break"]["should_break"]:
+            self.wheel.schedule(state["break_in"], (user_id, "break"), None)
+        else:
+            self.wheel.cancel((user_id, "break"))
+        if state["burnout_in"] is not None:
+            self.wheel.schedule(state["burnout_in"], (user_id, "burnout"), None)
+        else:
+            self.wheel.cancel((user_id, "burnout"))
+
+    async def stop(self):
+        if self._driver is not None:
+            self._driver.cancel()
+            self._driver = None
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self.close(queue)
+
+    def get_stats(self):
+        return {
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "users": len(self._subscribers),
+            "timers": len(self.wheel),
+            "timers_fired": self.wheel.fired,
+            "pushed": self.pushed,
+            "dropped": self.dropped
+        }
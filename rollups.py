@@ -0,0 +1,183 @@
+from datetime import datetime
+
+from event_store import from_us, to_us
+
+# Bucket widths in microseconds
+RESOLUTIONS = {
+    "minute": 60 * 1_000_000,
+    "hour": 3600 * 1_000_000,
+    "day": 86400 * 1_000_000
+}
+
+# How many buckets of each resolution are kept; None keeps everything
+DEFAULT_RETENTION = {
+    "minute": 2 * 24 * 60,  # two days
+    "hour": 90 * 24,        # ninety days
+    "day": None
+}
+
+
+class RollupIndex:
+    """
+    Per-minute, per-hour and per-day totals of tracker events.
+    Totals are updated as events arrive, so a trend query reads one value
+    per bucket instead of scanning the raw history. Fine-grained buckets
+    older than their retention are pruned to keep memory bounded.
+    """
+
+    def __init__(self, retention=None):
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        # {resolution: {kind: {bucket_start_us: value}}}
+        self._buckets = {resolution: {} for resolution in RESOLUTIONS}
+        self._latest_us = {resolution: None for resolution in RESOLUTIONS}
+
+    def add(self, kind, timestamp_us, amount=1):
+        """Add amount to the buckets of every resolution covering timestamp_us"""
+        for resolution, width in RESOLUTIONS.items():
+            self._add(resolution, kind, timestamp_us - timestamp_us % width, amount)
+
+    def add_span(self, kind, start_us, end_us):
+        """
+        Add the seconds from start_us up to end_us, split at bucket
+        boundaries so that each bucket gets the part of the span it covers
+        """
+        for resolution, width in RESOLUTIONS.items():
+            bucket = start_us - start_us % width
+            while bucket < end_us:
+                overlap = min(end_us, bucket + width) - max(start_us, bucket)
+                self._add(resolution, kind, bucket, overlap / 1_000_000)
+                bucket += width
+
+    def _add(self, resolution, kind, bucket, amount):
+        values = self._buckets[resolution].setdefault(kind, {})
+        values[bucket] = values.get(bucket, 0) + amount
+        latest = self._latest_us[resolution]
+        if latest is None or bucket > latest:
+            self._latest_us[resolution] = bucket
+            self._prune(resolution, bucket)
+
+    def add_many(self, kind, timestamps_us, amounts=None):
+        """
+        Bulk form of add() for a sorted NumPy array of timestamps, with
+        optional per-event amounts. Buckets outside the retention window of
+        the newest event are never materialised.
+        """
+        import numpy as np
+        if not len(timestamps_us):
+            return
+        timestamps_us = np.asarray(timestamps_us, dtype=np.int64)
+        if amounts is None:
+            amounts = np.ones(len(timestamps_us), dtype=np.int64)
+        for resolution, width in RESOLUTIONS.items():
+            self._add_sorted(resolution, kind, timestamps_us - timestamps_us % width, amounts)
+
+    def add_spans(self, kind, starts_us, ends_us):
+        """
+        Bulk form of add_span() for NumPy arrays of spans that are sorted
+        and do not overlap. Spans ending before the retention window of the
+        newest one are skipped before they are split.
+        """
+        import numpy as np
+        starts_us = np.asarray(starts_us, dtype=np.int64)
+        ends_us = np.asarray(ends_us, dtype=np.int64)
+        spans = ends_us > starts_us
+        starts_us, ends_us = starts_us[spans], ends_us[spans]
+        if not len(starts_us):
+            return
+        for resolution, width in RESOLUTIONS.items():
+            first = starts_us - starts_us % width
+            last = (ends_us - 1) - (ends_us - 1) % width
+            keep = self.retention.get(resolution)
+            if keep is not None:
+                kept = last > last[-1] - keep * width
+                first, last = first[kept], last[kept]
+                starts, ends = starts_us[kept], ends_us[kept]
+            else:
+                starts, ends = starts_us, ends_us
+            # One piece per bucket a span covers, in time order
+            counts = (last - first) // width + 1
+            span = np.repeat(np.arange(len(counts)), counts)
+            offsets = np.arange(len(span)) - np.repeat(np.cumsum(counts) - counts, counts)
+            buckets = first[span] + offsets * width
+            overlap = np.minimum(ends[span], buckets + width) - np.maximum(starts[span], buckets)
+            self._add_sorted(resolution, kind, buckets, overlap / 1_000_000)
+
+    def _add_sorted(self, resolution, kind, buckets, amounts):
+        import numpy as np
+        width = RESOLUTIONS[resolution]
+        # Sorted input means each bucket is one contiguous run
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        keys = buckets[starts]
+        sums = np.add.reduceat(amounts, starts)
+        keep = self.retention.get(resolution)
+        if keep is not None:
+            first = np.searchsorted(keys, keys[-1] - keep * width, side="right")
+            keys, sums = keys[first:], sums[first:]
+        values = self._buckets[resolution].setdefault(kind, {})
+        for bucket, amount in zip(keys.tolist(), sums.tolist()):
+            values[bucket] = values.get(bucket, 0) + amount
+        latest = self._latest_us[resolution]
+        if latest is None or keys[-1] > latest:
+            self._latest_us[resolution] = int(keys[-1])
+            self._prune(resolution, int(keys[-1]))
+
+    def _prune(self, resolution, newest_bucket):
+        keep = self.retention.get(resolution)
+        if keep is None:
+            return
+        cutoff = newest_bucket - keep * RESOLUTIONS[resolution]
+        for values in self._buckets[resolution].values():
+            # Buckets are created in time order, so the oldest come first
+            while values:
+                oldest = next(iter(values))
+                if oldest > cutoff:
+                    break
+                del values[oldest]
+
+    def series(self, kind, resolution, start, end=None):
+        """
+        Values of kind for every bucket from start up to (excluding) end,
+        as a list of (bucket_start datetime, value) with zeros for gaps.
+        """
+        width = RESOLUTIONS[resolution]
+        end_us = to_us(end or datetime.now())
+        start_us = to_us(start)
+        start_us -= start_us % width
+        values = self._buckets[resolution].get(kind, {})
+        return [
+            (from_us(bucket), values.get(bucket, 0))
+            for bucket in range(start_us, end_us, width)
+        ]
+
+    def total(self, kind, resolution, start, end=None):
+        return sum(value for _, value in self.series(kind, resolution, start, end))
+
+    def to_dict(self):
+        return {
+            "buckets": {
+                resolution: {
+                    kind: [[bucket, value] for bucket, value in values.items()]
+                    for kind, values in kinds.items()
+                }
+                for resolution, kinds in self._buckets.items()
+            },
+            "latest": self._latest_us
+        }
+
+    @classmethod
+    def from_dict(cls, state, retention=None):
+        index = cls(retention)
+        for resolution, kinds in state["buckets"].items():
+            index._buckets[resolution] = {
+                kind: {bucket: value for bucket, value in values}
+                for kind, values in kinds.items()
+            }
+        index._latest_us = dict(state["latest"])
+        return index
+
+    def bucket_count(self):
+        return sum(
+            len(values)
+            for kinds in self._buckets.values()
+            for values in kinds.values()
+        )
@@ -0,0 +1,104 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class DeadlineScheduler:
+    """
+    A heap of keyed tasks ordered by due time.
+    Consumers block in next_due() until the earliest task is due, a sooner
+    task is scheduled, or the scheduler is stopped; there is no polling, so an
+    idle scheduler does not wake up at all. `wakeups` counts every return from
+    a wait and makes idle overhead measurable, and `last_lag` holds how late
+    (in seconds) the most recently returned task was handed out.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self.stopped = False
+        self.wakeups = 0
+        self.last_lag = 0.0
+
+    def schedule(self, delay, key, task):
+        """Schedule task (any object) for key to become due after delay seconds"""
+        due = self.clock() + delay
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._counter), key, task))
+            # Only the head of the heap changes how long the consumer must sleep
+            if self._heap[0][2] is key and self._heap[0][3] is task:
+                self._cond.notify()
+        return due
+
+    def cancel(self, key):
+        """Drop every pending task scheduled for key"""
+        with self._cond:
+            self._heap = [entry for entry in self._heap if entry[2] != key]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def next_due(self):
+        """Block until a task is due and return (key, task), or None once stopped"""
+        with self._cond:
+            while not self.stopped:
+                if self._heap:
+                    timeout = self._heap[0][0] - self.clock()
+                    if timeout <= 0:
+                        _, _, key, task = heapq.heappop(self._heap)
+                        self.last_lag = -timeout
+                        return key, task
+                    self._cond.wait(timeout)
+                else:
+                    self._cond.wait()
+                self.wakeups += 1
+            return None
+
+    def time_until_next(self):
+        with self._cond:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self.clock())
+
+    def stop(self):
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+
+class AdaptiveInterval:
+    """
+    A check interval that tightens after alerts and relaxes after good runs.
+    Each alert multiplies the interval by `tighten`; every `good_run`
+    consecutive good results multiply it by `relax`. The interval always
+    stays within [minimum, maximum], so `maximum` bounds how long a change
+    can go unnoticed.
+    """
+
+    def __init__(self, base, minimum=None, maximum=None, tighten=0.5, relax=1.5, good_run=3):
+        self.base = base
+        self.minimum = base / 4 if minimum is None else minimum
+        self.maximum = base * 2 if maximum is None else maximum
+        self.tighten = tighten
+        self.relax = relax
+        self.good_run = good_run
+        self.current = min(max(base, self.minimum), self.maximum)
+        self._good = 0
+
+    def record(self, alert):
+        """Feed one check result and return the interval until the next check"""
+        if alert:
+            self._good = 0
+            self.current = max(self.minimum, self.current * self.tighten)
+        else:
+            self._good += 1
+            if self._good >= self.good_run:
+                self._good = 0
+                self.current = min(self.maximum, self.current * self.relax)
+        return self.current
@@ -0,0 +1,436 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import parse_qsl
+
+DEFAULT_USER = "default"
+
+# Defaults seeded for every new user of the HTTP APIs
+DEFAULT_USER_DATA = {
+    "settings": {
+        "posture_alerts": True,
+        "eye_strain_alerts": True,
+        "microbreak_interval": 30,  # minutes
+        "focus_session_length": 50,  # minutes
+    },
+    "stats": {
+        "posture_corrections": 0,
+        "breaks_taken": 0,
+        "focus_sessions": 0,
+        "last_break_time": None,
+    }
+}
+
+
+class BlobConflict(RuntimeError):
+    """A blob changed since the version the caller expected to replace"""
+
+
+class MemoryStorage:
+    """
+    Process-local storage backend.
+    State is kept in nested dicts keyed by user and section, guarded by a lock.
+    """
+
+    # Nothing outside this process can write to it
+    shared = False
+
+    def __init__(self):
+        self._data = {}
+        self._activity = {}
+        self._blobs = {}
+        self._journal = {}
+        self._journal_seq = 0
+        self._lock = threading.Lock()
+
+    def ensure_user(self, user_id, defaults):
+        """Seed missing keys for a user without overwriting existing values"""
+        with self._lock:
+            user = self._data.setdefault(user_id, {})
+            for section, values in defaults.items():
+                current = user.setdefault(section, {})
+                for key, value in values.items():
+                    current.setdefault(key, copy.deepcopy(value))
+
+    def get_section(self, user_id, section):
+        with self._lock:
+            return copy.deepcopy(self._data.get(user_id, {}).get(section, {}))
+
+    def apply(self, user_id, section, increments=None, updates=None):
+        """
+        Apply counter increments and value updates to one section atomically.
+        Returns the new values of the incremented counters.
+        """
+        with self._lock:
+            current = self._data.setdefault(user_id, {}).setdefault(section, {})
+            if updates:
+                current.update(copy.deepcopy(updates))
+            result = {}
+            for key, amount in (increments or {}).items():
+                current[key] = (current.get(key) or 0) + amount
+                result[key] = current[key]
+            return result
+
+    def apply_many(self, changes, journal=()):
+        """Apply (user_id, section, increments, updates) tuples and append journal rows atomically"""
+        with self._lock:
+            for user_id, section, increments, updates in changes:
+                current = self._data.setdefault(user_id, {}).setdefault(section, {})
+                if updates:
+                    current.update(copy.deepcopy(updates))
+                for key, amount in (increments or {}).items():
+                    current[key] = (current.get(key) or 0) + amount
+            self._append_journal(journal)
+
+    def update_section(self, user_id, section, values):
+        self.apply(user_id, section, updates=values)
+
+    def increment(self, user_id, section, key, amount=1):
+        return self.apply(user_id, section, increments={key: amount})[key]
+
+    def append_activity(self, samples):
+        """Persist validated IDE activity samples (dicts with a burnout_risk)"""
+        with self._lock:
+            for sample in samples:
+                self._activity.setdefault(sample["user_id"], []).append(dict(sample))
+
+    def get_activity(self, user_id):
+        with self._lock:
+            return [dict(sample) for sample in self._activity.get(user_id, [])]
+
+    def save_blob(self, user_id, name, data, expected_version=None, trim_journal=None):
+        """
+        Store a blob and return its new version. With expected_version set,
+        raise BlobConflict unless the stored version still matches it. With
+        trim_journal set, the user's journal rows up to that sequence number
+        are dropped along with the save.
+        """
+        with self._lock:
+            _, version = self._blobs.get((user_id, name), (None, 0))
+            if expected_version is not None and expected_version != version:
+                raise BlobConflict(f"blob {name!r} of {user_id!r} is at version {version}, not {expected_version}")
+            self._blobs[(user_id, name)] = (bytes(data), version + 1)
+            if trim_journal is not None:
+                self._journal[user_id] = [row for row in self._journal.get(user_id, []) if row[0] > trim_journal]
+            return version + 1
+
+    def load_blob(self, user_id, name):
+        return self.load_blob_version(user_id, name)[0]
+
+    def load_blob_version(self, user_id, name):
+        """Return (data, version), or (None, 0) for a missing blob"""
+        with self._lock:
+            return self._blobs.get((user_id, name), (None, 0))
+
+    def blob_version(self, user_id, name):
+        return self.load_blob_version(user_id, name)[1]
+
+    def _append_journal(self, rows):
+        for user_id, writer, kind, timestamp_us, key, value in rows:
+            self._journal_seq += 1
+            self._journal.setdefault(user_id, []).append(
+                (self._journal_seq, writer, kind, timestamp_us, key, value))
+
+    def append_journal(self, rows):
+        """Append (user_id, writer, kind, timestamp_us, key, value) tracker event rows"""
+        with self._lock:
+            self._append_journal(rows)
+
+    def read_journal(self, user_id, name, after_seq=0, with_blob=False):
+        """
+        Return (data, version, rows): blob name's version, its data when
+        with_blob is set (None otherwise), and the user's journal rows after
+        after_seq as (seq, writer, kind, timestamp_us, key, value), all read
+        at one point in time
+        """
+        with self._lock:
+            data, version = self._blobs.get((user_id, name), (None, 0))
+            rows = [row for row in self._journal.get(user_id, []) if row[0] > after_seq]
+        return (data if with_blob else None), version, rows
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    """
+    SQLite storage backend in WAL mode, shareable by several worker processes.
+    Every value is stored as JSON in one row per (user, section, key); counter
+    increments are done in SQL so concurrent workers never lose updates.
+    synchronous is SQLite's fsync policy: NORMAL syncs the WAL only at
+    checkpoints, FULL on every commit, OFF never.
+    Blobs carry a version so that writers can compare-and-swap them, and
+    tracker events are appended to a journal table, one row each.
+    """
+
+    shared = True
+
+    SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+    CREATE_TABLE = (
+        "CREATE TABLE IF NOT EXISTS user_values ("
+        "user_id TEXT NOT NULL, section TEXT NOT NULL, key TEXT NOT NULL, value TEXT, "
+        "PRIMARY KEY (user_id, section, key)) WITHOUT ROWID"
+    )
+    CREATE_ACTIVITY_TABLE = (
+        "CREATE TABLE IF NOT EXISTS ide_activity ("
+        "user_id TEXT NOT NULL, recorded_at TEXT NOT NULL, hours_active REAL, "
+        "typing_intensity REAL, late_night_coding INTEGER, burnout_risk REAL)"
+    )
+    CREATE_ACTIVITY_INDEX = (
+        "CREATE INDEX IF NOT EXISTS ide_activity_user ON ide_activity (user_id, recorded_at)"
+    )
+    INSERT_ACTIVITY = (
+        "INSERT INTO ide_activity (user_id, recorded_at, hours_active, typing_intensity, "
+        "late_night_coding, burnout_risk) VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    CREATE_BLOB_TABLE = (
+        "CREATE TABLE IF NOT EXISTS user_blobs ("
+        "user_id TEXT NOT NULL, name TEXT NOT NULL, data BLOB, version INTEGER NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (user_id, name)) WITHOUT ROWID"
+    )
+    # Databases created before blobs were versioned lack the column
+    ADD_BLOB_VERSION = "ALTER TABLE user_blobs ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+    UPSERT_BLOB = (
+        "INSERT INTO user_blobs (user_id, name, data, version) VALUES (?, ?, ?, 1) "
+        "ON CONFLICT (user_id, name) DO UPDATE SET data = excluded.data, version = version + 1 "
+        "RETURNING version"
+    )
+    SELECT_BLOB = "SELECT data, version FROM user_blobs WHERE user_id = ? AND name = ?"
+    SELECT_BLOB_VERSION = "SELECT version FROM user_blobs WHERE user_id = ? AND name = ?"
+    # AUTOINCREMENT, so sequence numbers are never reused after a trim
+    CREATE_JOURNAL_TABLE = (
+        "CREATE TABLE IF NOT EXISTS tracker_journal ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, writer TEXT NOT NULL, "
+        "kind INTEGER NOT NULL, timestamp_us INTEGER NOT NULL, key INTEGER NOT NULL, value REAL NOT NULL)"
+    )
+    CREATE_JOURNAL_INDEX = "CREATE INDEX IF NOT EXISTS tracker_journal_user ON tracker_journal (user_id, seq)"
+    INSERT_JOURNAL = (
+        "INSERT INTO tracker_journal (user_id, writer, kind, timestamp_us, key, value) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    SELECT_JOURNAL = (
+        "SELECT seq, writer, kind, timestamp_us, key, value FROM tracker_journal "
+        "WHERE user_id = ? AND seq > ? ORDER BY seq"
+    )
+    TRIM_JOURNAL = "DELETE FROM tracker_journal WHERE user_id = ? AND seq <= ?"
+    SELECT_ACTIVITY = (
+        "SELECT recorded_at, hours_active, typing_intensity, late_night_coding, burnout_risk "
+        "FROM ide_activity WHERE user_id = ? ORDER BY recorded_at"
+    )
+    INSERT_DEFAULT = "INSERT OR IGNORE INTO user_values (user_id, section, key, value) VALUES (?, ?, ?, ?)"
+    SELECT_SECTION = "SELECT key, value FROM user_values WHERE user_id = ? AND section = ?"
+    UPSERT_VALUE = (
+        "INSERT INTO user_values (user_id, section, key, value) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (user_id, section, key) DO UPDATE SET value = excluded.value"
+    )
+    INCREMENT_VALUE = (
+        "INSERT INTO user_values (user_id, section, key, value) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (user_id, section, key) DO UPDATE SET "
+        "value = COALESCE(CAST(value AS INTEGER), 0) + CAST(excluded.value AS INTEGER) "
+        "RETURNING value"
+    )
+
+    def __init__(self, path, timeout=30.0, synchronous="NORMAL"):
+        if synchronous.upper() not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported synchronous mode: {synchronous}")
+        self.path = path
+        self.timeout = timeout
+        self.synchronous = synchronous.upper()
+        self._local = threading.local()
+        # Every thread's connection, so that close() can close them all
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        self._seeded_users = set()
+        with self._connection() as conn:
+            conn.execute(self.CREATE_TABLE)
+            conn.execute(self.CREATE_ACTIVITY_TABLE)
+            conn.execute(self.CREATE_ACTIVITY_INDEX)
+            conn.execute(self.CREATE_BLOB_TABLE)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(user_blobs)")]
+            if "version" not in columns:
+                conn.execute(self.ADD_BLOB_VERSION)
+            conn.execute(self.CREATE_JOURNAL_TABLE)
+            conn.execute(self.CREATE_JOURNAL_INDEX)
+
+    def _connection(self, write=True):
+        # sqlite3 connections must not be shared between threads, so each
+        # thread keeps its own; statements are cached per connection.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return _Transaction(conn, "BEGIN IMMEDIATE" if write else "BEGIN")
+
+    def ensure_user(self, user_id, defaults):
+        # Seeding is idempotent, so each process only needs to do it once per user
+        if user_id in self._seeded_users:
+            return
+        rows = [
+            (user_id, section, key, json.dumps(value))
+            for section, values in defaults.items()
+            for key, value in values.items()
+        ]
+        with self._connection() as conn:
+            conn.executemany(self.INSERT_DEFAULT, rows)
+        self._seeded_users.add(user_id)
+
+    def get_section(self, user_id, section):
+        with self._connection(write=False) as conn:
+            rows = conn.execute(self.SELECT_SECTION, (user_id, section)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def _apply(self, conn, user_id, section, increments, updates):
+        if updates:
+            conn.executemany(self.UPSERT_VALUE, [
+                (user_id, section, key, json.dumps(value)) for key, value in updates.items()
+            ])
+        result = {}
+        for key, amount in (increments or {}).items():
+            row = conn.execute(self.INCREMENT_VALUE, (user_id, section, key, str(amount))).fetchone()
+            result[key] = int(row[0])
+        return result
+
+    def apply(self, user_id, section, increments=None, updates=None):
+        with self._connection() as conn:
+            return self._apply(conn, user_id, section, increments, updates)
+
+    def apply_many(self, changes, journal=()):
+        # One transaction, so one commit (and at most one fsync) for the lot
+        with self._connection() as conn:
+            for user_id, section, increments, updates in changes:
+                self._apply(conn, user_id, section, increments, updates)
+            if journal:
+                conn.executemany(self.INSERT_JOURNAL, journal)
+
+    def update_section(self, user_id, section, values):
+        self.apply(user_id, section, updates=values)
+
+    def increment(self, user_id, section, key, amount=1):
+        return self.apply(user_id, section, increments={key: amount})[key]
+
+    def append_activity(self, samples):
+        # A whole batch goes in with one executemany inside one transaction
+        rows = [
+            (sample["user_id"], sample["recorded_at"], sample["hours_active"],
+             sample["typing_intensity"], int(sample["late_night_coding"]), sample["burnout_risk"])
+            for sample in samples
+        ]
+        with self._connection() as conn:
+            conn.executemany(self.INSERT_ACTIVITY, rows)
+
+    def get_activity(self, user_id):
+        with self._connection(write=False) as conn:
+            rows = conn.execute(self.SELECT_ACTIVITY, (user_id,)).fetchall()
+        return [
+            {"user_id": user_id, "recorded_at": recorded_at, "hours_active": hours,
+             "typing_intensity": intensity, "late_night_coding": bool(late_night),
+             "burnout_risk": risk}
+            for recorded_at, hours, intensity, late_night, risk in rows
+        ]
+
+    def save_blob(self, user_id, name, data, expected_version=None, trim_journal=None):
+        """
+        Store a blob and return its new version. With expected_version set,
+        raise BlobConflict unless the stored version still matches it. With
+        trim_journal set, the user's journal rows up to that sequence number
+        are deleted. The check and the writes share one IMMEDIATE
+        transaction, so they are atomic across processes.
+        """
+        with self._connection() as conn:
+            if expected_version is not None:
+                row = conn.execute(self.SELECT_BLOB_VERSION, (user_id, name)).fetchone()
+                version = row[0] if row else 0
+                if version != expected_version:
+                    raise BlobConflict(
+                        f"blob {name!r} of {user_id!r} is at version {version}, not {expected_version}")
+            version = conn.execute(self.UPSERT_BLOB, (user_id, name, sqlite3.Binary(data))).fetchone()[0]
+            if trim_journal is not None:
+                conn.execute(self.TRIM_JOURNAL, (user_id, trim_journal))
+            return version
+
+    def load_blob(self, user_id, name):
+        return self.load_blob_version(user_id, name)[0]
+
+    def load_blob_version(self, user_id, name):
+        """Return (data, version), or (None, 0) for a missing blob"""
+        with self._connection(write=False) as conn:
+            row = conn.execute(self.SELECT_BLOB, (user_id, name)).fetchone()
+        return (bytes(row[0]), row[1]) if row else (None, 0)
+
+    def blob_version(self, user_id, name):
+        with self._connection(write=False) as conn:
+            row = conn.execute(self.SELECT_BLOB_VERSION, (user_id, name)).fetchone()
+        return row[0] if row else 0
+
+    def append_journal(self, rows):
+        """Append (user_id, writer, kind, timestamp_us, key, value) tracker event rows"""
+        with self._connection() as conn:
+            conn.executemany(self.INSERT_JOURNAL, rows)
+
+    def read_journal(self, user_id, name, after_seq=0, with_blob=False):
+        """
+        Return (data, version, rows): blob name's version, its data when
+        with_blob is set (None otherwise), and the user's journal rows after
+        after_seq as (seq, writer, kind, timestamp_us, key, value). One read
+        transaction, so a concurrent trim is either fully seen or not at all.
+        """
+        with self._connection(write=False) as conn:
+            if with_blob:
+                row = conn.execute(self.SELECT_BLOB, (user_id, name)).fetchone()
+                data, version = (bytes(row[0]), row[1]) if row else (None, 0)
+            else:
+                row = conn.execute(self.SELECT_BLOB_VERSION, (user_id, name)).fetchone()
+                data, version = None, (row[0] if row else 0)
+            rows = conn.execute(self.SELECT_JOURNAL, (user_id, after_seq)).fetchall()
+        return data, version, rows
+
+    def close(self):
+        """Close the connections of all threads; a later call opens a new one"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+        # Threads open a fresh connection on their next call
+        self._local = threading.local()
+
+
+class _Transaction:
+    """Context manager running a block in a single transaction"""
+
+    def __init__(self, conn, begin):
+        self.conn = conn
+        self.begin = begin
+
+    def __enter__(self):
+        self.conn.execute(self.begin)
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def create_storage(url=None):
+    """
+    Build a storage backend from a URL such as "memory" or "sqlite:///wellness.db".
+    SQLite URLs may set the fsync policy, as in "sqlite:///wellness.db?synchronous=FULL".
+    Defaults to the WELLNESS_STORAGE environment variable, then to memory.
+    """
+    url = url or os.environ.get("WELLNESS_STORAGE", "memory")
+    if url == "memory":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        path, _, query = url[len("sqlite:///"):].partition("?")
+        options = dict(parse_qsl(query))
+        if set(options) - {"synchronous"}:
+            raise ValueError(f"Unsupported storage URL options: {query}")
+        return SQLiteStorage(path, **options)
+    raise ValueError(f"Unsupported storage URL: {url}")
@@ -0,0 +1,58 @@
+"""
+Labelled synthetic webcam frames for the OpenCV analysis tests.
+Faces are drawn with the light and dark regions the Haar cascades key on:
+a skin ellipse under dark hair, brows, eyes that are either open (white
+sclera around a dark iris) or squeezed shut to a line, a nose and a mouth.
+"""
+import cv2
+import numpy as np
+
+WIDTH, HEIGHT = 640, 480
+
+
+def draw_face(centre=(320, 210), face_width=190, eyes_open=True, seed=0):
+    """One BGR frame with a face of face_width pixels on a noisy background"""
+    rng = np.random.default_rng(seed)
+    frame = np.repeat(rng.normal(90, 6, (HEIGHT, WIDTH, 1)).clip(0, 255).astype(np.uint8), 3, axis=2)
+    cx, cy = centre
+    fw = face_width
+    fh = int(fw * 1.3)
+    cv2.ellipse(frame, (cx, cy), (fw // 2, fh // 2), 0, 0, 360, (170, 185, 215), -1)
+    cv2.ellipse(frame, (cx, cy - fh // 2 + fh // 10), (fw // 2 + 4, fh // 5), 0, 180, 360, (40, 40, 50), -1)
+    eye_y = cy - fh // 10
+    for dx in (-fw // 4, fw // 4):
+        ex = cx + dx
+        cv2.line(frame, (ex - fw // 9, eye_y - fw // 7), (ex + fw // 9, eye_y - fw // 7), (60, 60, 70),
+                 max(2, fw // 40))
+        if eyes_open:
+            cv2.ellipse(frame, (ex, eye_y), (fw // 9, fw // 18), 0, 0, 360, (245, 245, 245), -1)
+            cv2.circle(frame, (ex, eye_y), fw // 22, (40, 30, 30), -1)
+            cv2.ellipse(frame, (ex, eye_y), (fw // 9, fw // 18), 0, 0, 360, (50, 50, 60), max(1, fw // 80))
+        else:
+            cv2.line(frame, (ex - fw // 9, eye_y), (ex + fw // 9, eye_y), (60, 50, 50), max(1, fw // 60))
+    cv2.line(frame, (cx, eye_y + fw // 12), (cx - fw // 20, cy + fh // 8), (120, 130, 160), 2)
+    cv2.ellipse(frame, (cx, cy + fh // 4), (fw // 6, fw // 20), 0, 0, 180, (80, 80, 150), max(2, fw // 40))
+    return cv2.GaussianBlur(frame, (3, 3), 0)
+
+
+def eye_strain_session(face_width=190):
+    """
+    (frame, squinting) pairs for one sitting: eyes open with a single
+    blink, then eyes squeezed shut for a sustained stretch. The person
+    sways a little between frames.
+    """
+    pattern = [True] * 6 + [False] + [True] * 5 + [False] * 12
+    return [
+        (draw_face((310 + 4 * (index % 5), 205 + 3 * (index % 3)), face_width, eyes_open, seed=index),
+         not eyes_open and index > 6)
+        for index, eyes_open in enumerate(pattern)
+    ]
+
+
+def posture_session(face_width=190):
+    """(frame, bad_posture) pairs: upright, then slouched 90 px lower, then upright again"""
+    heights = [205] * 5 + [295] * 5 + [210] * 3
+    return [
+        (draw_face((320, y), face_width, seed=index), y > 250)
+        for index, y in enumerate(heights)
+    ]
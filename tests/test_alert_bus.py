@@ -0,0 +1,44 @@
+from alert_bus import AlertBus, AlertBuses
+
+
+def total_occurrences(bus):
+    drained = sum(alert["count"] for alert in bus.drain())
+    return drained + sum(bus.drain_undelivered().values())
+
+
+def test_every_occurrence_is_counted_despite_rate_limiting():
+    bus = AlertBus(min_interval=30.0)
+    published = 0
+    seen = 0
+    for round_number in range(5):
+        for _ in range(3):
+            bus.publish("posture", {"round": round_number})
+            published += 1
+        # Rounds after the first fall inside min_interval and are suppressed
+        seen += total_occurrences(bus)
+    assert seen == published
+    assert bus.get_metrics()["suppressed"] == 12
+
+
+def test_dropped_alerts_are_counted_per_type():
+    bus = AlertBus(maxlen=2, min_interval=0.0)
+    bus.publish("posture", {}, source="a")
+    bus.publish("posture", {}, source="a")
+    bus.publish("eye_strain", {}, source="b")
+    bus.publish("posture", {}, source="c")
+    assert bus.get_metrics()["dropped"] == 1
+    assert bus.drain_undelivered() == {"posture": 2}
+    assert bus.drain_undelivered() == {}
+
+
+def test_alert_buses_keep_the_most_recently_used():
+    buses = AlertBuses(max_buses=2)
+    first = buses.get("a")
+    buses.get("b")
+    assert buses.get("a") is first
+    buses.get("c")
+    assert len(buses) == 2
+    assert buses.evicted == 1
+    # "b" was least recently used; "a" is still the same bus
+    assert buses.get("a") is first
+    assert len(buses) == 2 and buses.evicted == 1
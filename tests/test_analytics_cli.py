@@ -0,0 +1,84 @@
+"""
+analytics_cli reports: splitting a user's events across export files must
+not change what is reported for them.
+"""
+import csv
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics_cli import run
+
+FIELDS = ("user_id", "timestamp", "kind", "key", "value")
+DAY_ONE = datetime(2024, 5, 6, 9, 0)
+
+
+def at(day, hour, minute=0):
+    return (DAY_ONE + timedelta(days=day, hours=hour - 9, minutes=minute)).isoformat()
+
+
+# Two days of one user; the interval set on day one applies to day two
+EVENTS = [
+    ("u1", at(0, 9), "setting", "microbreak_interval", 60),
+    ("u1", at(0, 9), "focus", "", ""),
+    ("u1", at(0, 9, 45), "break", "", ""),
+    ("u1", at(0, 10, 30), "break", "", ""),
+    ("u1", at(1, 9), "focus", "", ""),
+    ("u1", at(1, 9, 45), "break", "", ""),
+    ("u1", at(1, 10, 30), "focus", "", ""),
+    ("u1", at(1, 11, 15), "break", "", ""),
+    ("u1", at(1, 11, 20), "setting", "daily_work_limit", 4),
+    ("u1", at(1, 11, 30), "focus", "", ""),
+    ("u1", at(1, 12, 50), "interruption", "", ""),
+    ("u1", at(2, 9), "focus", "", ""),
+    ("u1", at(2, 9, 50), "break", "", ""),
+    ("u1", at(2, 10), "setting", "microbreak_interval", 20),
+    ("u1", at(2, 10, 40), "break", "", ""),
+    ("u1", at(2, 11, 10), "interruption", "", "")
+]
+
+
+def write_exports(directory, parts):
+    paths = []
+    for index, rows in enumerate(parts):
+        path = directory / f"part-{index:02d}.csv"
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(FIELDS)
+            writer.writerows(rows)
+        paths.append(str(path))
+    return paths
+
+
+def user_report(tmp_path, name, parts):
+    directory = tmp_path / name
+    directory.mkdir()
+    report = run(write_exports(directory, parts), jobs=1)
+    assert report["meta"]["rejected"] == 0
+    return report["users"]["u1"]
+
+
+def test_setting_in_an_earlier_file_applies_to_later_files(tmp_path):
+    single = user_report(tmp_path, "single", [EVENTS[:8]])
+    split = user_report(tmp_path, "split", [EVENTS[:4], EVENTS[4:8]])
+    # 45-minute segments comply with the 60-minute interval; one 90-minute one does not
+    expected = {"segments": 4, "compliant": 3, "compliance_rate": 0.75, "overdue_minutes": 30.0}
+    assert single["break_compliance"] == expected
+    assert split["break_compliance"] == expected
+
+
+@pytest.mark.parametrize("cut", range(1, len(EVENTS)))
+def test_split_files_report_like_one_file(tmp_path, cut):
+    single = user_report(tmp_path, "single", [EVENTS])
+    split = user_report(tmp_path, "split", [EVENTS[:cut], EVENTS[cut:]])
+    compliance = split.pop("break_compliance")
+    expected = single.pop("break_compliance")
+    assert compliance["overdue_minutes"] == pytest.approx(expected.pop("overdue_minutes"))
+    assert compliance == dict(expected, overdue_minutes=compliance["overdue_minutes"])
+    assert split == single
+
+
+def test_three_way_split_reports_like_one_file(tmp_path):
+    single = user_report(tmp_path, "single", [EVENTS])
+    split = user_report(tmp_path, "split", [EVENTS[:3], EVENTS[3:12], EVENTS[12:]])
+    assert split == single
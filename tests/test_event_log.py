@@ -0,0 +1,141 @@
+import os
+from datetime import datetime, timedelta
+
+from event_log import HEADER, KIND_NAMES, MAGIC, RECORD, VERSION, EventLog, load_tracker
+from event_store import to_us
+from wellness_tracker import WellnessTracker
+
+
+def test_snapshot_reload_keeps_gap_counts(tmp_path):
+    path = str(tmp_path / "events.log")
+    tracker = load_tracker(path, snapshot_every=4)
+    for _ in range(3):
+        tracker.start_focus_session()
+        tracker.start_focus_session()
+        tracker.take_break()
+    tracker.event_log.close()
+
+    reloaded = load_tracker(path, snapshot_every=4)
+    assert len(reloaded.focus_sessions) == 6
+    assert reloaded.focus_sessions.gaps.count == 5
+    assert reloaded.breaks.gaps.count == 2
+    reloaded.event_log.close()
+
+
+def test_snapshot_index_counts_records_from_other_handles(tmp_path):
+    path = str(tmp_path / "events.log")
+    first = EventLog(path)
+    second = EventLog(path)
+    now_us = to_us(datetime.now())
+    first.append("focus", now_us)
+    second.append("focus", now_us + 1)
+    second.append("break", now_us + 2)
+    tracker = load_tracker(path)
+    first.save_snapshot(tracker)
+    assert first.load_snapshot()["records"] == 3
+    for log in (first, second, tracker.event_log):
+        log.close()
+
+
+def test_reload_on_a_later_day_starts_a_new_session(tmp_path):
+    path = str(tmp_path / "events.log")
+    log = EventLog(path)
+    days_ago = datetime.now() - timedelta(days=3)
+    log.append("session_start", to_us(days_ago))
+    log.append("focus", to_us(days_ago + timedelta(hours=1)))
+    log.close()
+
+    tracker = load_tracker(path)
+    assert tracker.session_start.date() == datetime.now().date()
+    assert tracker.calculate_burnout_risk()["burnout_risk"] < 100
+    tracker.event_log.close()
+
+    # The new session_start was logged, so it survives another reload
+    again = load_tracker(path)
+    assert again.session_start.date() == datetime.now().date()
+    assert len(again.event_log.records()) == 3
+    again.event_log.close()
+
+
+def test_torn_record_is_truncated_on_open(tmp_path):
+    path = str(tmp_path / "events.log")
+    tracker = load_tracker(path)
+    tracker.take_break()
+    tracker.event_log.close()
+    # A crash halfway through writing the next record
+    with open(path, "ab") as handle:
+        handle.write(b"\x01\x02\x03\x04\x05")
+    tracker = load_tracker(path)
+    tracker.take_break()
+    tracker.take_break()
+    tracker.event_log.close()
+    assert (os.path.getsize(path) - HEADER.size) % RECORD.size == 0
+    reloaded = load_tracker(path)
+    assert len(reloaded.breaks) == 3
+    kinds = set(reloaded.event_log.records()["kind"].tolist())
+    assert kinds <= set(KIND_NAMES)
+    reloaded.event_log.close()
+
+
+def test_torn_header_starts_an_empty_log(tmp_path):
+    path = str(tmp_path / "events.log")
+    with open(path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION)[:5])
+    tracker = load_tracker(path)
+    tracker.take_break()
+    tracker.event_log.close()
+    assert len(load_tracker(path).breaks) == 1
+
+
+def focus_week():
+    """Session starts over a week ago, with an overnight gap and a bucket-straddling session"""
+    monday = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=10)
+    monday -= timedelta(days=monday.weekday())
+    return monday, [
+        monday + timedelta(hours=17),
+        # Overnight until Thursday: only one session length is focus time
+        monday + timedelta(days=3, hours=9),
+        monday + timedelta(days=3, hours=9, minutes=20),
+        # Capped, and straddles midnight: 20 minutes before and 30 after
+        monday + timedelta(days=3, hours=23, minutes=40),
+        monday + timedelta(days=4, hours=2)
+    ]
+
+
+def focus_minutes(tracker, resolution, start, end):
+    return [(bucket, round(seconds / 60, 6))
+            for bucket, seconds in tracker.get_trend("focus_seconds", resolution, start, end)
+            if seconds]
+
+
+def test_focus_time_is_capped_and_split_across_buckets():
+    monday, starts = focus_week()
+    tracker = WellnessTracker()
+    for start in starts:
+        tracker._record_focus_session(to_us(start))
+    days = focus_minutes(tracker, "day", monday, monday + timedelta(days=7))
+    assert days == [(monday, 50), (monday + timedelta(days=3), 20 + 50 + 20), (monday + timedelta(days=4), 30)]
+    hours = focus_minutes(tracker, "hour", monday + timedelta(days=3), monday + timedelta(days=5))
+    assert hours == [(monday + timedelta(days=3, hours=9), 20 + 40), (monday + timedelta(days=3, hours=10), 10),
+                     (monday + timedelta(days=3, hours=23), 20), (monday + timedelta(days=4), 30)]
+
+
+def test_bulk_replay_caps_focus_time_like_live_events(tmp_path):
+    monday, starts = focus_week()
+    log = EventLog(str(tmp_path / "events.log"))
+    live = WellnessTracker()
+    for index, start in enumerate(starts):
+        if index == 3:
+            # A shorter session length applies to the gaps closed after it
+            log.append("setting", to_us(start) - 1, "focus_session_length", 25)
+            live.settings["focus_session_length"] = 25
+        log.append("focus", to_us(start))
+        live._record_focus_session(to_us(start))
+    log.close()
+    replayed = load_tracker(str(tmp_path / "events.log"))
+    for resolution in ("minute", "hour", "day"):
+        expected = focus_minutes(live, resolution, monday, monday + timedelta(days=7))
+        assert focus_minutes(replayed, resolution, monday, monday + timedelta(days=7)) == expected
+    assert focus_minutes(replayed, "day", monday + timedelta(days=3), monday + timedelta(days=5)) == [
+        (monday + timedelta(days=3), 20 + 25 + 20), (monday + timedelta(days=4), 5)]
+    replayed.event_log.close()
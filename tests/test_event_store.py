@@ -0,0 +1,134 @@
+"""
+Property-style checks that the running gap statistics kept by EventStore
+match the full pairwise scan WellnessTracker used to do.
+"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from event_store import EventStore, RunningStats, from_us
+from wellness_tracker import WellnessTracker
+
+SEEDS = range(25)
+
+
+def random_timestamps(rng, count):
+    """Sorted microsecond timestamps mixing dense runs with gaps of hours"""
+    timestamps = []
+    current = rng.randint(1_600_000_000, 1_800_000_000) * 1_000_000
+    for _ in range(count):
+        current += rng.choice([
+            rng.randint(0, 2_000_000),
+            rng.randint(0, 600_000_000),
+            rng.randint(0, 6 * 3600 * 1_000_000)
+        ])
+        timestamps.append(current)
+    return timestamps
+
+
+def baseline_gaps(timestamps):
+    """Seconds between consecutive events, scanned pairwise as the old lists were"""
+    datetimes = [from_us(us) for us in timestamps]
+    return [(datetimes[i] - datetimes[i - 1]).total_seconds() for i in range(1, len(datetimes))]
+
+
+def assert_matches(stats, gaps):
+    assert stats.count == len(gaps)
+    if not gaps:
+        return
+    mean = sum(gaps) / len(gaps)
+    variance = sum((gap - mean) ** 2 for gap in gaps) / (len(gaps) - 1) if len(gaps) > 1 else 0.0
+    assert stats.mean == pytest.approx(mean, rel=1e-9)
+    assert stats.minimum == min(gaps)
+    assert stats.maximum == max(gaps)
+    assert stats.variance == pytest.approx(variance, rel=1e-7, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_append_matches_pairwise_scan(seed):
+    rng = random.Random(seed)
+    timestamps = random_timestamps(rng, rng.randint(0, 300))
+    # Small chunks so the sequence crosses many chunk boundaries
+    store = EventStore(chunk_size=rng.choice([1, 2, 7, 64]))
+    for us in timestamps:
+        store.append_us(us)
+    assert list(store.iter_us()) == timestamps
+    assert_matches(store.gaps, baseline_gaps(timestamps))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_mixed_append_and_extend_matches_pairwise_scan(seed):
+    rng = random.Random(seed)
+    timestamps = random_timestamps(rng, rng.randint(1, 500))
+    store = EventStore(chunk_size=rng.choice([3, 16, 4096]))
+    position = 0
+    while position < len(timestamps):
+        step = rng.randint(1, 50)
+        part = timestamps[position:position + step]
+        if rng.random() < 0.5:
+            store.extend_us(np.array(part, dtype=np.int64))
+        else:
+            for us in part:
+                store.append_us(us)
+        position += step
+    assert store.as_numpy().tolist() == timestamps
+    assert_matches(store.gaps, baseline_gaps(timestamps))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_add_many_and_merge_match_pairwise_scan(seed):
+    rng = random.Random(seed)
+    gaps = baseline_gaps(random_timestamps(rng, rng.randint(2, 400)))
+    cut = rng.randint(0, len(gaps))
+
+    batched = RunningStats()
+    batched.add_many(np.array(gaps[:cut]))
+    batched.add_many(np.array(gaps[cut:]))
+    assert_matches(batched, gaps)
+
+    first, second = RunningStats(), RunningStats()
+    for gap in gaps[:cut]:
+        first.add(gap)
+    second.add_many(np.array(gaps[cut:]))
+    first.merge(second)
+    assert_matches(first, gaps)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_average_focus_duration_matches_baseline(seed):
+    rng = random.Random(seed)
+    timestamps = random_timestamps(rng, rng.randint(2, 200))
+    tracker = WellnessTracker()
+    for us in timestamps:
+        tracker.focus_sessions.append(from_us(us))
+    gaps = baseline_gaps(timestamps)
+    assert tracker._average_focus_duration() == pytest.approx(sum(gaps) / len(gaps) / 60, rel=1e-9)
+
+
+def test_bytes_round_trip_keeps_values():
+    rng = random.Random(0)
+    timestamps = random_timestamps(rng, 5000)
+    store = EventStore(chunk_size=128)
+    store.extend_us(np.array(timestamps, dtype=np.int64))
+    restored = EventStore(chunk_size=128)
+    restored.load_bytes(store.to_bytes())
+    assert list(restored.iter_us()) == timestamps
+    assert restored.timestamp_us(-1) == timestamps[-1]
+    assert math.isclose(store.gaps.mean, sum(baseline_gaps(timestamps)) / 4999)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_out_of_order_bulk_load_keeps_values(seed):
+    rng = random.Random(seed)
+    timestamps = random_timestamps(rng, 2000)
+    # Clock adjustments can record an event before the previous one
+    for _ in range(20):
+        index = rng.randrange(1, len(timestamps))
+        timestamps[index] -= rng.randint(0, 3 * 3600 * 1_000_000)
+    store = EventStore(chunk_size=256)
+    store.load_bytes(np.array(timestamps, dtype=np.int64).tobytes())
+    assert list(store.iter_us()) == timestamps
+    assert store.as_numpy().tolist() == timestamps
+    assert [store.timestamp_us(index) for index in range(0, 2000, 97)] == timestamps[::97]
@@ -0,0 +1,96 @@
+"""
+PostureDetector frame sources: real-time sources are captured continuously
+and checks see the newest frame; other sources are read when a check is due.
+PostureDetectorPool drops streams whose owner has gone away.
+"""
+import time
+
+import pytest
+
+from frame_pipeline import FrameSource, SyntheticFrameSource
+from posture_detection import PostureDetector
+
+np = pytest.importorskip("numpy")
+
+
+class CountingSource(FrameSource):
+    """Real-time source whose frames are filled with a running frame number"""
+
+    real_time = True
+    width = 8
+    height = 8
+
+    def __init__(self, fps=200):
+        self.fps = fps
+        self.count = 0
+
+    def read_into(self, buffer):
+        self.count += 1
+        buffer[...] = self.count % 256
+        return True
+
+
+class RecordingAnalyzer:
+    def __init__(self):
+        self.frames = []
+
+    def analyze_posture(self, frame):
+        self.frames.append(int(frame[0, 0, 0]))
+        return {"alert": False}
+
+    def analyze_eye_strain(self, frame):
+        return {"alert": False}
+
+
+def run_detector(source, seconds=0.5):
+    analyzer = RecordingAnalyzer()
+    detector = PostureDetector(frame_source=source, analyzer=analyzer, adaptive=False)
+    detector.posture_check_interval = 0.1
+    detector.eye_strain_check_interval = 60
+    detector.start()
+    try:
+        time.sleep(seconds)
+        return detector, analyzer.frames, detector.get_pipeline_stats()
+    finally:
+        detector.stop()
+
+
+def test_real_time_checks_see_the_newest_frame():
+    source = CountingSource()
+    detector, frames, stats = run_detector(source)
+    assert len(frames) >= 2
+    # Frames captured between checks are dropped, not analysed in turn
+    assert all(later - earlier > 1 for earlier, later in zip(frames, frames[1:]))
+    assert stats["captured"] > stats["processed"] >= len(frames)
+    assert stats["dropped"] > 0
+    assert not detector.is_running
+
+
+def test_paced_source_is_read_on_demand():
+    source = SyntheticFrameSource(width=8, height=8)
+    detector, frames, stats = run_detector(source)
+    assert stats is None
+    assert len(frames) == detector.frames_read
+
+
+def test_pool_drops_streams_whose_owner_is_gone():
+    from posture_detection import PostureDetectorPool
+    pool = PostureDetectorPool(max_workers=1)
+    pool.start()
+    alive = [True]
+    source = CountingSource()
+    try:
+        pool.add_stream("gone", source, posture_check_interval=0.02, eye_strain_check_interval=60,
+                        keep_alive=lambda: alive[0])
+        pool.add_stream("kept", CountingSource(), posture_check_interval=60, eye_strain_check_interval=60)
+        alive[0] = False
+        deadline = time.monotonic() + 5
+        while pool.has_stream("gone") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not pool.has_stream("gone")
+        assert pool.get_stats()["expired_streams"] == 1
+        assert pool.has_stream("kept")
+        # Dropped before its first check, so the source was never read
+        assert source.count == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,39 @@
+"""
+PushHub: a new subscriber gets the current state without replaying it to
+the user's existing subscribers.
+"""
+import asyncio
+
+from push import PushHub
+from storage import MemoryStorage
+from tracker_registry import TrackerRegistry
+
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def event_names(messages):
+    return [message.split(b"\n", 1)[0] for message in messages]
+
+
+def test_new_subscriber_gets_state_without_duplicating_it():
+    async def scenario():
+        hub = PushHub(TrackerRegistry(MemoryStorage()))
+        try:
+            first = await hub.subscribe("user")
+            assert event_names(drain(first)) == [b"event: break", b"event: burnout"]
+            second = await hub.subscribe("user")
+            assert event_names(drain(second)) == [b"event: break", b"event: burnout"]
+            assert drain(first) == []
+            # Nothing changed, so a refresh pushes nothing to either
+            await hub.refresh("user")
+            assert drain(first) == [] and drain(second) == []
+            assert hub.pushed == 4
+        finally:
+            await hub.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+import app
+import asgi_app
+
+INVALID = [{"microbreak_interval": "45"}, {"daily_work_limit": 0}, {"burnout_threshold": -5},
+           {"focus_session_length": True}]
+
+
+@pytest.mark.parametrize("settings", INVALID)
+def test_flask_rejects_invalid_tracker_settings(settings):
+    client = app.app.test_client()
+    headers = {"X-User-Id": "settings-test"}
+    response = client.post("/api/settings", json=settings, headers=headers)
+    assert response.status_code == 400
+    assert client.get("/api/wellness", headers=headers).status_code == 200
+
+
+def test_flask_accepts_valid_tracker_settings():
+    client = app.app.test_client()
+    headers = {"X-User-Id": "settings-valid"}
+    response = client.post("/api/settings", json={"microbreak_interval": 45, "theme": "dark"}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/api/settings", headers=headers).json["microbreak_interval"] == 45
+
+
+def call(application, method, path, body=None, user_id="settings-test"):
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"",
+             "headers": [(b"x-user-id", user_id.encode()), (b"content-type", b"application/json")]}
+    asyncio.run(application(scope, receive, send))
+    return sent[0]["status"]
+
+
+@pytest.mark.parametrize("settings", INVALID)
+def test_asgi_rejects_invalid_tracker_settings(settings):
+    application = asgi_app.WellnessASGIApp()
+    assert call(application, "POST", "/api/settings", settings) == 400
+    assert call(application, "GET", "/api/wellness") == 200
+
+
+def test_asgi_per_user_state_is_bounded(monkeypatch):
+    monkeypatch.setattr(asgi_app, "MAX_SEEN_USERS", 3)
+    application = asgi_app.WellnessASGIApp()
+    application.alert_buses.max_buses = 3
+    for index in range(10):
+        user_id = f"bounded-{index}"
+        assert call(application, "POST", "/api/posture-alert", {"bad_posture": True}, user_id) == 200
+        assert call(application, "POST", "/api/break-taken", None, user_id) == 200
+    assert len(application._user_locks) == 0
+    assert len(application.alert_buses) == 3
+    assert len(application._seen_users) == 3
@@ -0,0 +1,96 @@
+"""
+SQLiteStorage connection handling and write-behind flush failures.
+"""
+import logging
+import sqlite3
+import threading
+
+import pytest
+
+from storage import MemoryStorage, SQLiteStorage
+from write_behind import WriteBehindStorage
+
+
+def test_close_closes_every_thread_connection(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "threads.db"))
+    storage.ensure_user("user", {"stats": {"breaks_taken": 0}})
+    opened = []
+
+    def worker():
+        storage.increment("user", "stats", "breaks_taken")
+        opened.append(storage._local.conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    storage.close()
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    # The storage stays usable and sees every committed increment
+    assert storage.get_section("user", "stats")["breaks_taken"] == 3
+    storage.close()
+
+
+class FailingBackend:
+    def __init__(self):
+        self.failed = threading.Event()
+
+    def apply_many(self, changes, journal=()):
+        self.failed.set()
+        raise sqlite3.OperationalError("database is locked")
+
+    def get_section(self, user_id, section):
+        return {}
+
+    def close(self):
+        pass
+
+
+def test_flush_thread_logs_failures(caplog):
+    backend = FailingBackend()
+    storage = WriteBehindStorage(backend, flush_interval=0.01)
+    with caplog.at_level(logging.ERROR, logger="write_behind"):
+        storage.apply("user", "stats", increments={"breaks_taken": 1})
+        assert backend.failed.wait(5)
+        storage._stop_event.set()
+        storage._thread.join(5)
+    record = next(record for record in caplog.records if record.name == "write_behind")
+    assert record.exc_info[0] is sqlite3.OperationalError
+    # Nothing was lost: the change is still buffered
+    assert storage.get_stats()["pending_mutations"] == 1
+
+
+class FlakyBackend(MemoryStorage):
+    """MemoryStorage whose first few batch writes fail"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def apply_many(self, changes, journal=()):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().apply_many(changes, journal)
+
+
+def test_failed_size_flush_does_not_fail_the_request(caplog):
+    backend = FlakyBackend(failures=2)
+    backend.ensure_user("user", {"stats": {"breaks_taken": 0}})
+    storage = WriteBehindStorage(backend, flush_interval=0, max_pending=1)
+    with caplog.at_level(logging.ERROR, logger="write_behind"):
+        for _ in range(3):
+            # A client retries a request until it succeeds
+            try:
+                storage.increment("user", "stats", "breaks_taken")
+                break
+            except sqlite3.OperationalError:
+                continue
+        storage.append_journal([("user", "writer", 0, 0, 0, 0.0)])
+    assert len([record for record in caplog.records if record.name == "write_behind"]) == 2
+    storage.close()
+    assert backend.get_section("user", "stats")["breaks_taken"] == 1
+    assert len(backend.read_journal("user", "tracker")[2]) == 1
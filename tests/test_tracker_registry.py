@@ -0,0 +1,213 @@
+"""
+TrackerRegistry: storage I/O outside the registry lock, the shared tracker
+journal and blob compare-and-swap between processes sharing one database.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from storage import BlobConflict, MemoryStorage, SQLiteStorage
+from tracker_registry import BLOB_NAME, TrackerConflict, TrackerRegistry
+from write_behind import WriteBehindStorage
+
+
+class BlockingStorage(MemoryStorage):
+    """MemoryStorage whose blob loads for one user wait until released"""
+
+    def __init__(self, slow_user):
+        super().__init__()
+        self.slow_user = slow_user
+        self.loading = threading.Event()
+        self.release = threading.Event()
+
+    def load_blob_version(self, user_id, name):
+        if user_id == self.slow_user:
+            self.loading.set()
+            assert self.release.wait(5)
+        return super().load_blob_version(user_id, name)
+
+
+def test_slow_load_does_not_block_other_users():
+    storage = BlockingStorage("slow")
+    registry = TrackerRegistry(storage)
+    results = []
+
+    def use_slow():
+        results.append(registry.call("slow", "start_focus_session"))
+
+    slow = threading.Thread(target=use_slow)
+    slow.start()
+    assert storage.loading.wait(5)
+    # Another user is served, and flushed, while the slow load is in flight
+    registry.call("fast", "start_focus_session")
+    registry.flush()
+    assert storage.blob_version("fast", BLOB_NAME) == 1
+    storage.release.set()
+    slow.join(5)
+    assert len(registry.get("slow").focus_sessions) == 1
+
+
+def test_concurrent_first_access_loads_once():
+    storage = BlockingStorage("user")
+    registry = TrackerRegistry(storage)
+    threads = [threading.Thread(target=registry.call, args=("user", "start_focus_session")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert storage.loading.wait(5)
+    storage.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert registry.misses == 1
+    assert len(registry.get("user").focus_sessions) == 4
+
+
+def test_evicted_tracker_survives_round_trip():
+    storage = MemoryStorage()
+    registry = TrackerRegistry(storage, max_bytes=0)
+    for _ in range(3):
+        registry.call("user", "take_break")
+    assert registry.get_stats()["resident_trackers"] == 0
+    assert registry.evictions == 3
+    assert len(registry.get("user").breaks) == 3
+
+
+def test_memory_blob_compare_and_swap():
+    storage = MemoryStorage()
+    assert storage.save_blob("user", "blob", b"a", expected_version=0) == 1
+    with pytest.raises(BlobConflict):
+        storage.save_blob("user", "blob", b"b", expected_version=0)
+    assert storage.save_blob("user", "blob", b"c") == 2
+    assert storage.load_blob_version("user", "blob") == (b"c", 2)
+
+
+def test_sqlite_blob_compare_and_swap(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "blobs.db"))
+    assert storage.load_blob_version("user", "blob") == (None, 0)
+    assert storage.save_blob("user", "blob", b"a", expected_version=0) == 1
+    with pytest.raises(BlobConflict):
+        storage.save_blob("user", "blob", b"b", expected_version=0)
+    assert storage.load_blob("user", "blob") == b"a"
+    assert storage.save_blob("user", "blob", b"c", expected_version=1) == 2
+    assert storage.blob_version("user", "blob") == 2
+    storage.close()
+
+
+def test_sqlite_adds_version_to_old_blob_table(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE user_blobs (user_id TEXT NOT NULL, name TEXT NOT NULL, data BLOB, "
+                 "PRIMARY KEY (user_id, name)) WITHOUT ROWID")
+    conn.execute("INSERT INTO user_blobs VALUES ('user', 'blob', x'01')")
+    conn.commit()
+    conn.close()
+    storage = SQLiteStorage(path)
+    assert storage.load_blob_version("user", "blob") == (b"\x01", 0)
+    assert storage.save_blob("user", "blob", b"\x02", expected_version=0) == 1
+    storage.close()
+
+
+class CountingSQLiteStorage(SQLiteStorage):
+    """SQLiteStorage that counts whole-tracker blob saves"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.blob_saves = 0
+
+    def save_blob(self, *args, **kwargs):
+        self.blob_saves += 1
+        return super().save_blob(*args, **kwargs)
+
+
+def journal_rows(storage, user_id="user"):
+    return storage.read_journal(user_id, BLOB_NAME)[2]
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_registries_sharing_sqlite_keep_every_event(tmp_path, write_behind):
+    # Two registries on separate connections stand in for two worker processes
+    path = str(tmp_path / "shared.db")
+    backends = [SQLiteStorage(path), SQLiteStorage(path)]
+    storages = [WriteBehindStorage(backend, flush_interval=0, max_pending=7) if write_behind else backend
+                for backend in backends]
+    registries = [TrackerRegistry(storage, compact_every=20) for storage in storages]
+    assert all(registry.shared for registry in registries)
+
+    def worker(registry):
+        for _ in range(25):
+            registry.call("user", "start_focus_session")
+            registry.call("user", "take_break")
+
+    threads = [threading.Thread(target=worker, args=(registry,)) for registry in registries]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    if write_behind:
+        for storage in storages:
+            storage.flush()
+    for registry in registries:
+        tracker = registry.get("user")
+        assert len(tracker.focus_sessions) == 50
+        assert len(tracker.breaks) == 50
+    for registry in registries:
+        registry.flush()
+    fresh = TrackerRegistry(backends[0]).get("user")
+    assert (len(fresh.focus_sessions), len(fresh.breaks)) == (50, 50)
+    for storage in storages:
+        storage.close()
+
+
+def test_shared_requests_append_rows_instead_of_saving(tmp_path):
+    storage = CountingSQLiteStorage(str(tmp_path / "shared.db"))
+    registry = TrackerRegistry(storage, compact_every=1000)
+    for _ in range(20):
+        registry.call("user", "start_focus_session")
+    registry.call("user", "update_settings", {"microbreak_interval": 45})
+    assert storage.blob_saves == 0
+    assert len(journal_rows(storage)) == 21
+    # A process starting now replays the journal
+    tracker = TrackerRegistry(storage).get("user")
+    assert len(tracker.focus_sessions) == 20
+    assert tracker.settings["microbreak_interval"] == 45
+    storage.close()
+
+
+def test_compaction_trims_journal(tmp_path):
+    storage = CountingSQLiteStorage(str(tmp_path / "shared.db"))
+    registry = TrackerRegistry(storage, compact_every=10)
+    for _ in range(25):
+        registry.call("user", "take_break")
+    assert storage.blob_saves == 2
+    assert len(journal_rows(storage)) == 5
+    registry.flush()
+    assert journal_rows(storage) == []
+    assert len(TrackerRegistry(storage).get("user").breaks) == 25
+    storage.close()
+
+
+def test_compaction_by_another_process_is_picked_up(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = SQLiteStorage(path), SQLiteStorage(path)
+    registry, other = TrackerRegistry(first), TrackerRegistry(second)
+    for _ in range(3):
+        registry.call("user", "take_break")
+    other.call("user", "take_break")
+    # Saving the blob trims rows the first registry has already applied
+    other.flush()
+    assert journal_rows(first) == []
+    registry.call("user", "take_break")
+    assert len(registry.get("user").breaks) == 5
+    assert len(other.get("user").breaks) == 5
+    first.close()
+    second.close()
+
+
+def test_unshared_second_writer_is_detected():
+    storage = MemoryStorage()
+    first, second = TrackerRegistry(storage), TrackerRegistry(storage)
+    first.call("user", "take_break")
+    second.call("user", "take_break")
+    first.flush()
+    with pytest.raises(TrackerConflict):
+        second.flush()
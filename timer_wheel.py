@@ -0,0 +1,65 @@
+import math
+import time
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel of keyed timers.
+    Time is cut into ticks of `tick` seconds and each timer lives in the slot
+    of the tick it is due on, so scheduling, rescheduling and cancelling are
+    O(1) however many timers exist. advance() visits only the slots of the
+    ticks that have elapsed and returns the timers found due there; a timer
+    never fires early, and fires at most one tick late. Each key has at most
+    one pending timer, and scheduling a key again replaces its timer.
+    Not thread-safe; drive it from one thread or event loop.
+    """
+
+    def __init__(self, tick=1.0, slots=512, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self._slots = [{} for _ in range(slots)]
+        # key -> due tick, for O(1) cancel
+        self._due = {}
+        self._current = self._tick_of(clock())
+        self.fired = 0
+
+    def _tick_of(self, when):
+        return math.floor(when / self.tick)
+
+    def schedule(self, delay, key, task):
+        """Make task (any object) due for key after delay seconds"""
+        self.cancel(key)
+        due = max(self._current + 1, math.ceil((self.clock() + delay) / self.tick))
+        self._slots[due % len(self._slots)][key] = (due, task)
+        self._due[key] = due
+        return due * self.tick
+
+    def cancel(self, key):
+        due = self._due.pop(key, None)
+        if due is not None:
+            del self._slots[due % len(self._slots)][key]
+
+    def advance(self, now=None):
+        """Return [(key, task), ...] for every timer due by now, removing them"""
+        target = self._tick_of(self.clock() if now is None else now)
+        fired = []
+        # After a full turn every slot has been visited once
+        for tick in range(self._current + 1, min(target, self._current + len(self._slots)) + 1):
+            slot = self._slots[tick % len(self._slots)]
+            for key in [key for key, (due, _) in slot.items() if due <= target]:
+                _, task = slot.pop(key)
+                del self._due[key]
+                fired.append((key, task))
+        self._current = max(self._current, target)
+        self.fired += len(fired)
+        return fired
+
+    def time_until_tick(self):
+        """Seconds until the next tick boundary, when advance() may find work"""
+        return max(0.0, (self._current + 1) * self.tick - self.clock())
+
+    def __contains__(self, key):
+        return key in self._due
+
+    def __len__(self):
+        return len(self._due)
@@ -0,0 +1,338 @@
+import json
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from event_log import KINDS, apply_record
+from storage import BlobConflict
+from wellness_tracker import SETTING_KEYS, WellnessTracker
+
+BLOB_NAME = "tracker"
+_LENGTH = struct.Struct("<I")
+
+
+def serialize_tracker(tracker):
+    """Pack a tracker's aggregates and raw timestamps into compressed bytes"""
+    focus = tracker.focus_sessions.to_bytes()
+    breaks = tracker.breaks.to_bytes()
+    header = json.dumps({
+        "state": tracker.to_snapshot(),
+        "focus_bytes": len(focus),
+        "break_bytes": len(breaks)
+    }).encode("utf-8")
+    return zlib.compress(_LENGTH.pack(len(header)) + header + focus + breaks, 1)
+
+
+def deserialize_tracker(data):
+    raw = zlib.decompress(data)
+    (header_length,) = _LENGTH.unpack_from(raw)
+    offset = _LENGTH.size + header_length
+    header = json.loads(raw[_LENGTH.size:offset])
+    tracker = WellnessTracker()
+    tracker.restore_snapshot(header["state"])
+    focus_end = offset + header["focus_bytes"]
+    tracker.focus_sessions.load_bytes(raw[offset:focus_end])
+    tracker.breaks.load_bytes(raw[focus_end:focus_end + header["break_bytes"]])
+    return tracker
+
+
+class TrackerConflict(RuntimeError):
+    """Another process saved a tracker after this one loaded it"""
+
+
+class _Journal:
+    """
+    Takes the place of a tracker's EventLog when storage is shared: every
+    event becomes one journal row, buffered like any other write
+    """
+
+    __slots__ = ("registry", "user_id", "entry")
+
+    def __init__(self, registry, user_id, entry):
+        self.registry = registry
+        self.user_id = user_id
+        self.entry = entry
+
+    def append_event(self, tracker, kind, timestamp_us, key=0, value=0.0):
+        if isinstance(key, str):
+            key = SETTING_KEYS.index(key)
+        self.registry.storage.append_journal(
+            [(self.user_id, self.registry.writer, KINDS[kind], timestamp_us, key, float(value))])
+        self.entry.unsaved += 1
+
+
+class _Entry:
+    __slots__ = ("tracker", "size", "last_access", "saved_version", "blob_version", "seq", "unsaved",
+                 "pins", "lock", "ready", "error")
+
+    def __init__(self):
+        self.tracker = None
+        self.size = 0
+        self.last_access = time.monotonic()
+        self.saved_version = None
+        self.blob_version = 0
+        # Last journal row applied, and events recorded since the blob was saved
+        self.seq = 0
+        self.unsaved = 0
+        self.pins = 0
+        self.lock = threading.RLock()
+        # Set once the first user has loaded the tracker; error holds its failure
+        self.ready = threading.Event()
+        self.error = None
+
+    def dirty(self):
+        return self.tracker.version != self.saved_version
+
+
+class TrackerRegistry:
+    """
+    Per-user WellnessTracker registry with bounded memory.
+    Hot trackers stay in memory in LRU order. When their estimated total
+    size exceeds max_bytes, or one has been idle longer than ttl seconds, the
+    least recently used tracker is written to the storage backend and
+    dropped; it is rehydrated transparently on its next access. Trackers in
+    use through use() are pinned and never evicted mid-request.
+    Storage is only read and written under the tracker's own lock, never the
+    registry-wide one, so one slow load or save does not stall other users.
+    Saves compare-and-swap the stored blob's version.
+    When the storage is shared with other processes (SQLite), each tracker
+    event is also appended to a journal, buffered by WriteBehindStorage, so
+    a request costs one small row rather than a save of the whole history.
+    use() first applies rows other processes have committed since. The blob
+    is saved, and the journal trimmed up to it, on eviction, on flush() and
+    every compact_every events. A tracker whose blob another process
+    replaced is reloaded from it. With a process-local backend, saves happen
+    on eviction and flush() only, and a conflict there means a second
+    process is using the same storage.
+    """
+
+    def __init__(self, storage, max_bytes=64 * 1024 * 1024, ttl=None, shared=None, compact_every=1000):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.shared = getattr(storage, "shared", False) if shared is None else shared
+        self.compact_every = compact_every
+        # Tags this registry's journal rows, which it has already applied
+        self.writer = uuid.uuid4().hex
+        self._entries = OrderedDict()
+        # Evicted entries whose save is still in progress, by user
+        self._spilling = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conflicts = 0
+        self.compactions = 0
+
+    def _flush_storage(self):
+        flush = getattr(self.storage, "flush", None)
+        if flush is not None:
+            flush()
+
+    def _load(self, user_id, entry):
+        if self.shared:
+            # This process's buffered rows must be committed to be read back
+            self._flush_storage()
+            data, entry.blob_version, rows = self.storage.read_journal(user_id, BLOB_NAME, with_blob=True)
+        else:
+            (data, entry.blob_version), rows = self.storage.load_blob_version(user_id, BLOB_NAME), []
+        tracker = WellnessTracker() if data is None else deserialize_tracker(data)
+        entry.seq = 0
+        entry.unsaved = self._replay(entry, tracker, rows, own=True)
+        tracker.invalidate()
+        entry.saved_version = tracker.version if data is not None and not rows else None
+        entry.tracker = tracker
+        if self.shared:
+            tracker.event_log = _Journal(self, user_id, entry)
+        tracker.roll_session()
+
+    def _replay(self, entry, tracker, rows, own=False):
+        # Rows this registry wrote are already in its trackers unless own is set
+        applied = 0
+        for seq, writer, kind, timestamp_us, key, value in rows:
+            entry.seq = seq
+            if own or writer != self.writer:
+                apply_record(tracker, timestamp_us, kind, key, value)
+                applied += 1
+        return applied
+
+    def _refresh(self, user_id, entry):
+        # Caller holds entry.lock; picks up events other processes committed
+        _, version, rows = self.storage.read_journal(user_id, BLOB_NAME, after_seq=entry.seq)
+        if version != entry.blob_version:
+            # Another process saved the blob and may have trimmed rows not yet seen here
+            self._load(user_id, entry)
+            return
+        applied = self._replay(entry, entry.tracker, rows)
+        if applied:
+            entry.tracker.invalidate()
+            entry.unsaved += applied
+
+    def _save(self, user_id, entry):
+        # Caller holds entry.lock
+        trim = None
+        if self.shared:
+            # Bring every row of this process into storage and into entry.seq,
+            # so that the blob holds exactly the rows it trims
+            self._flush_storage()
+            self._refresh(user_id, entry)
+            trim = entry.seq
+        version = entry.tracker.version
+        try:
+            entry.blob_version = self.storage.save_blob(
+                user_id, BLOB_NAME, serialize_tracker(entry.tracker),
+                expected_version=entry.blob_version, trim_journal=trim)
+        except BlobConflict as exc:
+            with self._lock:
+                self.conflicts += 1
+            if self.shared:
+                # Another process compacted first; its blob and the journal
+                # still hold every event, and the next use() reloads
+                return
+            raise TrackerConflict(f"tracker of {user_id!r} was saved by another process") from exc
+        entry.saved_version = version
+        entry.unsaved = 0
+        with self._lock:
+            self.compactions += 1
+
+    def _acquire(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            loading = False
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+            elif user_id in self._spilling:
+                # Evicted but not yet saved: the in-memory copy is the newest
+                entry = self._entries[user_id] = self._spilling.pop(user_id)
+                self._total_bytes += entry.size
+                self.hits += 1
+            else:
+                self.misses += 1
+                entry = self._entries[user_id] = _Entry()
+                loading = True
+            entry.pins += 1
+            entry.last_access = time.monotonic()
+        if loading:
+            try:
+                self._load(user_id, entry)
+            except BaseException as exc:
+                entry.error = exc
+                with self._lock:
+                    entry.pins -= 1
+                    del self._entries[user_id]
+                raise
+            finally:
+                entry.ready.set()
+            with self._lock:
+                entry.size = entry.tracker.memory_usage()
+                self._total_bytes += entry.size
+        else:
+            entry.ready.wait()
+            if entry.error is not None:
+                with self._lock:
+                    entry.pins -= 1
+                raise entry.error
+        return entry
+
+    def _release(self, user_id, entry):
+        with self._lock:
+            entry.pins -= 1
+            # Trackers grow as they record events; refresh the estimate
+            size = entry.tracker.memory_usage()
+            self._total_bytes += size - entry.size
+            entry.size = size
+            victims = self._evict()
+        for victim_id, victim in victims:
+            self._spill(victim_id, victim)
+        if self.shared and entry.unsaved >= self.compact_every:
+            # Keeps the journal, and the replay on the next load, short
+            with entry.lock:
+                if entry.unsaved >= self.compact_every:
+                    self._save(user_id, entry)
+
+    def _evict(self):
+        # Caller holds self._lock; the victims are saved by _spill() after it is released
+        now = time.monotonic()
+        victims = []
+        for user_id in list(self._entries):
+            entry = self._entries[user_id]
+            over_budget = self._total_bytes > self.max_bytes
+            expired = self.ttl is not None and now - entry.last_access > self.ttl
+            if not over_budget and not expired:
+                # Entries are in LRU order, so nothing later qualifies either
+                break
+            if entry.pins:
+                continue
+            del self._entries[user_id]
+            self._spilling[user_id] = entry
+            self._total_bytes -= entry.size
+            self.evictions += 1
+            victims.append((user_id, entry))
+        return victims
+
+    def _spill(self, user_id, entry):
+        try:
+            with entry.lock:
+                if entry.dirty():
+                    self._save(user_id, entry)
+        finally:
+            with self._lock:
+                if self._spilling.get(user_id) is entry:
+                    del self._spilling[user_id]
+                    if entry.dirty() and not self.shared:
+                        # The save failed; keep the changes resident
+                        self._entries[user_id] = entry
+                        self._entries.move_to_end(user_id, last=False)
+                        self._total_bytes += entry.size
+
+    @contextmanager
+    def use(self, user_id):
+        """Pin and lock a user's tracker for the duration of the block"""
+        entry = self._acquire(user_id)
+        try:
+            with entry.lock:
+                if self.shared:
+                    self._refresh(user_id, entry)
+                yield entry.tracker
+        finally:
+            self._release(user_id, entry)
+
+    def call(self, user_id, method, *args):
+        """Call a tracker method under use() and return its result"""
+        with self.use(user_id) as tracker:
+            return getattr(tracker, method)(*args)
+
+    def get(self, user_id):
+        """Return a user's tracker without pinning it"""
+        with self.use(user_id) as tracker:
+            return tracker
+
+    def flush(self):
+        """Persist every in-memory tracker that changed since it was loaded"""
+        with self._lock:
+            entries = list(self._entries.items())
+        for user_id, entry in entries:
+            if not entry.ready.is_set() or entry.error is not None:
+                continue
+            with entry.lock:
+                if entry.dirty():
+                    self._save(user_id, entry)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "resident_trackers": len(self._entries),
+                "resident_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "conflicts": self.conflicts,
+                "compactions": self.compactions
+            }
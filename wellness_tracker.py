@@ -1,10 +1,61 @@
 from datetime import datetime, timedelta
 import random
+import time
+import metrics
+from burnout_scoring import session_burnout_risk
+from event_store import EventStore, RunningStats, from_us, to_us
+from rollups import RollupIndex
+
+# Settings understood by the tracker. The event log stores settings by
+# position in this tuple, so only ever append new keys.
+SETTING_KEYS = ("microbreak_interval", "focus_session_length", "daily_work_limit", "burnout_threshold")
+
+
+def tracker_settings(values):
+    """
+    The tracker settings among values, checked to be positive numbers.
+    Raises ValueError describing the first invalid one.
+    """
+    settings = {}
+    for key, value in values.items():
+        if key not in SETTING_KEYS:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{key} must be a number")
+        if not value > 0:
+            raise ValueError(f"{key} must be positive")
+        settings[key] = value
+    return settings
+
+
+def credit_focus_time(rollups, focus_us, session_minutes):
+    """
+    Bulk form of the focus time credit of WellnessTracker: each session
+    start in the sorted NumPy array focus_us is credited until the next one,
+    capped at session_minutes, a scalar or one value per gap.
+    """
+    import numpy as np
+    if len(focus_us) < 2:
+        return
+    starts = focus_us[:-1]
+    caps = (np.asarray(session_minutes) * 60_000_000).astype(np.int64)
+    rollups.add_spans("focus_seconds", starts, np.minimum(focus_us[1:], starts + caps))
+
+# Burnout messages and the risk each one applies above, highest first
+BURNOUT_MESSAGES = (
+    (80, "High burnout risk! Please take a long break."),
+    (60, "You're working hard. Consider pausing soon."),
+    (30, "Stay balanced. Take microbreaks regularly.")
+)
+
+# Live events only; replaying an event log does not count again
+TRACKER_EVENTS = metrics.counter(
+    "wellness_tracker_events_total", "Events recorded by WellnessTrackers", ("kind",))
 
 class WellnessTracker:
-    def __init__(self):
-        self.focus_sessions = []
-        self.breaks = []
+    def __init__(self, event_log=None):
+        self.focus_sessions = EventStore()
+        self.breaks = EventStore()
         self.settings = {
             "microbreak_interval": 30,
             "focus_session_length": 50,
@@ -13,20 +64,120 @@ class WellnessTracker:
         }
         self.session_start = datetime.now()
         self.total_interruptions = 0
+        self.alert_counts = {"posture": 0, "eye_strain": 0}
+        self.rollups = RollupIndex()
+        # Memoised views are keyed by this mutation counter plus a time
+        # quantum, since several views also depend on the clock
+        self.version = 0
+        self.cache_quantum = 1.0  # seconds
+        self._cache = {}
+        self._cache_stats = {}
+        # Optional EventLog; every state change is appended to it
+        self.event_log = event_log
+        if event_log is not None:
+            event_log.append_event(self, "session_start", to_us(self.session_start))
+
+    def _log(self, kind, timestamp_us, key=0, value=0.0):
+        if self.event_log is not None:
+            self.event_log.append_event(self, kind, timestamp_us, key, value)
+
+    def invalidate(self):
+        """Discard memoised views; call after changing state directly"""
+        self.version += 1
+
+    def _memoized(self, name, compute):
+        key = (self.version, int(time.time() // self.cache_quantum))
+        stats = self._cache_stats.setdefault(name, {"hits": 0, "misses": 0})
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            stats["hits"] += 1
+            return dict(cached[1])
+        stats["misses"] += 1
+        value = compute()
+        self._cache[name] = (key, value)
+        return dict(value)
+
+    def cache_info(self):
+        return {
+            name: dict(stats, hit_rate=stats["hits"] / max(1, stats["hits"] + stats["misses"]))
+            for name, stats in self._cache_stats.items()
+        }
+
+    def _record_focus_session(self, now_us):
+        self.version += 1
+        previous_us = self.focus_sessions.last_us()
+        self.focus_sessions.append_us(now_us)
+        self.rollups.add("focus_sessions", now_us)
+        if previous_us is not None:
+            # A session lasts until the next one starts, but at most one
+            # focus session length; a gap overnight is not focus time
+            end_us = min(now_us, previous_us + int(self.settings["focus_session_length"] * 60_000_000))
+            self.rollups.add_span("focus_seconds", previous_us, end_us)
+
+    def _record_break(self, now_us):
+        self.version += 1
+        self.breaks.append_us(now_us)
+        self.rollups.add("breaks", now_us)
+
+    def _record_interruption(self, now_us):
+        self.version += 1
+        self.total_interruptions += 1
+        self.rollups.add("interruptions", now_us)
+
+    def _record_alert(self, alert_type, now_us):
+        self.version += 1
+        self.alert_counts[alert_type] = self.alert_counts.get(alert_type, 0) + 1
+        self.rollups.add(f"{alert_type}_alerts", now_us)
 
     def start_focus_session(self):
         now = datetime.now()
-        self.focus_sessions.append(now)
+        now_us = to_us(now)
+        self._record_focus_session(now_us)
+        self._log("focus", now_us)
+        TRACKER_EVENTS.inc("focus")
         return {"message": f"Focus session started at {now.strftime('%H:%M:%S')}"}
 
     def take_break(self):
         now = datetime.now()
-        self.breaks.append(now)
+        now_us = to_us(now)
+        self._record_break(now_us)
+        self._log("break", now_us)
+        TRACKER_EVENTS.inc("break")
         return {"message": f"Break taken at {now.strftime('%H:%M:%S')}"}
 
+    def record_interruption(self):
+        now_us = to_us(datetime.now())
+        self._record_interruption(now_us)
+        self._log("interruption", now_us)
+        TRACKER_EVENTS.inc("interruption")
+
+    def record_alert(self, alert_type):
+        """Count a posture or eye-strain alert raised by a detector"""
+        now_us = to_us(datetime.now())
+        self._record_alert(alert_type, now_us)
+        self._log(f"{alert_type}_alert", now_us)
+        TRACKER_EVENTS.inc(f"{alert_type}_alert")
+
+    def roll_session(self, now=None):
+        """
+        Start a new session if the current one began on an earlier day, so
+        that after a reload "hours worked today" only counts today.
+        Returns True when a new session was started.
+        """
+        now = now or datetime.now()
+        if self.session_start.date() >= now.date():
+            return False
+        self.session_start = now
+        self._log("session_start", to_us(now))
+        self.invalidate()
+        return True
+
     def get_break_recommendation(self):
+        return self._memoized("break_recommendation", self._compute_break_recommendation)
+
+    def _compute_break_recommendation(self):
         now = datetime.now()
-        last_break = self.breaks[-1] if self.breaks else self.session_start
+        last_break = from_us(self.breaks.last_us()) if self.breaks else self.session_start
         minutes_since_last_break = (now - last_break).total_seconds() / 60
         interval = self.settings["microbreak_interval"]
 
@@ -48,21 +199,34 @@ class WellnessTracker:
             }
 
     def calculate_burnout_risk(self):
+        return self._memoized("burnout_risk", self._compute_burnout_risk)
+
+    def _compute_burnout_risk(self):
         now = datetime.now()
         hours_worked_today = (now - self.session_start).total_seconds() / 3600
-        ratio = hours_worked_today / self.settings["daily_work_limit"]
-        burnout_risk = min(100, int(ratio * 100))
-
-        message = "You're doing great!"
-        if burnout_risk > 80:
-            message = "High burnout risk! Please take a long break."
-        elif burnout_risk > 60:
-            message = "You're working hard. Consider pausing soon."
-        elif burnout_risk > 30:
-            message = "Stay balanced. Take microbreaks regularly."
+        burnout_risk = session_burnout_risk(hours_worked_today, self.settings["daily_work_limit"])
 
+        message = next((text for threshold, text in BURNOUT_MESSAGES if burnout_risk > threshold),
+                       "You're doing great!")
         return {"burnout_risk": burnout_risk, "message": message}
 
+    def seconds_until_break(self):
+        """Seconds until get_break_recommendation() turns to should_break; 0 once it has"""
+        last_break = from_us(self.breaks.last_us()) if self.breaks else self.session_start
+        due = last_break + timedelta(minutes=self.settings["microbreak_interval"])
+        return max(0.0, (due - datetime.now()).total_seconds())
+
+    def seconds_until_burnout_change(self):
+        """Seconds until the burnout message changes, or None if it no longer will"""
+        limit_seconds = self.settings["daily_work_limit"] * 3600
+        elapsed = (datetime.now() - self.session_start).total_seconds()
+        risk = session_burnout_risk(elapsed / 3600, self.settings["daily_work_limit"])
+        upcoming = [threshold for threshold, _ in BURNOUT_MESSAGES if threshold >= risk]
+        if not upcoming:
+            return None
+        # The message changes once the risk exceeds the next threshold
+        return max(0.0, (min(upcoming) + 1) / 100 * limit_seconds - elapsed)
+
     def get_focus_recovery_suggestion(self):
         suggestions = [
             {"title": "Box Breathing", "description": "Inhale for 4s, hold for 4s, exhale for 4s, hold for 4s. Repeat for 2 minutes."},
@@ -73,6 +237,9 @@ class WellnessTracker:
         return random.choice(suggestions)
 
     def get_stats(self):
+        return self._memoized("stats", self._compute_stats)
+
+    def _compute_stats(self):
         now = datetime.now()
         session_duration = (now - self.session_start).total_seconds() / 3600
         avg_focus_duration = self._average_focus_duration()
@@ -88,10 +255,54 @@ class WellnessTracker:
     def _average_focus_duration(self):
         if len(self.focus_sessions) < 2:
             return self.settings["focus_session_length"]
-        total = 0
-        for i in range(1, len(self.focus_sessions)):
-            total += (self.focus_sessions[i] - self.focus_sessions[i - 1]).total_seconds()
-        return (total / (len(self.focus_sessions) - 1)) / 60
+        return self.focus_sessions.gaps.mean / 60
+
+    def get_interval_stats(self):
+        # Running aggregates maintained by the event stores, in seconds
+        return {
+            "focus_gaps": self.focus_sessions.gaps.summary(),
+            "break_intervals": self.breaks.gaps.summary()
+        }
+
+    def get_trend(self, kind, resolution, since, until=None):
+        """
+        Per-bucket totals for "focus_sessions", "focus_seconds", "breaks" or
+        "interruptions" at "minute", "hour" or "day" resolution
+        """
+        return self.rollups.series(kind, resolution, since, until)
 
     def update_settings(self, new_settings):
         self.settings.update(new_settings)
+        self.version += 1
+        TRACKER_EVENTS.inc("setting")
+        if self.event_log is not None:
+            now_us = to_us(datetime.now())
+            for key, value in new_settings.items():
+                self._log("setting", now_us, key, value)
+
+    def memory_usage(self):
+        """Rough resident size in bytes, used for registry byte budgets"""
+        # Fixed object overhead plus timestamp buffers and rollup buckets
+        return 5120 + self.focus_sessions.nbytes + self.breaks.nbytes + self.rollups.bucket_count() * 100
+
+    def to_snapshot(self):
+        """Aggregate state (everything except raw timestamps) as plain JSON data"""
+        return {
+            "settings": self.settings,
+            "session_start": to_us(self.session_start),
+            "total_interruptions": self.total_interruptions,
+            "alert_counts": self.alert_counts,
+            "focus_gaps": self.focus_sessions.gaps.to_dict(),
+            "break_gaps": self.breaks.gaps.to_dict(),
+            "rollups": self.rollups.to_dict()
+        }
+
+    def restore_snapshot(self, state):
+        self.settings.update(state["settings"])
+        self.session_start = from_us(state["session_start"])
+        self.total_interruptions = state["total_interruptions"]
+        self.alert_counts = dict(state["alert_counts"])
+        self.focus_sessions.gaps = RunningStats.from_dict(state["focus_gaps"])
+        self.breaks.gaps = RunningStats.from_dict(state["break_gaps"])
+        self.rollups = RollupIndex.from_dict(state["rollups"])
+        self.version += 1
@@ -0,0 +1,220 @@
+import copy
+import logging
+import os
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+FLUSHES = metrics.counter(
+    "wellness_write_behind_flushes_total", "Write-behind flushes by trigger", ("reason",))
+FLUSH_LATENCY = metrics.histogram(
+    "wellness_write_behind_flush_seconds", "Time to write one batch of buffered changes")
+MUTATIONS = metrics.counter(
+    "wellness_write_behind_mutations_total", "Buffered stats and settings changes by outcome", ("outcome",))
+
+
+class _Pending:
+    """Coalesced changes to one (user, section) since the last flush"""
+
+    __slots__ = ("increments", "updates")
+
+    def __init__(self):
+        self.increments = {}
+        self.updates = {}
+
+    def add(self, increments, updates):
+        # A value set after an increment replaces it; an increment after a
+        # value set adds to the new value, so the two dicts never share keys
+        for key, value in (updates or {}).items():
+            self.increments.pop(key, None)
+            self.updates[key] = copy.deepcopy(value)
+        for key, amount in (increments or {}).items():
+            if key in self.updates:
+                self.updates[key] = (self.updates[key] or 0) + amount
+            else:
+                self.increments[key] = self.increments.get(key, 0) + amount
+
+    def overlay(self, values):
+        values.update(copy.deepcopy(self.updates))
+        for key, amount in self.increments.items():
+            values[key] = (values.get(key) or 0) + amount
+        return values
+
+
+class WriteBehindStorage:
+    """
+    Storage wrapper that buffers stats and settings writes and tracker
+    journal rows.
+    Increments and value updates are coalesced per (user, section, key) and
+    written, with the journal rows, in one batched transaction once
+    max_pending changes are waiting, and by a background thread every
+    flush_interval seconds.
+    Reads see buffered changes, and close() flushes what is left, so
+    acknowledged writes survive a clean shutdown; a crash loses at most one
+    interval. Activity samples and tracker blobs pass straight
+    through. Counters stay SQL increments, so several processes can still
+    share one database, but each process only sees the others' changes once
+    they are flushed.
+    """
+
+    def __init__(self, backend, flush_interval=1.0, max_pending=256):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._journal = []
+        self._mutations = 0
+        self._lock = threading.RLock()
+        self.stats = {"mutations": 0, "flushes": 0, "rows": 0, "journal_rows": 0}
+        self._stop_event = threading.Event()
+        self._thread = None
+        if flush_interval:
+            self._thread = threading.Thread(target=self._flush_loop, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush("interval")
+            except Exception:
+                # Changes stay buffered and are retried on the next tick
+                logger.exception("Write-behind flush failed")
+
+    def _flush_full(self):
+        # Caller holds self._lock. The change that filled the buffer is already
+        # in it, so a failed flush must not fail the request: its retry would
+        # buffer the change a second time
+        try:
+            self.flush("size")
+        except Exception:
+            logger.exception("Write-behind flush failed")
+
+    def ensure_user(self, user_id, defaults):
+        self.backend.ensure_user(user_id, defaults)
+
+    def get_section(self, user_id, section):
+        with self._lock:
+            pending = self._pending.get((user_id, section))
+            if pending is not None:
+                return pending.overlay(self.backend.get_section(user_id, section))
+        return self.backend.get_section(user_id, section)
+
+    def apply(self, user_id, section, increments=None, updates=None):
+        """
+        Buffer counter increments and value updates to one section.
+        Returns the new values of the incremented counters, as seen by this process.
+        """
+        with self._lock:
+            pending = self._pending.get((user_id, section))
+            if pending is None:
+                pending = self._pending[(user_id, section)] = _Pending()
+            pending.add(increments, updates)
+            self._mutations += 1
+            self.stats["mutations"] += 1
+            MUTATIONS.inc("buffered")
+            result = {}
+            if increments:
+                values = pending.overlay(self.backend.get_section(user_id, section))
+                result = {key: values[key] for key in increments}
+            if self._mutations >= self.max_pending:
+                self._flush_full()
+            return result
+
+    def update_section(self, user_id, section, values):
+        self.apply(user_id, section, updates=values)
+
+    def increment(self, user_id, section, key, amount=1):
+        return self.apply(user_id, section, increments={key: amount})[key]
+
+    def append_journal(self, rows):
+        """Buffer tracker journal rows; they are written in order with the next flush"""
+        with self._lock:
+            self._journal.extend(rows)
+            self._mutations += len(rows)
+            self.stats["mutations"] += len(rows)
+            MUTATIONS.inc("buffered", amount=len(rows))
+            if self._mutations >= self.max_pending:
+                self._flush_full()
+
+    def read_journal(self, user_id, name, after_seq=0, with_blob=False):
+        # Only returns committed rows; callers flush first when they need their own
+        return self.backend.read_journal(user_id, name, after_seq, with_blob)
+
+    def flush(self, reason="manual"):
+        """
+        Write all buffered changes in one transaction; returns the number of
+        sections and journal rows written
+        """
+        with self._lock:
+            if not self._pending and not self._journal:
+                return 0
+            changes = [
+                (user_id, section, pending.increments, pending.updates)
+                for (user_id, section), pending in self._pending.items()
+            ]
+            journal = self._journal
+            started = time.perf_counter()
+            # The buffer is only cleared once the batch has committed
+            self.backend.apply_many(changes, journal)
+            FLUSH_LATENCY.observe(time.perf_counter() - started)
+            FLUSHES.inc(reason)
+            MUTATIONS.inc("coalesced", amount=self._mutations - len(changes) - len(journal))
+            self.stats["flushes"] += 1
+            self.stats["rows"] += len(changes)
+            self.stats["journal_rows"] += len(journal)
+            self._pending = {}
+            self._journal = []
+            self._mutations = 0
+            return len(changes) + len(journal)
+
+    def append_activity(self, samples):
+        self.backend.append_activity(samples)
+
+    def get_activity(self, user_id):
+        return self.backend.get_activity(user_id)
+
+    @property
+    def shared(self):
+        return self.backend.shared
+
+    def save_blob(self, user_id, name, data, expected_version=None, trim_journal=None):
+        return self.backend.save_blob(user_id, name, data, expected_version, trim_journal)
+
+    def load_blob(self, user_id, name):
+        return self.backend.load_blob(user_id, name)
+
+    def load_blob_version(self, user_id, name):
+        return self.backend.load_blob_version(user_id, name)
+
+    def blob_version(self, user_id, name):
+        return self.backend.blob_version(user_id, name)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, pending_sections=len(self._pending), pending_journal_rows=len(self._journal),
+                        pending_mutations=self._mutations)
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush("close")
+        self.backend.close()
+
+
+def wrap_storage(backend):
+    """
+    Put a WriteBehindStorage in front of backend unless WELLNESS_WRITE_BEHIND=0.
+    WELLNESS_FLUSH_INTERVAL (seconds, 0 for size-only flushing) and
+    WELLNESS_FLUSH_MAX_PENDING set the flush thresholds.
+    """
+    if os.environ.get("WELLNESS_WRITE_BEHIND", "1") == "0":
+        return backend
+    return WriteBehindStorage(
+        backend,
+        flush_interval=float(os.environ.get("WELLNESS_FLUSH_INTERVAL", "1.0")),
+        max_pending=int(os.environ.get("WELLNESS_FLUSH_MAX_PENDING", "256"))
+    )